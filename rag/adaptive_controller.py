@@ -0,0 +1,96 @@
+from typing import Any, Dict
+
+PIPELINE_MODES = ("fast", "balanced", "thorough")
+# The full pipeline stays the default until the thresholds of MODE_SETTINGS are tuned on a query set,
+# queries matching the FAQ index are still answered by the FAQ fast path in this mode (see rag.inference)
+DEFAULT_PIPELINE_MODE = "thorough"
+
+# Thresholds deciding when the first retrieval is good enough to answer directly
+MODE_SETTINGS = {
+    "fast": {
+        "min_agreement": 0.2,
+        "min_dense_margin": 0.01,
+        "fallback_iterations": 1,
+        "fallback_augment": False,
+    },
+    "balanced": {
+        "min_agreement": 0.4,
+        "min_dense_margin": 0.02,
+        "fallback_iterations": None,
+        "fallback_augment": True,
+    },
+}
+
+DETAILED_QUERY_WORDS = 12
+
+
+class AdaptivePipelineController:
+    """
+    Decides, from cheap signals, how much of the inference pipeline a query needs.
+
+    The first hybrid search is always performed on the raw query. Its signals (agreement between
+    BM25 and dense results, dense score margin) together with the query length are used to decide
+    whether query augmentation and the enhance search loop can be skipped.
+
+    Modes:
+        - "fast": skips augmentation, skips the enhance loop for easy queries and performs
+          at most one enhance iteration otherwise
+        - "balanced": skips augmentation and the enhance loop for easy queries, skips only
+          augmentation for detailed queries and runs the full pipeline otherwise
+        - "thorough": always runs the full pipeline
+
+    Attributes:
+        mode (str): Pipeline mode, one of PIPELINE_MODES.
+        max_search_iterations (int): Upper bound of enhance search iterations.
+
+    Methods:
+        plan(query: str, signals: Dict[str, float]) -> Dict[str, Any]:
+            Returns the pipeline plan for a query.
+        may_augment(query: str) -> bool:
+            Whether the plan can include query augmentation, known before the first retrieval.
+    """
+
+    def __init__(self, mode: str = DEFAULT_PIPELINE_MODE, max_search_iterations: int = 5):
+        if mode not in PIPELINE_MODES:
+            raise ValueError(f"Unknown pipeline mode: {mode}, expected one of {PIPELINE_MODES}")
+        self.mode = mode
+        self.max_search_iterations = max_search_iterations
+
+    def may_augment(self, query: str) -> bool:
+        """
+        Whether `plan` can include query augmentation for a query, whatever the retrieval signals,
+        used to start augmentation speculatively alongside the first retrieval.
+        """
+        if self.mode == "thorough":
+            return True
+        return MODE_SETTINGS[self.mode]["fallback_augment"] and len(query.split()) < DETAILED_QUERY_WORDS
+
+    def plan(self, query: str, signals: Dict[str, float]) -> Dict[str, Any]:
+        """
+        Decide which pipeline stages to run for a query.
+
+        Args:
+            query: User query
+            signals: Retrieval signals returned by MilvusHybridSearch.search_with_signals
+
+        Returns:
+            Dict with "augment" (bool), "max_search_iterations" (int) and "reason" (str) keys
+        """
+        if self.mode == "thorough" or not signals:
+            return {"augment": True, "max_search_iterations": self.max_search_iterations, "reason": "full pipeline"}
+
+        settings = MODE_SETTINGS[self.mode]
+        is_easy = (
+            signals.get("agreement", 0.0) >= settings["min_agreement"]
+            and signals.get("dense_margin", 0.0) >= settings["min_dense_margin"]
+        )
+        if is_easy:
+            return {"augment": False, "max_search_iterations": 0, "reason": "confident first retrieval"}
+
+        is_detailed = len(query.split()) >= DETAILED_QUERY_WORDS
+        iterations = settings["fallback_iterations"]
+        return {
+            "augment": settings["fallback_augment"] and not is_detailed,
+            "max_search_iterations": self.max_search_iterations if iterations is None else iterations,
+            "reason": "detailed query" if is_detailed else "uncertain first retrieval",
+        }
@@ -0,0 +1,134 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+from rag.utils.utils import load_documents
+from rag.utils.logger import logger
+from rag.chunkers.chunk_ids import chunk_id
+from rag.chunkers.parallel_chunker import ParallelChunker
+from rag.chunkers.token_aware_chunker import TokenAwareChunker
+
+ENV_PATH = ".env"
+FAQ_COLLECTION_NAME = "chatagh_faq"
+QUESTIONS_PER_CHUNK = 3
+# Chunks whose questions are generated before they are written to the index
+WRITE_EVERY_CHUNKS = 200
+# Answer of ANSWER_GENERATION_PROMPT_TEMPLATE when the chunk doesn't answer the question
+NO_ANSWER_MARKER = "not able to find the answer"
+
+
+def create_question_generator(name):
+    if name == "local":
+        from rag.models.doc2query import LocalQuestionGenerator
+        return LocalQuestionGenerator()
+    if name == "gemini":
+        from rag.models.google_genai_models import QuestionGenerationModel
+        return QuestionGenerationModel()
+    raise ValueError(f"Unknown question generator: {name}, expected 'gemini' or 'local'")
+
+
+def generate_entries(chunk, generator, num_questions=QUESTIONS_PER_CHUNK, answer_model=None):
+    """
+    Generate the FAQ index entries of a chunk: its likely questions and, with an answer model,
+    answers grounded in the chunk. Questions the chunk turns out not to answer are dropped.
+    """
+    try:
+        questions = generator.generate_questions(chunk, num_questions)
+    except Exception as e:
+        logger.warning(f"Question generation failed for chunk {chunk.metadata.get('chunk_id')}: {e}")
+        return []
+
+    entries = []
+    for question in questions:
+        entry = {"question": question, "document": chunk}
+        if answer_model is not None:
+            try:
+                entry["answer"] = answer_model.generate(question, context=[chunk])
+            except Exception as e:
+                logger.warning(f"Answer generation failed for '{question}': {e}")
+                continue
+            if not entry["answer"] or NO_ANSWER_MARKER in entry["answer"]:
+                continue
+        entries.append(entry)
+    return entries
+
+
+def build_faq_index(data_path, collection_name=FAQ_COLLECTION_NAME, generator_name="gemini",
+                    num_questions=QUESTIONS_PER_CHUNK, answers=False, max_chunks=None, num_workers=4):
+    """
+    Offline doc2query job: generate the questions every chunk of the corpus answers and index them
+    in a separate question collection queried by the inference FAQ fast path.
+
+    Chunks are produced like in rag.indexing, so their ids point to the chunks of the main collection.
+
+    Args:
+        data_path (str): Path to the corpus store or the directory of JSON files
+        collection_name (str): FAQ collection, created if it doesn't exist
+        generator_name (str): "gemini" (QuestionGenerationModel) or "local" (LocalQuestionGenerator)
+        num_questions (int): Questions generated per chunk
+        answers (bool): Whether to precompute an answer grounded in the chunk for every question
+        max_chunks (int): Optional limit of processed chunks
+        num_workers (int): Chunks processed concurrently
+
+    Returns:
+        tuple: (number of chunks, number of indexed questions)
+    """
+    load_dotenv(dotenv_path=ENV_PATH)
+    chunker = ParallelChunker(
+        TokenAwareChunker("intfloat/multilingual-e5-large", max_tokens=512, remove_duplicates=True),
+        num_workers=os.cpu_count(),
+    )
+    chunks = chunker.chunk(load_documents(data_path))
+    if max_chunks:
+        chunks = chunks[:max_chunks]
+    for chunk in chunks:
+        chunk.metadata.setdefault("chunk_id", chunk_id(chunk))
+
+    from rag.vector_store.faq_index import MilvusFAQIndex
+
+    index = MilvusFAQIndex(collection_name)
+    generator = create_question_generator(generator_name)
+    answer_model = None
+    if answers:
+        from rag.models.google_genai_models import AnswerGenerationModel
+        answer_model = AnswerGenerationModel()
+
+    # The local model runs one forward pass at a time
+    workers = 1 if generator_name == "local" else num_workers
+    indexed = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for i in range(0, len(chunks), WRITE_EVERY_CHUNKS):
+            batch = chunks[i:i + WRITE_EVERY_CHUNKS]
+            entries = [
+                entry
+                for chunk_entries in executor.map(
+                    lambda chunk: generate_entries(chunk, generator, num_questions, answer_model), batch
+                )
+                for entry in chunk_entries
+            ]
+            indexed += index.add(entries)
+            logger.info(f"FAQ index: {min(i + WRITE_EVERY_CHUNKS, len(chunks))}/{len(chunks)} chunks, {indexed} questions")
+
+    return len(chunks), indexed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the doc2query FAQ index of the corpus")
+    parser.add_argument("--data", default="./data", help="Corpus store or directory of JSON files")
+    parser.add_argument("--collection", default=FAQ_COLLECTION_NAME, help="FAQ collection")
+    parser.add_argument("--generator", default="gemini", choices=["gemini", "local"],
+                        help="Question generator, 'local' runs a doc2query model without API calls")
+    parser.add_argument("--questions", type=int, default=QUESTIONS_PER_CHUNK, help="Questions per chunk")
+    parser.add_argument("--answers", action="store_true", help="Precompute grounded answers of the questions")
+    parser.add_argument("--max-chunks", type=int, default=None, help="Process only the first chunks")
+    parser.add_argument("--workers", type=int, default=4, help="Chunks processed concurrently")
+    args = parser.parse_args()
+
+    num_chunks, num_questions = build_faq_index(
+        args.data, args.collection, args.generator, args.questions, args.answers, args.max_chunks, args.workers
+    )
+    print(f"Indexed {num_questions} questions of {num_chunks} chunks to collection: {args.collection}")
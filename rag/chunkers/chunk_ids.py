@@ -0,0 +1,41 @@
+import hashlib
+from typing import Any
+
+# Milvus INT64 primary keys are signed, ids are kept in the positive range
+MAX_CHUNK_ID = (1 << 63) - 1
+
+
+def content_hash(text: str, bits: int = 64) -> int:
+    """
+    Compact hash of a chunk text, used for deduplication instead of keeping full strings.
+
+    Args:
+        text: Text to hash
+        bits: Hash size, 64 or 128 bits
+
+    Returns:
+        Hash as an integer
+    """
+    if bits not in (64, 128):
+        raise ValueError("bits must be 64 or 128")
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=bits // 8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def chunk_id(chunk: Any) -> int:
+    """
+    Deterministic id of a chunk, derived from its source url, start index and content.
+
+    The same chunk of the same page always gets the same id, so ids can be used as
+    Milvus primary keys and re-indexing the corpus upserts instead of duplicating chunks.
+
+    Args:
+        chunk: LangChain Document chunk
+
+    Returns:
+        Positive 63-bit integer id
+    """
+    metadata = chunk.metadata or {}
+    key = f"{metadata.get('url', '')}\x00{metadata.get('start_index', '')}\x00{chunk.page_content}"
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") & MAX_CHUNK_ID
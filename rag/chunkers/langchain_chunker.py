@@ -1,6 +1,7 @@
 from typing import List, Dict, Any, Optional, Callable
 
 from rag.chunkers.base_chunker import BaseChunker
+from rag.chunkers.chunk_ids import content_hash
 
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
@@ -29,6 +30,7 @@ class LangChainChunker(BaseChunker):
             separators: String separators to split text on when possible
             length_function: Function to measure text length (default: character count)
             add_start_index: Whether to add a 'start_index' field to chunk metadata
+            remove_duplicates: Whether to drop chunks with already seen content
         """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
@@ -40,8 +42,9 @@ class LangChainChunker(BaseChunker):
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
-            separators=["\n\n", "\n", " ", ""] + self.separators if self.separators else [],
-            length_function=length_function
+            separators=["\n\n", "\n", " ", ""] + (self.separators or []),
+            length_function=length_function,
+            add_start_index=add_start_index
         )
 
     def chunk(self, documents: List[Any]) -> List[Any]:
@@ -60,13 +63,14 @@ class LangChainChunker(BaseChunker):
         chunked_docs = self.text_splitter.split_documents(documents)
 
         if self.remove_duplicates:
-            seen_page_contents = set()
+            seen_hashes = set()
             unique_chunked_docs = []
 
             for doc in chunked_docs:
-                if doc.page_content not in seen_page_contents:
+                digest = content_hash(doc.page_content)
+                if digest not in seen_hashes:
                     unique_chunked_docs.append(doc)
-                    seen_page_contents.add(doc.page_content)
+                    seen_hashes.add(digest)
 
             chunked_docs = unique_chunked_docs
 
@@ -0,0 +1,147 @@
+import os
+import copy
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Iterable, Iterator
+
+from rag.chunkers.base_chunker import BaseChunker
+from rag.chunkers.chunk_ids import content_hash, chunk_id
+
+from langchain_core.documents import Document
+
+# Chunker of the worker process, set once by the pool initializer
+_worker_chunker = None
+
+
+def _init_worker(chunker: BaseChunker):
+    global _worker_chunker
+    _worker_chunker = chunker
+
+
+def _chunk_shard(documents: List[Document]) -> List[Document]:
+    return _worker_chunker.chunk(documents)
+
+
+class ParallelChunker(BaseChunker):
+    """
+    Chunker sharding documents across a process pool.
+
+    The wrapped chunker is sent once to every worker process, documents are sent in shards
+    of `shard_size` and chunks are streamed back in the order of the input documents, so the
+    output is identical to chunking in a single process. At most `max_pending_shards` shards
+    are in flight, which bounds memory when chunking a large corpus.
+
+    Deduplication is done in the parent process over 64-bit (or 128-bit) content hashes instead
+    of full chunk strings. Every chunk gets a deterministic 'chunk_id' in its metadata, which
+    is used as the Milvus primary key (see `rag.chunkers.chunk_ids.chunk_id`).
+    """
+
+    def __init__(
+        self,
+        chunker: BaseChunker,
+        num_workers: Optional[int] = None,
+        shard_size: int = 64,
+        max_pending_shards: Optional[int] = None,
+        remove_duplicates: bool = False,
+        hash_bits: int = 64,
+    ):
+        """
+        Initialize the parallel chunker.
+
+        Args:
+            chunker: Chunker used by the worker processes, must be picklable
+            num_workers: Number of worker processes (default: number of CPUs)
+            shard_size: Number of documents sent to a worker at once
+            max_pending_shards: Maximum number of shards in flight (default: 4 per worker)
+            remove_duplicates: Whether to drop chunks with already seen content
+            hash_bits: Size of the content hashes used for deduplication, 64 or 128
+        """
+        self.chunker = copy.copy(chunker)
+        # Duplicates across shards can only be detected here, workers don't deduplicate
+        if hasattr(self.chunker, "remove_duplicates"):
+            remove_duplicates = remove_duplicates or self.chunker.remove_duplicates
+            self.chunker.remove_duplicates = False
+
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.shard_size = shard_size
+        self.max_pending_shards = max_pending_shards or 4 * self.num_workers
+        self.remove_duplicates = remove_duplicates
+        self.hash_bits = hash_bits
+
+    def chunk(self, documents: List[Any]) -> List[Any]:
+        """
+        Split LangChain documents into chunks using all worker processes.
+
+        Args:
+            documents: List of LangChain Document objects
+
+        Returns:
+            List of LangChain Document objects, chunked
+        """
+        if not all(isinstance(doc, Document) for doc in documents):
+            raise ValueError("All documents must be LangChain Document objects")
+
+        return list(self.chunk_iter(documents))
+
+    def chunk_iter(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """
+        Lazily chunk documents, yielding chunks in input order as shards complete.
+
+        Args:
+            documents: Iterable of LangChain Document objects
+
+        Yields:
+            LangChain Document chunks with 'chunk_id' in metadata
+        """
+        seen_hashes = set()
+
+        for chunks in self._shard_results(documents):
+            for chunk in chunks:
+                if self.remove_duplicates:
+                    digest = content_hash(chunk.page_content, self.hash_bits)
+                    if digest in seen_hashes:
+                        continue
+                    seen_hashes.add(digest)
+                chunk.metadata["chunk_id"] = chunk_id(chunk)
+                yield chunk
+
+    def chunk_text(self, text: str, metadata: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """
+        Split text string into LangChain Document chunks.
+
+        Args:
+            text: Text string to be chunked
+            metadata: Optional metadata to include with each chunk
+
+        Returns:
+            List of LangChain Document objects
+        """
+        return self.chunk([Document(page_content=text, metadata=metadata or {})])
+
+    def _shards(self, documents: Iterable[Document]) -> Iterator[List[Document]]:
+        shard = []
+        for doc in documents:
+            shard.append(doc)
+            if len(shard) == self.shard_size:
+                yield shard
+                shard = []
+        if shard:
+            yield shard
+
+    def _shard_results(self, documents: Iterable[Document]) -> Iterator[List[Document]]:
+        if self.num_workers == 1:
+            for shard in self._shards(documents):
+                yield self.chunker.chunk(shard)
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=self.num_workers, initializer=_init_worker, initargs=(self.chunker,)
+        ) as executor:
+            pending = deque()
+            for shard in self._shards(documents):
+                pending.append(executor.submit(_chunk_shard, shard))
+                if len(pending) >= self.max_pending_shards:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
@@ -0,0 +1,285 @@
+import re
+import hashlib
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+
+from rag.chunkers.base_chunker import BaseChunker
+from rag.chunkers.chunk_ids import content_hash
+
+from langchain_core.documents import Document
+
+# Split levels tried in order when a span does not fit the token budget
+SPLIT_PATTERNS = [
+    re.compile(r"\n\s*\n"),
+    re.compile(r"\n"),
+    re.compile(r"(?<=[.!?;:])\s+"),
+    re.compile(r"\s+"),
+]
+# Milvus `text` VARCHAR max_length is in bytes of the UTF-8 encoded text, Polish letters take 2 bytes,
+# typographic quotes, dashes and ellipses („ ” – …) 3 bytes
+MAX_CHUNK_BYTES = 5000
+# Upper bound of the UTF-8 encoded size of a character
+MAX_CHAR_BYTES = 4
+
+
+class TokenAwareChunker(BaseChunker):
+    """
+    Structure-preserving chunker measuring chunk length with the embedding model tokenizer.
+
+    Documents are first split into sections on the headings listed in `metadata["headings"]`
+    (and markdown '#' lines), then sections are split on paragraphs, lines, sentences and words
+    until every piece fits the token budget, and consecutive pieces of a section are greedily
+    merged back up to the budget. Every chunk is guaranteed to fit the embedding model window,
+    so no text is silently truncated at embedding time, and `max_bytes` (UTF-8 encoded), so it fits the
+    text field of the vector store.
+
+    Each document is tokenized once (documents are tokenized in batches, results are cached by
+    content hash), token counts of any text span are then computed from token offsets in O(log n).
+
+    Chunks are exact slices of the document content, 'start_index' and 'section' are added
+    to the chunk metadata.
+    """
+
+    def __init__(
+        self,
+        tokenizer_name: str = "intfloat/multilingual-e5-large",
+        max_tokens: int = 512,
+        reserved_tokens: int = 16,
+        min_tokens: int = 64,
+        batch_size: int = 64,
+        cache_size: int = 10000,
+        add_start_index: bool = True,
+        remove_duplicates: bool = False,
+        max_bytes: int = MAX_CHUNK_BYTES,
+    ):
+        """
+        Initialize the token-aware chunker.
+
+        Args:
+            tokenizer_name: Hugging Face name of the embedding model tokenizer
+            max_tokens: Maximum sequence length of the embedding model
+            reserved_tokens: Tokens reserved for special tokens and the 'passage: ' prefix
+            min_tokens: Chunks smaller than this are merged with the following section
+            batch_size: Number of documents tokenized in a single tokenizer call
+            cache_size: Number of tokenized documents kept in the cache
+            add_start_index: Whether to add a 'start_index' field to chunk metadata
+            remove_duplicates: Whether to drop chunks with already seen content
+            max_bytes: Maximum size of a chunk in bytes, UTF-8 encoded
+        """
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name, use_fast=True)
+        self.token_budget = max_tokens - reserved_tokens
+        self.min_tokens = min_tokens
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.add_start_index = add_start_index
+        self.remove_duplicates = remove_duplicates
+        self.max_bytes = max_bytes
+        self._token_starts_cache: OrderedDict = OrderedDict()
+
+    def chunk(self, documents: List[Any]) -> List[Any]:
+        """
+        Split LangChain documents into token-bounded chunks.
+
+        Args:
+            documents: List of LangChain Document objects
+
+        Returns:
+            List of LangChain Document objects, chunked
+        """
+        if not all(isinstance(doc, Document) for doc in documents):
+            raise ValueError("All documents must be LangChain Document objects")
+
+        chunked_docs = []
+        seen_hashes = set()
+        for i in range(0, len(documents), self.batch_size):
+            batch = documents[i:i + self.batch_size]
+            token_starts = self._tokenize([doc.page_content for doc in batch])
+
+            for doc, starts in zip(batch, token_starts):
+                for chunk in self._chunk_document(doc, starts):
+                    if self.remove_duplicates:
+                        digest = content_hash(chunk.page_content)
+                        if digest in seen_hashes:
+                            continue
+                        seen_hashes.add(digest)
+                    chunked_docs.append(chunk)
+
+        return chunked_docs
+
+    def chunk_text(self, text: str, metadata: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """
+        Split text string into LangChain Document chunks.
+
+        Args:
+            text: Text string to be chunked
+            metadata: Optional metadata to include with each chunk
+
+        Returns:
+            List of LangChain Document objects
+        """
+        return self.chunk([Document(page_content=text, metadata=metadata or {})])
+
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        """
+        Count embedding model tokens (without special tokens) of the texts.
+        """
+        return [len(starts) for starts in self._tokenize(texts)]
+
+    def _tokenize(self, texts: List[str]) -> List[List[int]]:
+        """
+        Return start character offsets of the tokens of each text, using the cache where possible.
+        """
+        keys = [hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest() for text in texts]
+        missing = {key: text for key, text in zip(keys, texts) if key not in self._token_starts_cache}
+
+        computed = {}
+        if missing:
+            # The Rust tokenizer is called directly, it encodes the batch in parallel
+            encodings = self.tokenizer.backend_tokenizer.encode_batch(list(missing.values()), add_special_tokens=False)
+            for key, offsets in zip(missing, (encoding.offsets for encoding in encodings)):
+                computed[key] = [start for start, end in offsets]
+                if self.cache_size > 0:
+                    self._token_starts_cache[key] = computed[key]
+                    if len(self._token_starts_cache) > self.cache_size:
+                        self._token_starts_cache.popitem(last=False)
+
+        results = []
+        for key in keys:
+            if key in computed:
+                # Possibly evicted within the same batch (batch larger than the cache)
+                results.append(computed[key])
+            else:
+                self._token_starts_cache.move_to_end(key)
+                results.append(self._token_starts_cache[key])
+        return results
+
+    def _chunk_document(self, doc: Document, token_starts: List[int]) -> List[Document]:
+        content = doc.page_content
+
+        def tokens_in(start: int, end: int) -> int:
+            return bisect_left(token_starts, end) - bisect_left(token_starts, start)
+
+        def fits(start: int, end: int) -> bool:
+            return tokens_in(start, end) <= self.token_budget and self._fits_bytes(content, start, end)
+
+        spans = []
+        for section_title, start, end in self._sections(content, doc.metadata.get("headings") or []):
+            pieces = self._split_span(content, start, end, fits, token_starts)
+            spans.extend(self._merge_pieces(pieces, fits, section_title))
+
+        spans = self._merge_small_spans(spans, tokens_in, fits)
+
+        chunks = []
+        for section_title, start, end in spans:
+            text = content[start:end]
+            stripped = text.strip()
+            if not stripped:
+                continue
+            metadata = dict(doc.metadata)
+            if section_title:
+                metadata["section"] = section_title
+            if self.add_start_index:
+                metadata["start_index"] = start + (len(text) - len(text.lstrip()))
+            chunks.append(Document(page_content=stripped, metadata=metadata))
+
+        return chunks
+
+    @staticmethod
+    def _sections(content: str, headings: List[Dict[str, Any]]) -> List[Tuple[Optional[str], int, int]]:
+        """
+        Split content into (heading, start, end) sections on lines equal to one of the headings.
+        """
+        heading_texts = {h.get("text", "").strip() for h in headings if h.get("text", "").strip()}
+
+        boundaries = [(None, 0)]
+        position = 0
+        for line in content.splitlines(keepends=True):
+            stripped = line.strip()
+            if stripped and position > 0 and (stripped in heading_texts or stripped.startswith("#")):
+                boundaries.append((stripped.lstrip("#").strip(), position))
+            position += len(line)
+
+        return [
+            (title, start, boundaries[i + 1][1] if i + 1 < len(boundaries) else len(content))
+            for i, (title, start) in enumerate(boundaries)
+        ]
+
+    def _split_span(self, content: str, start: int, end: int, fits, token_starts: List[int],
+                    level: int = 0) -> List[Tuple[int, int]]:
+        """
+        Recursively split a span until every piece fits the token budget and `max_bytes`.
+        """
+        if fits(start, end):
+            return [(start, end)]
+
+        if level >= len(SPLIT_PATTERNS):
+            # No natural boundary left, cut greedily on token boundaries
+            first = bisect_left(token_starts, start + 1)
+            last = bisect_left(token_starts, end)
+            bounds = [start]
+            previous = start
+            for boundary in token_starts[first:last] + [end]:
+                if not fits(bounds[-1], boundary) and previous > bounds[-1]:
+                    bounds.append(previous)
+                # A single token longer than max_bytes is cut on characters
+                while not self._fits_bytes(content, bounds[-1], boundary):
+                    bounds.append(bounds[-1] + self.max_bytes // MAX_CHAR_BYTES)
+                previous = boundary
+            bounds.append(end)
+            return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+        bounds = [start]
+        for match in SPLIT_PATTERNS[level].finditer(content, start, end):
+            if start < match.end() < end:
+                bounds.append(match.end())
+        bounds.append(end)
+
+        pieces = []
+        for a, b in zip(bounds, bounds[1:]):
+            pieces.extend(self._split_span(content, a, b, fits, token_starts, level + 1))
+        return pieces
+
+    def _fits_bytes(self, content: str, start: int, end: int) -> bool:
+        """
+        Check the UTF-8 encoded size of a span, the span is encoded only if its length doesn't decide it.
+        """
+        length = end - start
+        if length * MAX_CHAR_BYTES <= self.max_bytes:
+            return True
+        if length > self.max_bytes:
+            return False
+        return len(content[start:end].encode("utf-8")) <= self.max_bytes
+
+    def _merge_pieces(self, pieces: List[Tuple[int, int]], fits,
+                      section_title: Optional[str]) -> List[Tuple[Optional[str], int, int]]:
+        merged = []
+        current_start, current_end = None, None
+        for start, end in pieces:
+            if current_start is not None and fits(current_start, end):
+                current_end = end
+                continue
+            if current_start is not None:
+                merged.append((section_title, current_start, current_end))
+            current_start, current_end = start, end
+
+        if current_start is not None:
+            merged.append((section_title, current_start, current_end))
+        return merged
+
+    def _merge_small_spans(self, spans: List[Tuple[Optional[str], int, int]],
+                           tokens_in, fits) -> List[Tuple[Optional[str], int, int]]:
+        """
+        Merge chunks below `min_tokens` (e.g. sections with a heading only) into the following span.
+        """
+        merged = []
+        for title, start, end in spans:
+            if merged:
+                prev_title, prev_start, prev_end = merged[-1]
+                if tokens_in(prev_start, prev_end) < self.min_tokens and fits(prev_start, end):
+                    merged[-1] = (prev_title or title, prev_start, end)
+                    continue
+            merged.append((title, start, end))
+        return merged
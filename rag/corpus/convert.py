@@ -0,0 +1,100 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import re
+import json
+import argparse
+
+from rag.corpus.corpus_store import CorpusWriter
+
+# Header written by WebCrawler in front of the page content of the .md files
+CRAWLER_HEADER = re.compile(r"\A# .*?\n\nURL: .*?\nCrawled: .*?\n\n", re.DOTALL)
+
+
+def convert_data_dir(data_path: str, output_path: str) -> int:
+    """
+    Convert a directory of per-page JSON files ({"content": ..., "metadata": ...}) to a corpus store.
+    File names without the extension are used as document ids.
+
+    Args:
+        data_path: Directory with the JSON files, e.g. "./data"
+        output_path: Corpus store directory
+
+    Returns:
+        Number of converted documents
+    """
+    with CorpusWriter(output_path) as writer:
+        for file in sorted(os.listdir(data_path)):
+            if not file.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(data_path, file), encoding="utf-8") as json_file:
+                    file_data = json.load(json_file)
+                writer.add(os.path.splitext(file)[0], file_data["content"], file_data["metadata"])
+            except Exception as e:
+                print(f"Unable to read file: {file}, error: {e}")
+
+        return writer.count
+
+
+def convert_crawler_output(crawler_output_path: str, output_path: str) -> int:
+    """
+    Convert WebCrawler output (content/<page_id>.md, content/<page_id>_meta.json and files_index.json)
+    to a corpus store. Pages use their crawler page ids, downloaded files their file names.
+
+    Args:
+        crawler_output_path: WebCrawler output directory
+        output_path: Corpus store directory
+
+    Returns:
+        Number of converted documents
+    """
+    content_dir = os.path.join(crawler_output_path, "content")
+
+    with CorpusWriter(output_path) as writer:
+        for file in sorted(os.listdir(content_dir)):
+            if not file.endswith("_meta.json"):
+                continue
+            page_id = file[:-len("_meta.json")]
+            page_path = os.path.join(content_dir, f"{page_id}.md")
+            if not os.path.exists(page_path):
+                continue
+
+            with open(os.path.join(content_dir, file), encoding="utf-8") as meta_file:
+                metadata = json.load(meta_file)
+            with open(page_path, encoding="utf-8") as page_file:
+                content = CRAWLER_HEADER.sub("", page_file.read(), count=1)
+            writer.add(page_id, content, metadata)
+
+        files_index_path = os.path.join(crawler_output_path, "files_index.json")
+        if os.path.exists(files_index_path):
+            with open(files_index_path, encoding="utf-8") as files_index:
+                for entry in json.load(files_index):
+                    with open(entry["text_path"], encoding="utf-8") as text_file:
+                        content = text_file.read()
+                    metadata = {
+                        "url": entry["url"],
+                        "title": entry["filename"],
+                        "depth": entry["depth"],
+                        "file_type": entry["file_type"],
+                    }
+                    writer.add(entry.get("doc_id", entry["filename"]), content, metadata)
+
+        return writer.count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the corpus to the compact corpus store format")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--from-data", help="Directory of per-page JSON files, e.g. ./data")
+    source.add_argument("--from-crawler", help="WebCrawler output directory")
+    parser.add_argument("--output", default="./corpus", help="Corpus store directory")
+    args = parser.parse_args()
+
+    if args.from_data:
+        count = convert_data_dir(args.from_data, args.output)
+    else:
+        count = convert_crawler_output(args.from_crawler, args.output)
+
+    print(f"Converted {count} documents to {args.output}")
@@ -0,0 +1,244 @@
+import os
+import json
+import mmap
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+CONTENT_FILE = "content.bin"
+METADATA_FILE = "metadata.jsonl"
+INDEX_FILE = "index.jsonl"
+# Documents whose index lines are kept in memory until the data files are flushed
+INDEX_FLUSH_EVERY = 100
+
+
+def is_corpus_store(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, INDEX_FILE))
+
+
+def encode_metadata(metadata: Dict[str, Any]) -> Tuple[bytes, Dict[str, List[int]]]:
+    """
+    Serialize metadata to a JSON line, field by field.
+
+    Returns:
+        The line (identical to `json.dumps(metadata)`) and the byte offset and length
+        of each top-level field value within it
+    """
+    line = bytearray(b"{")
+    fields = {}
+    for key, value in metadata.items():
+        if len(line) > 1:
+            line += b", "
+        line += (json.dumps(key, ensure_ascii=False) + ": ").encode("utf-8")
+        value_bytes = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        fields[key] = [len(line), len(value_bytes)]
+        line += value_bytes
+    line += b"}\n"
+    return bytes(line), fields
+
+
+class CorpusWriter:
+    """
+    Append-only writer of the compact corpus store.
+
+    A corpus store is a directory with three files:
+        - content.bin: UTF-8 document contents, concatenated
+        - metadata.jsonl: one JSON line of metadata per document, stored as given
+        - index.jsonl: one JSON line per document with its id, byte offsets in both files
+          and the offset and length of each top-level metadata field within its metadata line
+
+    Contents and metadata live in separate files, so metadata can be read without touching
+    the contents, and the field offsets let a projection decode only the requested fields.
+    Nested values (e.g. 'headings') are stored as given and decoded as a whole. Writing a document with an existing id appends a new version, readers return
+    the latest one. The writer is thread-safe, so crawler threads can share it.
+
+    Index lines are written only once the data files they point to have been flushed
+    (every INDEX_FLUSH_EVERY documents and on `flush`), so an interrupted writer never leaves
+    an index entry pointing past the data files.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open (or create) a corpus store for appending.
+
+        Args:
+            path: Corpus store directory
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._content_file = open(os.path.join(path, CONTENT_FILE), "ab")
+        self._metadata_file = open(os.path.join(path, METADATA_FILE), "ab")
+        self._index_file = open(os.path.join(path, INDEX_FILE), "a", encoding="utf-8")
+        self._pending_index: List[str] = []
+        self.count = 0
+
+    def add(self, doc_id: str, content: str, metadata: Optional[Dict[str, Any]] = None):
+        """
+        Append a document to the store.
+
+        Args:
+            doc_id: Unique document id
+            content: Document text
+            metadata: Document metadata, JSON serializable
+        """
+        content_bytes = content.encode("utf-8")
+        metadata_bytes, fields = encode_metadata(metadata or {})
+
+        with self._lock:
+            content_offset = self._content_file.tell()
+            metadata_offset = self._metadata_file.tell()
+            self._content_file.write(content_bytes)
+            self._metadata_file.write(metadata_bytes)
+            self._pending_index.append(json.dumps({
+                "id": doc_id,
+                "content": [content_offset, len(content_bytes)],
+                "metadata": [metadata_offset, len(metadata_bytes)],
+                "fields": fields,
+            }, ensure_ascii=False) + "\n")
+            self.count += 1
+            if len(self._pending_index) >= INDEX_FLUSH_EVERY:
+                self._flush()
+
+    def add_document(self, doc_id: str, document: Document):
+        self.add(doc_id, document.page_content, document.metadata)
+
+    def _flush(self):
+        # Data files first, the index lines pointing to them are written after
+        self._content_file.flush()
+        self._metadata_file.flush()
+        self._index_file.write("".join(self._pending_index))
+        self._index_file.flush()
+        self._pending_index.clear()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        self.flush()
+        for file in (self._content_file, self._metadata_file, self._index_file):
+            file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class CorpusReader:
+    """
+    Memory-mapped reader of the compact corpus store written by `CorpusWriter`.
+
+    Only the small index is loaded on open, contents and metadata are read from memory-mapped
+    files on access, so opening the corpus costs three file opens instead of one per page.
+
+    Methods:
+        ids() -> List[str]:
+            Returns document ids in write order.
+        get(doc_id: str) -> Document:
+            Returns the document with its metadata ('doc_id' included).
+        get_content(doc_id: str) -> str:
+            Returns the document text only.
+        get_metadata(doc_id: str, fields: Optional[List[str]]) -> Dict[str, Any]:
+            Returns the metadata, optionally projected to the given fields (only their bytes are decoded).
+        iter_documents() / iter_metadata(fields):
+            Iterate over all documents or metadata only.
+        to_documents() -> List[Document]:
+            Loads all documents, drop-in replacement for `load_json_data`.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open a corpus store.
+
+        Args:
+            path: Corpus store directory
+        """
+        if not is_corpus_store(path):
+            raise FileNotFoundError(f"No corpus store found at {path}")
+
+        self.path = path
+        self._content = self._map(os.path.join(path, CONTENT_FILE))
+        self._metadata = self._map(os.path.join(path, METADATA_FILE))
+
+        self._index: Dict[str, Dict[str, List[int]]] = {}
+        with open(os.path.join(path, INDEX_FILE), encoding="utf-8") as index_file:
+            for line in index_file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Partially written last line of an interrupted writer
+                    continue
+                if sum(entry["content"]) > len(self._content) or sum(entry["metadata"]) > len(self._metadata):
+                    # Truncated record, its data never reached the data files
+                    continue
+                self._index.pop(entry["id"], None)
+                self._index[entry["id"]] = entry
+
+    @staticmethod
+    def _map(file_path: str):
+        with open(file_path, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return b""
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._index
+
+    def ids(self) -> List[str]:
+        return list(self._index)
+
+    def get_content(self, doc_id: str) -> str:
+        offset, length = self._index[doc_id]["content"]
+        return self._content[offset:offset + length].decode("utf-8")
+
+    def get_metadata(self, doc_id: str, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        entry = self._index[doc_id]
+        offset, length = entry["metadata"]
+        if fields is not None and "fields" in entry:
+            # Decode only the requested field values, located by their offsets in the line
+            metadata = {}
+            for field in fields:
+                if field in entry["fields"]:
+                    start, size = entry["fields"][field]
+                    metadata[field] = json.loads(self._metadata[offset + start:offset + start + size])
+            return metadata
+
+        # Stores written without field offsets are parsed whole
+        metadata = json.loads(self._metadata[offset:offset + length])
+        if fields is not None:
+            metadata = {field: metadata[field] for field in fields if field in metadata}
+        return metadata
+
+    def get(self, doc_id: str) -> Document:
+        metadata = self.get_metadata(doc_id)
+        metadata["doc_id"] = doc_id
+        return Document(page_content=self.get_content(doc_id), metadata=metadata)
+
+    def iter_metadata(self, fields: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        for doc_id in self._index:
+            yield {"doc_id": doc_id, **self.get_metadata(doc_id, fields)}
+
+    def iter_documents(self) -> Iterator[Document]:
+        for doc_id in self._index:
+            yield self.get(doc_id)
+
+    def to_documents(self) -> List[Document]:
+        return list(self.iter_documents())
+
+    def close(self):
+        for mapped in (self._content, self._metadata):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
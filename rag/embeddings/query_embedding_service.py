@@ -0,0 +1,167 @@
+import time
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from rag.utils.logger import logger
+from rag.utils.metrics import metrics
+
+MAX_BATCH_SIZE = 32
+MAX_WAIT_MS = 2
+CACHE_SIZE = 1024
+
+_models = {}
+_services: Dict[str, "QueryEmbeddingService"] = {}
+_registry_lock = threading.Lock()
+
+
+class QueryEmbeddingService:
+    """
+    Micro-batching query embedding service shared by concurrent requests.
+
+    Queries submitted from many threads are collected by a background worker for up to
+    `max_wait_ms` after the first one arrives (or until `max_batch_size` queries are waiting)
+    and embedded in a single batched forward pass. Results are returned through futures.
+    Under low load (the previous batch had a single query and nothing else is waiting) the
+    query is embedded immediately, so a lone client doesn't pay the batching window.
+    Identical queries waiting in the same batch are embedded once, and recent query vectors
+    are kept in an LRU cache.
+
+    Methods:
+        submit(query: str) -> Future:
+            Schedules the query, the future resolves to its embedding (np.ndarray).
+        embed(query: str) -> np.ndarray:
+            Embeds the query, blocking until its batch is done.
+        close():
+            Stops the worker thread.
+    """
+
+    def __init__(self, encode: Callable[[List[str]], np.ndarray], max_batch_size: int = MAX_BATCH_SIZE,
+                 max_wait_ms: float = MAX_WAIT_MS, cache_size: int = CACHE_SIZE):
+        """
+        Args:
+            encode: Function embedding a list of texts into a 2D array
+            max_batch_size: Maximum number of queries embedded in one forward pass
+            max_wait_ms: Maximum time the first query of a batch waits for more queries
+            cache_size: Number of recent query embeddings kept, 0 disables the cache
+        """
+        self.encode = encode
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.cache_size = cache_size
+
+        self._queue = queue.Queue()
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+        self._closed = False
+        self._last_batch_size = 0
+
+        self._worker = threading.Thread(target=self._run, name="QueryEmbeddingService", daemon=True)
+        self._worker.start()
+
+    def submit(self, query: str) -> Future:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("QueryEmbeddingService is closed")
+
+            if query in self._cache:
+                self._cache.move_to_end(query)
+                metrics.increment("embedding_service.cache_hits")
+                future = Future()
+                future.set_result(self._cache[query])
+                return future
+
+            # Same query already waiting for a batch
+            future = self._pending.get(query)
+            if future is None:
+                future = Future()
+                self._pending[query] = future
+                self._queue.put(query)
+            return future
+
+    def embed(self, query: str) -> np.ndarray:
+        return self.submit(query).result()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        self._queue.put(None)
+        self._worker.join()
+
+    def _collect_batch(self) -> List[str]:
+        first = self._queue.get()
+        if first is None:
+            return []
+
+        batch = [first]
+        max_wait = self.max_wait if self._last_batch_size > 1 or not self._queue.empty() else 0
+        deadline = time.perf_counter() + max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                query = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if query is None:
+                # Finish the current batch, then stop
+                self._queue.put(None)
+                break
+            batch.append(query)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            if not batch:
+                return
+
+            self._last_batch_size = len(batch)
+            metrics.observe("embedding_service.batch_size", len(batch))
+            try:
+                embeddings = np.asarray(self.encode(batch))
+            except Exception as e:
+                logger.error(f"Query embedding batch of {len(batch)} failed: {e}")
+                with self._lock:
+                    futures = [self._pending.pop(query) for query in batch]
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            with self._lock:
+                futures = [self._pending.pop(query) for query in batch]
+                if self.cache_size:
+                    for query, embedding in zip(batch, embeddings):
+                        self._cache[query] = embedding
+                        self._cache.move_to_end(query)
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+
+            for future, embedding in zip(futures, embeddings):
+                future.set_result(embedding)
+
+
+def get_sentence_transformer(model_name: str):
+    """
+    Return the SentenceTransformer model, loaded once per process.
+    """
+    with _registry_lock:
+        if model_name not in _models:
+            from sentence_transformers import SentenceTransformer
+            _models[model_name] = SentenceTransformer(model_name)
+        return _models[model_name]
+
+
+def get_query_embedding_service(model_name: str) -> QueryEmbeddingService:
+    """
+    Return the process-wide query embedding service of the SentenceTransformer model.
+    """
+    model = get_sentence_transformer(model_name)
+    with _registry_lock:
+        if model_name not in _services:
+            _services[model_name] = QueryEmbeddingService(model.encode)
+        return _services[model_name]
@@ -1,7 +1,5 @@
 from typing import List
 
-from sentence_transformers import SentenceTransformer
-
 from rag.embeddings.base_embeddings import BaseEmbeddings
 
 
@@ -20,6 +18,8 @@ class SentenceTransformersEmbeddings(BaseEmbeddings):
             Encodes a list of text strings into dense vector representations.
     """
     def __init__(self, model_name: str = "distiluse-base-multilingual-cased-v1"):
+        from sentence_transformers import SentenceTransformer
+
         self.model = SentenceTransformer(model_name)
 
     def embed(self, texts: List[str], **kwargs) -> List[List[float]]:
@@ -1,10 +1,8 @@
-import os
-from typing import List, Dict, Any, Union, Callable
-import pinecone
-from sentence_transformers import SentenceTransformer
-from transformers import AutoTokenizer, AutoModel
-import torch
-import numpy as np
+from typing import TYPE_CHECKING, List, Dict, Union
+
+# torch and transformers are imported when a model is created, not when this module is imported
+if TYPE_CHECKING:
+    import torch
 
 
 class SparseEmbeddingStrategy:
@@ -37,11 +35,6 @@ class SparseEmbeddingStrategy:
         raise NotImplementedError("Subclasses must implement passage embedding")
 
 
-import torch
-from transformers import AutoTokenizer, AutoModel
-import numpy as np
-
-
 class SPLADEEmbedding:
     """
     SPLADE sparse embedding implementation with robust error handling
@@ -54,6 +47,8 @@ class SPLADEEmbedding:
         Args:
             model_name (str): Hugging Face model name
         """
+        from transformers import AutoTokenizer, AutoModel
+
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
         self.model = AutoModel.from_pretrained(model_name)
         self.model.eval()
@@ -69,6 +64,8 @@ class SPLADEEmbedding:
         Returns:
             Dict with sparse embedding indices and values
         """
+        import torch
+
         with torch.no_grad():
             # Tokenize input
             inputs = self.tokenizer(
@@ -148,12 +145,6 @@ class TFIDFSparseEmbedding(SparseEmbeddingStrategy):
         return {'indices': indices, 'values': values}
 
 
-import torch
-import torch.nn.functional as F
-from transformers import AutoTokenizer, AutoModel
-from typing import Dict, List
-
-
 class CompressedTransformerSparseEmbedding:
     """
     Compressed Transformer-based Sparse Embedding
@@ -176,13 +167,15 @@ class CompressedTransformerSparseEmbedding:
             max_length (int): Maximum sequence length
             top_k (int): Number of top features to retain
         """
+        from transformers import AutoTokenizer, AutoModel
+
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
         self.model = AutoModel.from_pretrained(model_name)
         self.model.eval()
 
         self.max_length = max_length
 
-    def _compress_embedding(self, embeddings: torch.Tensor) -> Dict[str, List[int]]:
+    def _compress_embedding(self, embeddings: "torch.Tensor") -> Dict[str, List[int]]:
         """
         Create a sparse embedding by:
         1. Applying importance scoring
@@ -195,6 +188,9 @@ class CompressedTransformerSparseEmbedding:
         Returns:
             Dict with sparse embedding indices and values
         """
+        import torch
+        import torch.nn.functional as F
+
         # Compute feature importance via L2 norm across sequence
         feature_importance = torch.norm(embeddings, dim=0)
         # Select top-k most important features
@@ -223,6 +219,8 @@ class CompressedTransformerSparseEmbedding:
         Returns:
             Dict with sparse embedding indices and values
         """
+        import torch
+
         with torch.no_grad():
             # Tokenize input
             inputs = self.tokenizer(
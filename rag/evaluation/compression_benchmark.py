@@ -0,0 +1,168 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import json
+import time
+import argparse
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from rag.evaluation.query_sets import load_query_set, GOLDEN_QUERY_SET, SYNTHETIC_QUERY_SET
+from rag.evaluation.retrieval_benchmark import RESULTS_DIR, git_commit
+from rag.evaluation.retrieval_metrics import percentile
+from rag.vector_store.quantized_index import QuantizedDenseIndex
+
+K_VALUES = (1, 10, 100)
+DIMENSION = 1024
+
+# (name, first pass, rescore type) of the evaluated local index configurations
+CONFIGURATIONS = [
+    ("float32", "float32", None),
+    ("float16", "float16", None),
+    ("int8", "int8", None),
+    ("int8+float16_rescore", "int8", "float16"),
+    ("binary", "binary", None),
+    ("binary+float16_rescore", "binary", "float16"),
+    ("binary+float32_rescore", "binary", "float32"),
+]
+
+# Approximate Milvus index bytes per vector of the DENSE_COMPRESSION options (1024-d, PQ with m=64)
+MILVUS_BYTES_PER_VECTOR = {
+    "none": 4 * DIMENSION,
+    "float16": 2 * DIMENSION,
+    "sq8": DIMENSION,
+    "pq": 64,
+}
+
+
+def synthetic_embeddings(num_vectors: int, num_queries: int, dimension: int = DIMENSION,
+                         num_clusters: int = 256, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Normalized clustered random vectors, a stand-in for embeddings when the model is not available.
+    Queries are noisy copies of corpus vectors.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((num_clusters, dimension)).astype(np.float32)
+    vectors = centers[rng.integers(0, num_clusters, num_vectors)] + 0.8 * rng.standard_normal((num_vectors, dimension)).astype(np.float32)
+    queries = vectors[rng.integers(0, num_vectors, num_queries)] + 0.5 * rng.standard_normal((num_queries, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return vectors, queries
+
+
+def corpus_embeddings(data_path: str, max_chunks: int, max_queries: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Embed corpus chunks and query set queries with the dense model used by MilvusHybridSearch.
+    """
+    from sentence_transformers import SentenceTransformer
+    from rag.chunkers.langchain_chunker import LangChainChunker
+    from rag.utils.utils import load_documents
+
+    chunks = LangChainChunker(1000, 100, remove_duplicates=True).chunk(load_documents(data_path))[:max_chunks]
+    queries = [q["query"] for path in (GOLDEN_QUERY_SET, SYNTHETIC_QUERY_SET) for q in load_query_set(path)][:max_queries]
+
+    model = SentenceTransformer("intfloat/multilingual-e5-large")
+    vectors = model.encode([chunk.page_content for chunk in chunks], normalize_embeddings=True, show_progress_bar=True)
+    query_vectors = model.encode(queries, normalize_embeddings=True)
+    return np.asarray(vectors, dtype=np.float32), np.asarray(query_vectors, dtype=np.float32)
+
+
+def evaluate_configuration(first_pass: str, rescore_type, vectors: np.ndarray, queries: np.ndarray,
+                           baseline: List[List[int]], rescore_multiplier: int) -> Dict:
+    index = QuantizedDenseIndex(first_pass, rescore_type, rescore_multiplier)
+    index.add(list(range(len(vectors))), vectors)
+
+    max_k = max(K_VALUES)
+    latencies = []
+    recalls = {k: [] for k in K_VALUES}
+    for query, expected in zip(queries, baseline):
+        start = time.perf_counter()
+        results = index.search(query, max_k)
+        latencies.append(time.perf_counter() - start)
+
+        retrieved = [doc_id for doc_id, _ in results]
+        for k in K_VALUES:
+            # Small corpora have fewer than k exact neighbours
+            recalls[k].append(len(set(retrieved[:k]) & set(expected[:k])) / min(k, len(expected)))
+
+    # Rescore vectors are memory-mapped, they take disk space but not memory
+    bytes_per_vector = index.bytes_per_vector()
+    disk_bytes_per_vector = index.disk_bytes_per_vector()
+    return {
+        "resident_bytes_per_vector": bytes_per_vector,
+        "disk_bytes_per_vector": disk_bytes_per_vector,
+        "resident_gb_per_million_chunks": bytes_per_vector * 1e6 / 1024 ** 3,
+        "disk_gb_per_million_chunks": disk_bytes_per_vector * 1e6 / 1024 ** 3,
+        **{f"recall@{k}": float(np.mean(recalls[k])) for k in K_VALUES},
+        "latency_ms_p50": percentile(latencies, 50) * 1000,
+        "latency_ms_p95": percentile(latencies, 95) * 1000,
+    }
+
+
+def run_benchmark(vectors: np.ndarray, queries: np.ndarray, rescore_multiplier: int = 10,
+                  output_dir: str = RESULTS_DIR) -> Dict:
+    """
+    Compare compressed dense representations against exact float32 search.
+
+    Recall@k is the overlap of the top k results with the top k of exact float32 inner product search.
+    Memory is reported as resident bytes (first pass codes) and disk bytes (memory-mapped rescore vectors).
+
+    Args:
+        vectors: Normalized corpus embeddings
+        queries: Normalized query embeddings
+        rescore_multiplier: First pass candidates per result for configurations with rescoring
+        output_dir: Directory for the results JSON
+
+    Returns:
+        Benchmark results
+    """
+    max_k = min(max(K_VALUES), len(vectors))
+    baseline = [list(np.argsort(-(vectors @ query), kind="stable")[:max_k]) for query in queries]
+
+    results = {
+        "timestamp": datetime.now().isoformat(),
+        "git_commit": git_commit(),
+        "num_vectors": len(vectors),
+        "num_queries": len(queries),
+        "dimension": vectors.shape[1],
+        "rescore_multiplier": rescore_multiplier,
+        "local_index": {},
+        "milvus_gb_per_million_chunks": {
+            name: size * 1e6 / 1024 ** 3 for name, size in MILVUS_BYTES_PER_VECTOR.items()
+        },
+    }
+
+    for name, first_pass, rescore_type in CONFIGURATIONS:
+        results["local_index"][name] = evaluate_configuration(
+            first_pass, rescore_type, vectors, queries, baseline, rescore_multiplier
+        )
+        print(f"[{name}] {json.dumps(results['local_index'][name])}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, f"compression_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {output_path}")
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dense vector compression benchmark: memory and recall vs float32")
+    parser.add_argument("--synthetic", type=int, help="Use this many synthetic vectors instead of corpus embeddings")
+    parser.add_argument("--data", default="./data", help="Corpus store or directory of JSON files to embed")
+    parser.add_argument("--max-chunks", type=int, default=20000)
+    parser.add_argument("--max-queries", type=int, default=200)
+    parser.add_argument("--rescore-multiplier", type=int, default=10)
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        vectors, queries = synthetic_embeddings(args.synthetic, args.max_queries)
+    else:
+        vectors, queries = corpus_embeddings(args.data, args.max_chunks, args.max_queries)
+
+    run_benchmark(vectors, queries, args.rescore_multiplier, args.output_dir)
@@ -0,0 +1,124 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import json
+import time
+import argparse
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from rag.embeddings.query_embedding_service import QueryEmbeddingService, get_sentence_transformer
+from rag.evaluation.query_sets import load_query_set, SYNTHETIC_QUERY_SET
+from rag.evaluation.retrieval_benchmark import RESULTS_DIR, git_commit
+from rag.evaluation.retrieval_metrics import percentile
+
+CLIENT_COUNTS = (1, 2, 4, 8, 16, 32, 64)
+
+
+def run_clients(embed: Callable[[str], object], queries: List[str], num_clients: int,
+                requests_per_client: int) -> Dict:
+    """
+    Run `num_clients` threads, each embedding `requests_per_client` queries one after another.
+
+    Returns:
+        Throughput in queries per second and latency percentiles in milliseconds
+    """
+    latencies = []
+    latencies_lock = threading.Lock()
+    start_barrier = threading.Barrier(num_clients + 1)
+
+    def client(client_id: int):
+        client_latencies = []
+        start_barrier.wait()
+        for i in range(requests_per_client):
+            # Unique per client and request, so clients don't share cached vectors
+            query = f"{queries[(client_id * requests_per_client + i) % len(queries)]} [{client_id}-{i}]"
+            start = time.perf_counter()
+            embed(query)
+            client_latencies.append(time.perf_counter() - start)
+        with latencies_lock:
+            latencies.extend(client_latencies)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(num_clients)]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "clients": num_clients,
+        "qps": len(latencies) / elapsed,
+        "latency_ms_p50": percentile(latencies, 50) * 1000,
+        "latency_ms_p95": percentile(latencies, 95) * 1000,
+    }
+
+
+def run_load_test(model_name: str, client_counts=CLIENT_COUNTS, requests_per_client: int = 20,
+                  max_batch_size: int = 32, max_wait_ms: float = 2, output_dir: str = RESULTS_DIR) -> Dict:
+    """
+    Compare per-request encoding (batch of 1 per client) with the micro-batching service.
+
+    Args:
+        model_name: SentenceTransformer model name
+        client_counts: Numbers of concurrent clients to test
+        requests_per_client: Sequential requests issued by every client
+        max_batch_size: Service batch size limit
+        max_wait_ms: Service batching window
+        output_dir: Directory for the results JSON
+
+    Returns:
+        Load test results
+    """
+    queries = [q["query"] for q in load_query_set(SYNTHETIC_QUERY_SET)]
+    model = get_sentence_transformer(model_name)
+    model.encode(["warmup"])
+
+    service = QueryEmbeddingService(model.encode, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms, cache_size=0)
+    modes = {
+        "direct": lambda query: model.encode([query])[0],
+        "batched": service.embed,
+    }
+
+    results = {
+        "timestamp": datetime.now().isoformat(),
+        "git_commit": git_commit(),
+        "model": model_name,
+        "requests_per_client": requests_per_client,
+        "max_batch_size": max_batch_size,
+        "max_wait_ms": max_wait_ms,
+        "modes": {name: [] for name in modes},
+    }
+
+    for num_clients in client_counts:
+        for name, embed in modes.items():
+            result = run_clients(embed, queries, num_clients, requests_per_client)
+            results["modes"][name].append(result)
+            print(f"[{name}] {json.dumps(result)}")
+    service.close()
+
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, f"embedding_load_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {output_path}")
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query embedding throughput under concurrent clients")
+    parser.add_argument("--model", default="intfloat/multilingual-e5-large")
+    parser.add_argument("--clients", nargs="+", type=int, default=list(CLIENT_COUNTS))
+    parser.add_argument("--requests-per-client", type=int, default=20)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=2)
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    args = parser.parse_args()
+
+    run_load_test(args.model, args.clients, args.requests_per_client, args.max_batch_size,
+                  args.max_wait_ms, args.output_dir)
@@ -0,0 +1,103 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import re
+import json
+import argparse
+import tempfile
+import subprocess
+from typing import Dict, List
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Cumulative import time budget (seconds) of the public entry points, with headroom for slower machines
+IMPORT_BUDGETS = {
+    "rag.inference": 0.6,
+    "rag.server": 1.0,
+    "rag.indexing": 1.0,
+    "rag.utils.logger": 0.1,
+    "rag.embeddings.sparse_embeddings": 0.1,
+}
+# Dependencies which must only be imported on first use
+HEAVY_MODULES = ("torch", "transformers", "sentence_transformers", "pymilvus", "google.genai", "pinecone")
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure_import(module: str) -> Dict:
+    """
+    Import a module in a fresh interpreter with `python -X importtime`.
+
+    The interpreter runs in an empty temporary directory, so import side effects such as
+    created directories or files can be detected.
+
+    Returns:
+        dict: 'seconds' (cumulative import time), 'heavy_modules' (heavy dependencies imported),
+        'created_files' (files and directories created in the working directory) and 'error'
+    """
+    with tempfile.TemporaryDirectory() as working_dir:
+        check = (
+            f"import sys, json, {module}; "
+            f"print(json.dumps(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)))"
+        )
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", check],
+            cwd=working_dir,
+            env={**os.environ, "PYTHONPATH": PROJECT_ROOT},
+            capture_output=True,
+            text=True,
+        )
+        created_files = sorted(os.listdir(working_dir))
+
+    cumulative = {}
+    for line in process.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            cumulative[match.group(4)] = int(match.group(2))
+
+    return {
+        "module": module,
+        "seconds": cumulative.get(module, 0) / 1e6,
+        "heavy_modules": json.loads(process.stdout.strip().splitlines()[-1]) if process.returncode == 0 else [],
+        "created_files": created_files,
+        "error": process.stderr.strip().splitlines()[-1] if process.returncode != 0 else None,
+    }
+
+
+def check_budgets(budgets: Dict[str, float] = IMPORT_BUDGETS, repeats: int = 3) -> List[Dict]:
+    """
+    Measure every entry point (best of `repeats` runs) and compare it with its budget.
+
+    Returns:
+        List of results with 'passed' and 'errors'
+    """
+    results = []
+    for module, budget in budgets.items():
+        runs = [measure_import(module) for _ in range(repeats)]
+        result = min(runs, key=lambda run: run["seconds"])
+        errors = []
+        if result["error"]:
+            errors.append(f"import failed: {result['error']}")
+        if result["seconds"] > budget:
+            errors.append(f"import took {result['seconds']:.3f} s, budget {budget:.3f} s")
+        if result["heavy_modules"]:
+            errors.append(f"imports {', '.join(result['heavy_modules'])} eagerly")
+        if result["created_files"]:
+            errors.append(f"creates {', '.join(result['created_files'])} on import")
+        results.append({**result, "budget": budget, "errors": errors, "passed": not errors})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check import time budgets of the public entry points")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per module, the fastest one counts")
+    args = parser.parse_args()
+
+    results = check_budgets(repeats=args.repeats)
+    for result in results:
+        status = "OK  " if result["passed"] else "FAIL"
+        print(f"{status} {result['module']:<36} {result['seconds']:.3f} s / {result['budget']:.3f} s")
+        for error in result["errors"]:
+            print(f"     {error}")
+
+    sys.exit(0 if all(result["passed"] for result in results) else 1)
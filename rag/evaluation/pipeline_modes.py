@@ -0,0 +1,187 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import json
+import time
+import argparse
+import statistics
+from contextlib import contextmanager
+
+from rag.inference import inference_stream
+from rag.adaptive_controller import PIPELINE_MODES
+from rag.evaluation.retrieval_metrics import percentile
+from rag.evaluation.query_sets import load_query_set, GOLDEN_QUERY_SET
+from rag.utils.metrics import metrics
+
+DEFAULT_QUERY_SET = GOLDEN_QUERY_SET
+
+
+@contextmanager
+def llm_cache_disabled():
+    """
+    Disable the persistent LLM response cache for models created inside the block, so repeated
+    runs of the same query pay for their LLM calls instead of reading earlier responses.
+    """
+    previous = os.environ.get("LLM_CACHE_ENABLED")
+    os.environ["LLM_CACHE_ENABLED"] = "0"
+    try:
+        yield
+    finally:
+        if previous is None:
+            del os.environ["LLM_CACHE_ENABLED"]
+        else:
+            os.environ["LLM_CACHE_ENABLED"] = previous
+
+
+def run_query(query: dict, mode: str, speculative: bool = True) -> dict:
+    """
+    Run a single query through the inference pipeline and measure latency and quality.
+
+    Args:
+        query: Query set entry with "query" and optional "relevant_urls" and "answer_keywords" keys
+        mode: Pipeline mode
+        speculative: Whether query augmentation runs in parallel with the first retrieval
+
+    Returns:
+        Per-query measurements
+    """
+    start_time = time.perf_counter()
+    first_token_time = None
+    answer = ""
+    sources = []
+    first_sources_time = None
+    faq_hit = False
+    counters_before = metrics.snapshot()
+
+    for event in inference_stream(query["query"], mode=mode, speculative=speculative):
+        if event["type"] == "progress" and event["stage"] == "faq":
+            faq_hit = True
+        elif event["type"] == "sources":
+            first_sources_time = time.perf_counter()
+            sources = event["documents"]
+        elif event["type"] == "token":
+            if first_token_time is None:
+                first_token_time = time.perf_counter()
+            answer += event["text"]
+
+    end_time = time.perf_counter()
+
+    source_urls = {doc.metadata.get("url") for doc in sources if hasattr(doc, "metadata")}
+    relevant_urls = set(query.get("relevant_urls", []))
+    keywords = query.get("answer_keywords", [])
+
+    def counter_delta(name):
+        return metrics.get(name) - counters_before.get(name, 0.0)
+
+    # Gemini requests counted by the models. A speculative augmentation cancelled by the plan may
+    # still be waiting for its response, so started speculations count as augmentation calls.
+    augmentation_calls = counter_delta("llm.QueryAugmentationModel.calls")
+    llm_calls = int(
+        counter_delta("llm.calls") - augmentation_calls
+        + max(augmentation_calls, counter_delta("speculation.augmentation.started"))
+    )
+
+    return {
+        "query": query["query"],
+        "latency": end_time - start_time,
+        "time_to_first_token": (first_token_time or end_time) - start_time,
+        # Critical path up to the final retrieval, which speculation shortens
+        "time_to_sources": (first_sources_time or end_time) - start_time,
+        "speculation_saved": (
+            counter_delta("speculation.augmentation.saved_seconds_total")
+            if counter_delta("speculation.augmentation.used") else None
+        ),
+        "speculation_cancelled": counter_delta("speculation.augmentation.cancelled") > 0,
+        "faq_hit": faq_hit,
+        "llm_calls": llm_calls,
+        "source_recall": len(source_urls & relevant_urls) / len(relevant_urls) if relevant_urls else None,
+        "keyword_recall": sum(k.lower() in answer.lower() for k in keywords) / len(keywords) if keywords else None,
+    }
+
+
+def summarize(results: list) -> dict:
+    def mean_of(key):
+        values = [r[key] for r in results if r[key] is not None]
+        return statistics.mean(values) if values else None
+
+    latencies = [r["latency"] for r in results]
+    ttft = [r["time_to_first_token"] for r in results]
+    time_to_sources = [r["time_to_sources"] for r in results]
+    return {
+        "queries": len(results),
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "time_to_first_token_p50": percentile(ttft, 50),
+        "time_to_first_token_p95": percentile(ttft, 95),
+        "time_to_sources_p50": percentile(time_to_sources, 50),
+        "time_to_sources_p95": percentile(time_to_sources, 95),
+        "mean_speculation_saved": mean_of("speculation_saved"),
+        "speculation_cancel_rate": statistics.mean(r["speculation_cancelled"] for r in results) if results else None,
+        "faq_hit_rate": statistics.mean(r["faq_hit"] for r in results) if results else None,
+        "mean_llm_calls": mean_of("llm_calls"),
+        "source_recall": mean_of("source_recall"),
+        "keyword_recall": mean_of("keyword_recall"),
+    }
+
+
+def evaluate_modes(query_set_path: str = DEFAULT_QUERY_SET, modes=PIPELINE_MODES, output_path: str = None,
+                   compare_speculation: bool = False):
+    """
+    Run a held-out query set in each pipeline mode and report latency and quality per mode.
+
+    Queries run with the LLM response cache disabled, so every mode pays for its LLM calls instead
+    of reading the responses of a mode run before it.
+
+    Args:
+        query_set_path: Path to a JSONL query set
+        modes: Pipeline modes to compare
+        output_path: Optional path of the JSON report
+        compare_speculation: Whether to also run every mode without speculative augmentation
+            ('<mode>_sequential') and report the critical path reduction of the final retrieval.
+            The two runs of a query alternate in order, so neither always warms caches for the other
+
+    Returns:
+        Dict with per-mode summaries and per-query results
+    """
+    queries = load_query_set(query_set_path)
+    report = {}
+    for mode in modes:
+        results, sequential = [], []
+        with llm_cache_disabled():
+            for i, query in enumerate(queries):
+                if not compare_speculation:
+                    results.append(run_query(query, mode))
+                    continue
+                runs = [(results, True), (sequential, False)]
+                for target, speculative in (runs if i % 2 == 0 else reversed(runs)):
+                    target.append(run_query(query, mode, speculative=speculative))
+
+        report[mode] = {"summary": summarize(results), "results": results}
+        print(f"[{mode}] {json.dumps(report[mode]['summary'], indent=2)}")
+
+        if compare_speculation:
+            summary = summarize(sequential)
+            report[f"{mode}_sequential"] = {"summary": summary, "results": sequential}
+            report[mode]["summary"]["critical_path_reduction_p50"] = (
+                summary["time_to_sources_p50"] - report[mode]["summary"]["time_to_sources_p50"]
+            )
+            print(f"[{mode}_sequential] {json.dumps(summary, indent=2)}")
+
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare latency and quality of inference pipeline modes")
+    parser.add_argument("--queries", default=DEFAULT_QUERY_SET, help="Path to JSONL query set")
+    parser.add_argument("--modes", nargs="+", default=list(PIPELINE_MODES), choices=PIPELINE_MODES)
+    parser.add_argument("--output", default="pipeline_modes_report.json", help="Path of the JSON report")
+    parser.add_argument("--compare-speculation", action="store_true",
+                        help="Also run every mode without speculative augmentation")
+    args = parser.parse_args()
+
+    evaluate_modes(args.queries, args.modes, args.output, args.compare_speculation)
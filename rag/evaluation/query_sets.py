@@ -0,0 +1,99 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import re
+import json
+import random
+import argparse
+from collections import defaultdict
+from typing import Dict, List
+
+EVALUATION_DIR = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_QUERY_SET = os.path.join(EVALUATION_DIR, "heldout_queries.jsonl")
+SYNTHETIC_QUERY_SET = os.path.join(EVALUATION_DIR, "synthetic_queries.jsonl")
+
+TITLE_SUFFIX_PATTERN = re.compile(r"\s+(--|–|—|\||-)\s+.*$")
+MIN_QUERY_WORDS = 3
+MAX_DOCUMENT_FREQUENCY = 3
+
+
+def load_query_set(path: str) -> List[dict]:
+    """
+    Load a JSONL query set. Each line holds a "query" and a list of "relevant_urls",
+    optionally with "answer_keywords" and the "origin" of the query.
+    """
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_query_set(queries: List[dict], path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        for query in queries:
+            f.write(json.dumps(query, ensure_ascii=False) + "\n")
+
+
+def clean_title(title: str) -> str:
+    """
+    Strip the site name suffix from a page title, e.g. 'Godziny otwarcia -- Biblioteka Główna AGH'.
+    """
+    return TITLE_SUFFIX_PATTERN.sub("", " ".join(title.split())).strip()
+
+
+def build_synthetic_query_set(data_path: str, num_queries: int = 500, seed: int = 42) -> List[dict]:
+    """
+    Build synthetic queries with known relevant documents from page titles and headings.
+
+    Question-like headings (e.g. FAQ entries) and cleaned page titles are used as queries, every
+    document containing the same title or heading is considered relevant. Generic texts shared
+    by many documents ('Stopka', 'Kontakt', ...) and very short texts are skipped.
+
+    Args:
+        data_path: Path to the directory with JSON documents
+        num_queries: Maximum number of queries to sample
+        seed: Random seed of the sampling
+
+    Returns:
+        List of query set entries
+    """
+    candidates: Dict[str, Dict] = defaultdict(lambda: {"urls": set(), "origin": None})
+
+    for file in sorted(os.listdir(path=data_path)):
+        with open(os.path.join(data_path, file), encoding="utf-8") as json_file:
+            metadata = json.load(json_file).get("metadata", {})
+
+        url = metadata.get("url")
+        if not url:
+            continue
+
+        texts = [(clean_title(metadata.get("title", "")), "title")]
+        texts += [(" ".join(h["text"].split()), "heading") for h in metadata.get("headings", [])
+                  if h.get("level", 1) > 1 and h.get("text", "").strip().endswith("?")]
+
+        for text, origin in texts:
+            if len(text.split()) < MIN_QUERY_WORDS:
+                continue
+            candidates[text]["urls"].add(url)
+            candidates[text]["origin"] = candidates[text]["origin"] or origin
+
+    queries = [
+        {"query": text, "relevant_urls": sorted(candidate["urls"]), "origin": f"synthetic-{candidate['origin']}"}
+        for text, candidate in sorted(candidates.items())
+        if len(candidate["urls"]) <= MAX_DOCUMENT_FREQUENCY
+    ]
+
+    random.Random(seed).shuffle(queries)
+    return queries[:num_queries]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a synthetic retrieval query set from the data corpus")
+    parser.add_argument("--data", default="./data", help="Path to the directory with JSON documents")
+    parser.add_argument("--output", default=SYNTHETIC_QUERY_SET, help="Path of the JSONL query set")
+    parser.add_argument("--num-queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    query_set = build_synthetic_query_set(args.data, args.num_queries, args.seed)
+    save_query_set(query_set, args.output)
+    print(f"Saved {len(query_set)} queries to {args.output}")
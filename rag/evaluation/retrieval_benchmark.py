@@ -0,0 +1,188 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from dotenv import load_dotenv
+
+from rag.evaluation.query_sets import load_query_set, GOLDEN_QUERY_SET, SYNTHETIC_QUERY_SET, EVALUATION_DIR
+from rag.evaluation.retrieval_metrics import (
+    percentile,
+    unique_ranking,
+    recall_at_k,
+    reciprocal_rank,
+    ndcg_at_k
+)
+
+ENV_PATH = ".env"
+RESULTS_DIR = os.path.join(EVALUATION_DIR, "results")
+K_VALUES = (1, 5, 10, 20)
+
+
+def milvus_backend(collection_name: str = "chatagh"):
+    from rag.vector_store.milvus_hybrid_search import MilvusHybridSearch
+    return MilvusHybridSearch(collection_name)
+
+
+def parent_document_backend(collection_name: str = "chatagh_children", corpus_path: str = "./corpus"):
+    from rag.corpus.corpus_store import CorpusReader
+    from rag.vector_store.milvus_hybrid_search import MilvusHybridSearch
+    from rag.vector_store.parent_document_retriever import ParentDocumentRetriever
+    return ParentDocumentRetriever(MilvusHybridSearch(collection_name), CorpusReader(os.environ.get("CORPUS_PATH", corpus_path)))
+
+
+# Backends are factories of objects exposing `search(query: str, k: int) -> List[Document]`
+BACKENDS: Dict[str, Callable] = {
+    "milvus": milvus_backend,
+    "parent_document": parent_document_backend,
+}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return "unknown"
+
+
+def evaluate_quality(search: Callable, queries: List[dict], k_values=K_VALUES) -> dict:
+    """
+    Run every query once, measuring latency and ranking quality of the retrieved source documents.
+
+    Args:
+        search: Search function taking a query and the number of chunks
+        queries: Query set entries
+        k_values: Cutoffs for recall@k and nDCG@k
+
+    Returns:
+        Quality metrics and per-query latencies
+    """
+    max_k = max(k_values)
+    latencies = []
+    scores = {f"recall@{k}": [] for k in k_values}
+    scores.update({f"ndcg@{k}": [] for k in k_values})
+    scores["mrr"] = []
+
+    for query in queries:
+        start_time = time.perf_counter()
+        chunks = search(query["query"], max_k)
+        latencies.append(time.perf_counter() - start_time)
+
+        ranking = unique_ranking(chunk.metadata.get("url") for chunk in chunks)
+        relevant = set(query["relevant_urls"])
+        for k in k_values:
+            scores[f"recall@{k}"].append(recall_at_k(ranking, relevant, k))
+            scores[f"ndcg@{k}"].append(ndcg_at_k(ranking, relevant, k))
+        scores["mrr"].append(reciprocal_rank(ranking, relevant))
+
+    result = {name: statistics.mean(values) if values else 0.0 for name, values in scores.items()}
+    result.update({
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "latency_mean": statistics.mean(latencies) if latencies else 0.0,
+    })
+    return result
+
+
+def evaluate_throughput(search: Callable, queries: List[dict], concurrency: int, k: int = 20) -> dict:
+    """
+    Measure queries per second with `concurrency` concurrent clients.
+    """
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(lambda query: search(query["query"], k), queries))
+    elapsed = time.perf_counter() - start_time
+    return {"concurrency": concurrency, "queries": len(queries), "qps": len(queries) / elapsed if elapsed else 0.0}
+
+
+def run_benchmark(backend_names: List[str], query_set_paths: List[str], concurrency_levels=(1, 8),
+                  max_queries: int = None, output_dir: str = RESULTS_DIR) -> dict:
+    """
+    Benchmark retrieval backends on the given query sets and write results as JSON.
+
+    Args:
+        backend_names: Names of backends from BACKENDS
+        query_set_paths: Paths of JSONL query sets
+        concurrency_levels: Numbers of concurrent clients used for throughput measurement
+        max_queries: Optional limit of queries taken from each query set
+        output_dir: Directory of the JSON results
+
+    Returns:
+        Benchmark results
+    """
+    load_dotenv(dotenv_path=ENV_PATH)
+    results = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "backends": {},
+    }
+
+    for backend_name in backend_names:
+        backend = BACKENDS[backend_name]()
+        backend_results = {}
+        for path in query_set_paths:
+            queries = load_query_set(path)[:max_queries]
+            query_set_name = os.path.splitext(os.path.basename(path))[0]
+            backend_results[query_set_name] = {
+                "queries": len(queries),
+                "quality": evaluate_quality(backend.search, queries),
+                "throughput": [evaluate_throughput(backend.search, queries, c) for c in concurrency_levels],
+            }
+            print(f"[{backend_name}/{query_set_name}] {json.dumps(backend_results[query_set_name], indent=2)}")
+        results["backends"][backend_name] = backend_results
+
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, f"retrieval_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json")
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to: {output_path}")
+
+    return results
+
+
+def compare_results(baseline_path: str, candidate_path: str):
+    """
+    Print differences of quality metrics between two benchmark result files.
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(candidate_path, encoding="utf-8") as f:
+        candidate = json.load(f)
+
+    for backend_name, query_sets in candidate["backends"].items():
+        for query_set_name, result in query_sets.items():
+            base = baseline["backends"].get(backend_name, {}).get(query_set_name)
+            if not base:
+                continue
+            print(f"[{backend_name}/{query_set_name}] {baseline['git_commit']} -> {candidate['git_commit']}")
+            for metric, value in result["quality"].items():
+                base_value = base["quality"].get(metric, 0.0)
+                print(f"  {metric:>14}: {base_value:.4f} -> {value:.4f} ({value - base_value:+.4f})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark retrieval quality, latency and throughput")
+    parser.add_argument("--backends", nargs="+", default=["milvus"], choices=list(BACKENDS))
+    parser.add_argument("--queries", nargs="+", default=[GOLDEN_QUERY_SET, SYNTHETIC_QUERY_SET],
+                        help="Paths to JSONL query sets")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8])
+    parser.add_argument("--max-queries", type=int, default=None)
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"),
+                        help="Compare two result files instead of running the benchmark")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_results(*args.compare)
+    else:
+        run_benchmark(args.backends, args.queries, args.concurrency, args.max_queries, args.output_dir)
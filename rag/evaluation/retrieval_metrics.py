@@ -0,0 +1,49 @@
+import math
+from typing import Iterable, List, Sequence
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    Nearest-rank percentile of the values, 0.0 for an empty sequence.
+    """
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(q / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def unique_ranking(items: Iterable[str]) -> List[str]:
+    """
+    Deduplicate a ranked list, keeping the first occurrence of each item.
+    Used to turn a list of retrieved chunks into a ranking of source documents.
+    """
+    seen = set()
+    ranking = []
+    for item in items:
+        if item is not None and item not in seen:
+            seen.add(item)
+            ranking.append(item)
+    return ranking
+
+
+def recall_at_k(ranking: Sequence[str], relevant: set, k: int) -> float:
+    if not relevant:
+        return 0.0
+    return len(set(ranking[:k]) & relevant) / len(relevant)
+
+
+def reciprocal_rank(ranking: Sequence[str], relevant: set) -> float:
+    for rank, item in enumerate(ranking, start=1):
+        if item in relevant:
+            return 1.0 / rank
+    return 0.0
+
+
+def ndcg_at_k(ranking: Sequence[str], relevant: set, k: int) -> float:
+    """
+    Normalized discounted cumulative gain with binary relevance.
+    """
+    dcg = sum(1.0 / math.log2(rank + 1) for rank, item in enumerate(ranking[:k], start=1) if item in relevant)
+    ideal = sum(1.0 / math.log2(rank + 1) for rank in range(1, min(len(relevant), k) + 1))
+    return dcg / ideal if ideal else 0.0
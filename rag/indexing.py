@@ -2,32 +2,46 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import argparse
+
 from dotenv import load_dotenv
-from rag.utils.utils import load_json_data
+from rag.corpus.corpus_store import is_corpus_store
+from rag.utils.utils import load_documents
 from rag.chunkers.langchain_chunker import LangChainChunker
-from rag.vector_store.milvus_hybrid_search import MilvusHybridSearch
+from rag.chunkers.parallel_chunker import ParallelChunker
+from rag.chunkers.token_aware_chunker import TokenAwareChunker
 
 ENV_PATH = ".env"
 DATA_PATH = ""
+COLLECTION_NAME = "chatagh"
+# Child collection searched by ParentDocumentRetriever when rag.inference runs with CORPUS_PATH
+CHILD_COLLECTION_NAME = "chatagh_children"
+CHILD_MAX_TOKENS = 128
 
 
-def indexing(data_path, collection_name, chunk_size=1000, chunk_overlap=100, max_vectors=None):
+def indexing(data_path, collection_name, chunk_size=1000, chunk_overlap=100, max_vectors=None, chunker=None,
+             num_workers=1):
     """
     Index documents from a single data path into a specific vector store collection
 
     Args:
-        data_path (str): Path to the data file
+        data_path (str): Path to the corpus store or the directory of JSON files
         collection_name (str): Name of the collection in vector store
         chunk_size (int): Size of chunks for document splitting
         chunk_overlap (int): Overlap between chunks
+        max_vectors (int): Optional limit of indexed chunks
+        chunker (BaseChunker): Chunker to use, defaults to LangChainChunker with chunk_size and chunk_overlap
+        num_workers (int): Number of chunking processes, chunking is sharded across a process pool if > 1
 
     Returns:
         tuple: (collection_name, number of chunks)
     """
     load_dotenv(dotenv_path=ENV_PATH)
-    data = load_json_data(data_path)
+    data = load_documents(data_path)
 
-    chunker = LangChainChunker(chunk_size, chunk_overlap, remove_duplicates=True)
+    chunker = chunker or LangChainChunker(chunk_size, chunk_overlap, remove_duplicates=True)
+    if num_workers > 1:
+        chunker = ParallelChunker(chunker, num_workers=num_workers)
     chunks = chunker.chunk(data)
 
     if max_vectors:
@@ -35,6 +49,8 @@ def indexing(data_path, collection_name, chunk_size=1000, chunk_overlap=100, max
 
     print(f"Generated {len(chunks)} chunks from {data_path}")
 
+    from rag.vector_store.milvus_hybrid_search import MilvusHybridSearch
+
     vector_store = MilvusHybridSearch(collection_name)
     vector_store.indexing(chunks)
 
@@ -42,15 +58,56 @@ def indexing(data_path, collection_name, chunk_size=1000, chunk_overlap=100, max
     return (collection_name, len(chunks))
 
 
-if __name__ == "__main__":
-    i = 5
-    result = indexing(
-        "./data",
-        "chatagh",
-        chunk_size=1500,
-        chunk_overlap=0,
+def index_children(corpus_path, collection_name=CHILD_COLLECTION_NAME, max_tokens=CHILD_MAX_TOKENS, chunker=None,
+                   num_workers=1):
+    """
+    Index small child chunks of a corpus store for ParentDocumentRetriever.
+
+    Every child keeps the 'doc_id' of its document in the store, which identifies its parent, and
+    its 'start_index', so the retriever can cut the surrounding parent passage from the store.
+
+    Args:
+        corpus_path (str): Path to the corpus store, also set as CORPUS_PATH for inference
+        collection_name (str): Name of the child collection
+        max_tokens (int): Token budget of a child chunk
+        chunker (BaseChunker): Chunker to use, defaults to TokenAwareChunker with max_tokens
+        num_workers (int): Number of chunking processes
+
+    Raises:
+        ValueError: If corpus_path is not a corpus store
+
+    Returns:
+        tuple: (collection_name, number of chunks)
+    """
+    if not is_corpus_store(corpus_path):
+        raise ValueError(f"{corpus_path} is not a corpus store, parents are read from it (see rag/corpus/convert.py)")
+
+    chunker = chunker or TokenAwareChunker(
+        "intfloat/multilingual-e5-large", max_tokens=max_tokens, min_tokens=max_tokens // 4, remove_duplicates=True
     )
+    return indexing(corpus_path, collection_name, chunker=chunker, num_workers=num_workers)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index documents into a Milvus collection")
+    parser.add_argument("--data", default="./data", help="Corpus store or directory of JSON files")
+    parser.add_argument("--collection", help=f"Collection (default: {COLLECTION_NAME}, {CHILD_COLLECTION_NAME} with --children)")
+    parser.add_argument("--children", action="store_true",
+                        help="Index small child chunks of a corpus store for ParentDocumentRetriever (CORPUS_PATH)")
+    parser.add_argument("--child-tokens", type=int, default=CHILD_MAX_TOKENS, help="Token budget of a child chunk")
+    args = parser.parse_args()
+
+    if args.children:
+        collection_name, count = index_children(
+            args.data, args.collection or CHILD_COLLECTION_NAME, args.child_tokens, num_workers=os.cpu_count()
+        )
+    else:
+        collection_name, count = indexing(
+            args.data,
+            args.collection or COLLECTION_NAME,
+            chunker=TokenAwareChunker("intfloat/multilingual-e5-large", max_tokens=512, remove_duplicates=True),
+            num_workers=os.cpu_count(),
+        )
 
     print("\nIndexing Summary:")
-    for collection_name, count in result:
-        print(f"Collection '{collection_name}': {count} chunks")
+    print(f"Collection '{collection_name}': {count} chunks")
@@ -1,53 +1,359 @@
+import os
+import time
+import threading
 from dotenv import load_dotenv
 
+from rag.utils import trace_store
 from rag.utils.logger import logger
+from rag.utils.metrics import metrics
+from rag.utils.resilience import deadline_at, get_circuit_breaker, iterate_with_deadline, remaining_time
+from rag.utils.tracing import generator_span, iterate_in_span, trace_span
+from rag.speculation import Speculation, document_key, fuse_rankings
+from rag.models.context_packer import CHARS_PER_TOKEN, ContextPacker, estimate_tokens
+from rag.adaptive_controller import AdaptivePipelineController, DEFAULT_PIPELINE_MODE
+from rag.models.llm_cache import get_client
 from rag.models.google_genai_models import (
     QueryAugmentationModel,
     EnhanceSearchModel,
     AnswerGenerationModel
 )
-from rag.vector_store.milvus_hybrid_search import MilvusHybridSearch
+from rag.corpus.corpus_store import CorpusReader, is_corpus_store
 
 ENV_PATH = ".env"
+COLLECTION_NAME = "chatagh"
+# Child chunks of the corpus store, built with `python rag/indexing.py --children`
+CHILD_COLLECTION_NAME = "chatagh_children"
+# Generated questions of the corpus chunks, see rag.build_faq_index
+FAQ_COLLECTION_NAME = "chatagh_faq"
+# Minimum similarity of a query to a generated question for the FAQ fast path to answer it
+FAQ_CONFIDENCE_THRESHOLD = float(os.environ.get("CHATAGH_FAQ_THRESHOLD", 0.92))
+FAQ_TOP_K = 3
+# A missing FAQ index is looked up again after this many seconds, so an index built later is picked up
+FAQ_RECHECK_SECONDS = 300.0
 NUM_RETRIEVED_CHUNKS = 20
 MAX_SEARCH_ITERATIONS = 5
+# Context of the enhance and answer prompts is about this many chunks, the lowest scored ones are dropped
+CONTEXT_CHUNKS = 12
+# A typical indexed chunk (TokenAwareChunker, 512 model tokens) of about 1500 characters, in estimate_tokens units
+CHUNK_TOKENS_ESTIMATE = 1500 // CHARS_PER_TOKEN
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CHATAGH_CONTEXT_TOKENS", CONTEXT_CHUNKS * CHUNK_TOKENS_ESTIMATE))
+# Optional stages (augmentation, enhance loop) are skipped when less time than this is left for a request
+DEGRADED_REMAINING_SECONDS = 20.0
 
+_vector_store = None
+_vector_store_lock = threading.Lock()
+_faq_index = None
+# When the FAQ index was last found missing
+_faq_index_missing_at = None
 
-def inference(query):
+
+def count_sources(documents):
+    return len({doc.metadata.get("url") for doc in documents if hasattr(doc, "metadata")})
+
+
+def progress_event(stage, message, **kwargs):
+    return {"type": "progress", "stage": stage, "message": message, **kwargs}
+
+
+def degraded_reason():
+    """
+    Reason to answer from the first retrieval only: the request deadline is close or a dependency
+    is slow or failing (see rag.utils.resilience.CircuitBreaker.degraded). None if the full
+    pipeline can run.
+    """
+    remaining = remaining_time()
+    if remaining is not None and remaining < DEGRADED_REMAINING_SECONDS:
+        return "{:.0f} s left".format(remaining)
+    for dependency in ("gemini", "milvus"):
+        if get_circuit_breaker(dependency).degraded:
+            return "{} degraded".format(dependency)
+    return None
+
+
+def augment_and_search(query, vector_store, cancelled):
+    """
+    Augment a query and retrieve chunks for its variants, usually run speculatively while the raw
+    query is retrieved (see rag.speculation.Speculation).
+
+    Returns:
+        tuple: Augmented query and its retrieved chunks (empty if cancelled or the search failed)
+    """
+    with trace_span("augmentation"):
+        query_augmentation_model = QueryAugmentationModel()
+        augmented_query = query_augmentation_model.generate(query)
+    if cancelled.is_set():
+        return augmented_query, []
+
+    try:
+        with trace_span("variant_retrieval") as span:
+            variant_docs = vector_store.search(augmented_query, NUM_RETRIEVED_CHUNKS)
+            span.set_attribute("chunks", len(variant_docs))
+    except Exception as e:
+        # The raw query retrieval is enough to answer
+        logger.warning("Retrieval of the augmented query failed: {}".format(e))
+        variant_docs = []
+    return augmented_query, variant_docs
+
+
+def create_vector_store():
+    """
+    Create the retriever used by the pipeline.
+
+    If the CORPUS_PATH environment variable points to a corpus store, small child chunks
+    are searched in the child collection and expanded to parent passages from the store.
+    Otherwise chunks are searched directly.
+    """
+    # Imported here, pymilvus and the embedding model are loaded on first use (see `preload`)
+    from rag.vector_store.milvus_hybrid_search import MilvusHybridSearch
+    from rag.vector_store.parent_document_retriever import ParentDocumentRetriever
+
+    corpus_path = os.environ.get("CORPUS_PATH")
+    if corpus_path and is_corpus_store(corpus_path):
+        return ParentDocumentRetriever(MilvusHybridSearch(CHILD_COLLECTION_NAME), CorpusReader(corpus_path))
+    return MilvusHybridSearch(COLLECTION_NAME)
+
+
+def get_vector_store():
+    """
+    Return the retriever shared by all requests of the process, created on first use.
+    """
+    global _vector_store
+    with _vector_store_lock:
+        if _vector_store is None:
+            _vector_store = create_vector_store()
+        return _vector_store
+
+
+def get_faq_index():
+    """
+    Return the FAQ question index shared by all requests, None if it hasn't been built.
+
+    A missing index is checked for again at most every FAQ_RECHECK_SECONDS.
+    """
+    global _faq_index, _faq_index_missing_at
+    with _vector_store_lock:
+        recheck = _faq_index_missing_at is None or time.monotonic() - _faq_index_missing_at >= FAQ_RECHECK_SECONDS
+        if _faq_index is None and recheck:
+            from rag.vector_store.faq_index import MilvusFAQIndex
+            if MilvusFAQIndex.exists(FAQ_COLLECTION_NAME):
+                _faq_index = MilvusFAQIndex(FAQ_COLLECTION_NAME)
+                _faq_index_missing_at = None
+            else:
+                _faq_index_missing_at = time.monotonic()
+        return _faq_index
+
+
+def match_faq(query):
+    """
+    Look the query up in the FAQ index.
+
+    Returns:
+        list: Matches above FAQ_CONFIDENCE_THRESHOLD, best first, empty if none or the index is unavailable
+    """
+    try:
+        faq_index = get_faq_index()
+        matches = faq_index.lookup(query, FAQ_TOP_K) if faq_index is not None else []
+    except Exception as e:
+        logger.warning("FAQ lookup failed, running the full pipeline: {}".format(e))
+        return []
+    return [match for match in matches if match["score"] >= FAQ_CONFIDENCE_THRESHOLD]
+
+
+def preload():
+    """
+    Load the environment, the retriever with its embedding model and the LLM client, so the first
+    request doesn't pay for it. Called once per API server worker at startup.
+    """
+    load_dotenv(dotenv_path=ENV_PATH)
+    get_vector_store()
+    get_faq_index()
+    get_client()
+
+
+def inference_stream(query, mode=DEFAULT_PIPELINE_MODE, timeout=None, speculative=True, faq=True):
+    """
+    Run the RAG pipeline for a query, yielding events as soon as they are produced.
+
+    With `faq`, in every mode, if the query closely matches a question of the FAQ index
+    (see rag.build_faq_index), it is answered from the matched chunks, directly with the precomputed
+    answer if there is one, and retrieval, augmentation and the enhance loop are skipped.
+
+    Otherwise, in "thorough" mode every query goes through query augmentation and the enhance search loop.
+    In "balanced" and "fast" modes the first retrieval is done on the raw query and
+    AdaptivePipelineController decides from its signals which of these stages can be skipped.
+    In every mode they are skipped when the deadline is close or Gemini or Milvus are degraded.
+
+    With `speculative`, query augmentation and the retrieval of the augmented query start together
+    with the raw query retrieval whenever the plan may need them. Their chunks are fused with the
+    raw query's chunks, or the speculation is cancelled if the plan skips augmentation, in which
+    case the Gemini call already made is wasted.
+
+    Events are dicts with a "type" key:
+        - "progress": pipeline progress, with "stage" and human-readable "message" keys
+        - "sources": final retrieval result, with "documents" key
+        - "token": fragment of the generated answer, with "text" key
+
+    Args:
+        query (str): User query
+        mode (str): Pipeline mode, one of "fast", "balanced", "thorough" (default)
+        timeout (float): Optional deadline of the request in seconds, retries and optional stages
+            stop when it is close
+        speculative (bool): Whether to augment the query in parallel with the first retrieval
+        faq (bool): Whether to try the FAQ index first, False always runs the pipeline of the mode
+
+    Yields:
+        dict: Pipeline events
+    """
     load_dotenv(dotenv_path=ENV_PATH)
     logger.info("Starting inference for query: {}".format(query))
 
-    query_augmentation_model = QueryAugmentationModel()
-    augmented_query = query_augmentation_model.generate(query)
-    logger.info("Query augmented: \n {} \n\n".format(augmented_query))
+    # Every pipeline step runs with the deadline set and the inference span current,
+    # whichever thread resumes the generator
+    expires_at = deadline_at(timeout)
+    with generator_span("inference", mode=mode) as span:
+        yield from iterate_in_span(
+            iterate_with_deadline(_run_pipeline(query, mode, speculative, faq), expires_at), span
+        )
+
+
+def _generate_answer(query, source_docs, context_packer, augmented_query=None):
+    answer_generation_model = AnswerGenerationModel(context_packer=context_packer)
+    response_parts = []
+    with generator_span("generation", chunks=len(source_docs)) as span:
+        stream = answer_generation_model.generate_stream(augmented_query or query, context=source_docs)
+        for text in iterate_in_span(stream, span):
+            if not response_parts:
+                span.set_attribute("time_to_first_token", span.elapsed())
+            response_parts.append(text)
+            yield {"type": "token", "text": text}
+        span.set_attribute("output_tokens", estimate_tokens("".join(response_parts)))
+
+    response = "".join(response_parts)
+    logger.info("Generated response ({} chars)".format(len(response)))
+    trace_store.capture("response", query=query, response=response)
+
+
+def _answer_from_faq(query, matches):
+    best = matches[0]
+    source_docs = list({document_key(match["document"]): match["document"] for match in matches}.values())
+    logger.info("FAQ match ({:.3f}): {}".format(best["score"], best["question"]))
+    trace_store.capture("faq_match", query=query, question=best["question"], documents=source_docs)
+    yield progress_event("faq", "Matched FAQ question: {}".format(best["question"]), score=best["score"])
+    yield {"type": "sources", "documents": source_docs}
+
+    if best["answer"]:
+        trace_store.capture("response", query=query, response=best["answer"])
+        yield {"type": "token", "text": best["answer"]}
+    else:
+        yield from _generate_answer(query, source_docs, ContextPacker(max_tokens=CONTEXT_TOKEN_BUDGET))
 
-    vector_store = MilvusHybridSearch("chatagh")
+
+def _run_pipeline(query, mode, speculative=True, faq=True):
+    if faq:
+        with trace_span("faq_lookup") as span:
+            matches = match_faq(query)
+            span.set_attribute("hit", bool(matches))
+        metrics.increment("faq.hits" if matches else "faq.misses")
+        if matches:
+            yield from _answer_from_faq(query, matches)
+            return
+
+    controller = AdaptivePipelineController(mode, max_search_iterations=MAX_SEARCH_ITERATIONS)
+    vector_store = get_vector_store()
     # vector_store = PineconeHybridSearchVectorStore(os.environ["PINECONE_API_KEY"], "chatagh")
-    source_docs = vector_store.search(query, NUM_RETRIEVED_CHUNKS)
-    print(source_docs)
 
-    logger.info("Retrieved {} chunks: \n {} \n\n".format(len(source_docs), source_docs))
+    speculation = None
+    if speculative and controller.may_augment(query) and not degraded_reason():
+        speculation = Speculation("augmentation", augment_and_search, query, vector_store)
 
-    enhance_search_model = EnhanceSearchModel()
-    summaries = []
-    for i in range(MAX_SEARCH_ITERATIONS):
-        summary, questions = enhance_search_model.generate(augmented_query, context=source_docs)
-        logger.info("Enhance search model response: \n Summary: {}\n Questions: \n {}".format(summary, questions))
+    try:
+        with trace_span("retrieval", mode=mode) as span:
+            if controller.mode == "thorough":
+                source_docs = vector_store.search(query, NUM_RETRIEVED_CHUNKS)
+                plan = controller.plan(query, {})
+            else:
+                source_docs, signals = vector_store.search_with_signals(query, NUM_RETRIEVED_CHUNKS)
+                plan = controller.plan(query, signals)
+                logger.info("Retrieval signals: {}, pipeline plan: {}".format(signals, plan))
+            span.set_attributes(chunks=len(source_docs), plan=plan["reason"])
+
+        logger.info("Retrieved {} chunks from {} sources".format(len(source_docs), count_sources(source_docs)))
+        trace_store.capture("retrieval", query=query, documents=source_docs)
+        yield progress_event("retrieval", "Retrieved {} chunks".format(len(source_docs)), chunks=len(source_docs))
+
+        degraded = degraded_reason()
+        if degraded:
+            metrics.increment("pipeline.degraded")
+            logger.warning("Degraded pipeline ({}), answering from the first retrieval".format(degraded))
+
+        if plan["augment"] and not degraded:
+            if speculation is not None:
+                augmented_query, variant_docs = speculation.result()
+            else:
+                augmented_query, variant_docs = augment_and_search(query, vector_store, threading.Event())
+            source_docs = fuse_rankings([source_docs, variant_docs], NUM_RETRIEVED_CHUNKS)
+            trace_store.capture("variant_retrieval", query=augmented_query, documents=variant_docs)
+            logger.info("Query augmented: \n {} \n\n".format(augmented_query))
+            yield progress_event("augmentation", "Query augmentation done", chunks=len(source_docs))
+        else:
+            augmented_query = query
+            yield progress_event("augmentation", "Query augmentation skipped ({})".format(degraded or plan["reason"]))
+    finally:
+        # Short-circuited plan, failed retrieval or closed stream
+        if speculation is not None:
+            speculation.cancel()
 
-        if not (summary and questions):
+    context_packer = ContextPacker(max_tokens=CONTEXT_TOKEN_BUDGET)
+    enhance_search_model = EnhanceSearchModel(context_packer=context_packer)
+    summaries = []
+    for i in range(plan["max_search_iterations"]):
+        degraded = degraded_reason()
+        if degraded:
+            metrics.increment("pipeline.degraded")
+            yield progress_event("enhance", "Search loop stopped ({})".format(degraded))
             break
 
-        summaries.append({"text": summary})
+        with trace_span("enhance", iteration=i + 1) as span:
+            summary, questions = enhance_search_model.generate(augmented_query, context=source_docs)
+            logger.info("Enhance search model response: \n Summary: {}\n Questions: \n {}".format(summary, questions))
+
+            if not (summary and questions):
+                break
+
+            summaries.append({"text": summary})
 
-        questions = " \n".join(questions)
-        source_docs = vector_store.search(questions, k=NUM_RETRIEVED_CHUNKS)
+            questions = " \n".join(questions)
+            try:
+                source_docs = vector_store.search(questions, k=NUM_RETRIEVED_CHUNKS)
+            except Exception as e:
+                # Answer with the chunks retrieved so far
+                logger.warning("Enhance search retrieval failed, stopping the search loop: {}".format(e))
+                break
+            span.set_attribute("chunks", len(source_docs))
+
+        yield progress_event(
+            "enhance",
+            "Search iteration {}: retrieved {} chunks".format(i + 1, len(source_docs)),
+            iteration=i + 1,
+            chunks=len(source_docs)
+        )
 
     source_docs.extend(summaries)
-    logger.info("Final retrieval result: \n {} \n\n".format(source_docs))
+    logger.info("Final retrieval result: {} chunks, {} summaries".format(len(source_docs) - len(summaries), len(summaries)))
+    trace_store.capture("final_retrieval", query=query, documents=source_docs)
+    yield {"type": "sources", "documents": source_docs}
+
+    yield from _generate_answer(query, source_docs, context_packer, augmented_query)
+
 
-    answer_generation_model = AnswerGenerationModel()
-    final_response = answer_generation_model.generate(augmented_query, context=source_docs)
-    logger.info("Generated response: \n {} \n\n".format(final_response))
+def inference(query, mode=DEFAULT_PIPELINE_MODE, timeout=None, speculative=True, faq=True):
+    final_response = ""
+    source_docs = []
+    for event in inference_stream(query, mode=mode, timeout=timeout, speculative=speculative, faq=faq):
+        if event["type"] == "token":
+            final_response += event["text"]
+        elif event["type"] == "sources":
+            source_docs = event["documents"]
 
     return final_response, source_docs
 
@@ -0,0 +1,185 @@
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from langchain_core.documents import Document
+
+from rag.utils.logger import logger
+
+CHARS_PER_TOKEN = 4
+DEFAULT_MAX_TOKENS = 8000
+SUMMARY_SOURCE = "summary"
+# Chunks of a document separated by at most this many characters are adjacent, splitters strip
+# the whitespace between chunks, so their offsets rarely touch
+MAX_ADJACENT_GAP = 3
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap, dependency-free token count estimate (about four characters per token).
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated number of tokens
+    """
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def short_source(url: str) -> str:
+    """
+    Shorten a source URL to host and path, e.g. 'sd.agh.edu.pl/kandydaci/ideas-ncbir'.
+
+    Args:
+        url: Full source URL
+
+    Returns:
+        Shortened URL without scheme, 'www.' prefix, query string and fragment
+    """
+    parsed = urlparse(url)
+    if not parsed.netloc:
+        return url
+    host = parsed.netloc[4:] if parsed.netloc.startswith("www.") else parsed.netloc
+    return host + parsed.path.rstrip("/")
+
+
+class ContextPacker:
+    """
+    Renders retrieved chunks into a compact, token-budgeted prompt context.
+
+    Instead of formatting the Python repr of a list of LangChain documents (including all of
+    their metadata) into the prompt, only chunk texts with a short source URL are rendered.
+    Chunks are selected by score (or retrieval rank when no score is available) until the token
+    budget is exhausted, and chunks coming from the same source document are rendered together,
+    with overlapping or adjacent chunks merged into a single passage.
+
+    Attributes:
+        max_tokens (int): Token budget for the rendered context.
+        token_counter (Callable[[str], int]): Function used to count tokens of a text.
+        merge_adjacent (bool): Whether to merge chunks coming from the same source document.
+
+    Methods:
+        pack(context) -> str:
+            Renders documents (or summary dicts) into a prompt context string.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        token_counter: Callable[[str], int] = estimate_tokens,
+        merge_adjacent: bool = True,
+    ):
+        self.max_tokens = max_tokens
+        self.token_counter = token_counter
+        self.merge_adjacent = merge_adjacent
+
+    def pack(self, context: Any) -> str:
+        """
+        Render retrieved context into a compact string fitting the token budget.
+
+        Args:
+            context: Already rendered string, or a list of LangChain Documents and
+                summary dicts with a "text" key
+
+        Returns:
+            Rendered context
+        """
+        if isinstance(context, str):
+            return context
+
+        entries = [self._to_entry(rank, item) for rank, item in enumerate(context or [])]
+        entries = [entry for entry in entries if entry["text"].strip()]
+        selected = self._select(entries)
+        groups = self._group(selected)
+
+        blocks = [
+            f"[{i}] {source}\n{text}" for i, (source, text) in enumerate(groups, start=1)
+        ]
+        packed = "\n\n".join(blocks)
+
+        logger.debug(
+            "Packed context: {} of {} chunks, {} blocks, ~{} tokens".format(
+                len(selected), len(entries), len(blocks), self.token_counter(packed)
+            )
+        )
+        return packed
+
+    @staticmethod
+    def _to_entry(rank: int, item: Any) -> Dict[str, Any]:
+        if isinstance(item, Document):
+            metadata = item.metadata or {}
+            url = metadata.get("url")
+            return {
+                "rank": rank,
+                "text": item.page_content,
+                "source": short_source(url) if url else metadata.get("title", "unknown"),
+                "start": metadata.get("start_index"),
+                "score": metadata.get("score"),
+            }
+        if isinstance(item, dict):
+            return {"rank": rank, "text": str(item.get("text", "")), "source": SUMMARY_SOURCE,
+                    "start": None, "score": None}
+        return {"rank": rank, "text": str(item), "source": "unknown", "start": None, "score": None}
+
+    def _select(self, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if all(entry["score"] is not None for entry in entries if entry["source"] != SUMMARY_SOURCE):
+            # Summaries carry no score, they are always considered first
+            ordered = sorted(
+                entries,
+                key=lambda e: (e["source"] != SUMMARY_SOURCE, -(e["score"] or 0.0), e["rank"])
+            )
+        else:
+            ordered = entries
+
+        selected = []
+        used_tokens = 0
+        for entry in ordered:
+            tokens = self.token_counter(entry["text"]) + self.token_counter(entry["source"]) + 2
+            if used_tokens + tokens > self.max_tokens:
+                continue
+            used_tokens += tokens
+            selected.append(entry)
+
+        return selected
+
+    def _group(self, entries: List[Dict[str, Any]]) -> List[tuple]:
+        if not self.merge_adjacent:
+            return [(entry["source"], entry["text"]) for entry in entries]
+
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in entries:
+            key = entry["source"] if entry["source"] != SUMMARY_SOURCE else f"{SUMMARY_SOURCE}-{entry['rank']}"
+            groups.setdefault(key, []).append(entry)
+
+        return [(group[0]["source"], self._merge(group)) for group in groups.values()]
+
+    @staticmethod
+    def _merge(group: List[Dict[str, Any]]) -> str:
+        if len(group) == 1:
+            return group[0]["text"]
+
+        if all(entry["start"] is not None for entry in group):
+            group = sorted(group, key=lambda e: e["start"])
+
+        parts = [group[0]["text"]]
+        end: Optional[int] = None if group[0]["start"] is None else group[0]["start"] + len(group[0]["text"])
+        for entry in group[1:]:
+            text, start = entry["text"], entry["start"]
+            if text in parts:
+                continue
+            if end is not None and start is not None and start <= end:
+                # Overlapping or directly adjacent chunk, append only the new tail
+                tail = text[end - start:]
+                if tail:
+                    parts[-1] += tail
+                end = max(end, start + len(text))
+                continue
+            if end is not None and start is not None and start - end <= MAX_ADJACENT_GAP:
+                # Adjacent chunk separated by stripped whitespace
+                parts[-1] += ("\n" if start - end > 1 else " ") + text
+                end = start + len(text)
+                continue
+            parts.append(text)
+            end = None if start is None else start + len(text)
+
+        return "\n[...]\n".join(parts)
@@ -0,0 +1,63 @@
+from typing import List
+
+from langchain_core.documents import Document
+
+# Multilingual doc2query model trained on mMARCO, generates search queries answered by a passage
+DOC2QUERY_MODEL_NAME = "doc2query/msmarco-14langs-mt5-base-v1"
+MAX_INPUT_TOKENS = 384
+MAX_QUESTION_TOKENS = 64
+
+
+class LocalQuestionGenerator:
+    """
+    Local doc2query model generating the questions a chunk answers, a stand-in for
+    QuestionGenerationModel which needs no API key and makes no network calls once the model
+    is downloaded, e.g. for tests and for building the FAQ index offline.
+
+    Questions are sampled (top-k), so repeated calls can return different questions
+    unless `seed` is set.
+
+    Methods:
+        generate_questions(document: Document, num_questions: int) -> List[str]:
+            Returns up to `num_questions` unique questions answered by the document.
+    """
+
+    def __init__(self, model_name: str = DOC2QUERY_MODEL_NAME, device: str = None, seed: int = None):
+        """
+        Args:
+            model_name: Hugging Face seq2seq doc2query model
+            device: Torch device, defaults to CUDA if available
+            seed: Optional sampling seed for reproducible questions
+        """
+        # Imported here, torch and transformers take seconds to import
+        import torch
+        from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+        self.torch = torch
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name).to(self.device).eval()
+        self.seed = seed
+
+    def generate_questions(self, document: Document, num_questions: int = 5) -> List[str]:
+        if self.seed is not None:
+            self.torch.manual_seed(self.seed)
+
+        inputs = self.tokenizer(
+            document.page_content,
+            max_length=MAX_INPUT_TOKENS,
+            truncation=True,
+            return_tensors="pt",
+        ).to(self.device)
+
+        with self.torch.no_grad():
+            outputs = self.model.generate(
+                **inputs,
+                max_length=MAX_QUESTION_TOKENS,
+                do_sample=True,
+                top_k=10,
+                num_return_sequences=num_questions,
+            )
+
+        questions = (self.tokenizer.decode(output, skip_special_tokens=True).strip() for output in outputs)
+        return list(dict.fromkeys(question for question in questions if question))
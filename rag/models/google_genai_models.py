@@ -1,15 +1,29 @@
-import os
-import ast
-
-from google import genai
+import time
 
+from rag.utils import trace_store
 from rag.utils.logger import logger
+from rag.utils.metrics import metrics
+from rag.utils.resilience import call_with_retry, get_circuit_breaker
+from rag.utils.tracing import generator_span, iterate_in_span, trace_span
+from rag.models.context_packer import ContextPacker
+from rag.models.llm_cache import get_client, get_response_cache, make_cache_key, request_coalescer
+from rag.models.structured_output import EnhanceSearchResult, parse_enhance_search_response, parse_question_list
 from rag.models.prompts import (
     QUERY_AUGMENTATION_PROMPT_TEMPLATE,
     ENHANCE_SEARCH_PROMPT_TEMPLATE,
-    ANSWER_GENERATION_PROMPT_TEMPLATE
+    ANSWER_GENERATION_PROMPT_TEMPLATE,
+    QUESTION_GENERATION_PROMPT_TEMPLATE
 )
 
+GEMINI_DEPENDENCY = "gemini"
+# Average call latency above which Gemini is considered slow and optional stages are skipped
+GEMINI_SLOW_CALL_SECONDS = 15.0
+gemini_circuit_breaker = get_circuit_breaker(GEMINI_DEPENDENCY, slow_call_seconds=GEMINI_SLOW_CALL_SECONDS)
+
+
+def prompt_length(contents) -> int:
+    return sum(len(str(content)) for content in contents)
+
 
 class BaseGoogleModel:
     """
@@ -19,40 +33,156 @@ class BaseGoogleModel:
     and prompt template. It serves as a foundation for specialized models for query augmentation,
     search enhancement, and answer generation.
 
+    All instances share a single API client and a persistent response cache. Identical requests
+    issued concurrently (e.g. by several users asking the same question) are coalesced into one call.
+    Streamed requests (`generate_stream`) are cached but not coalesced: every concurrent stream
+    makes its own call, as a follower can't replay a stream the leader's client may abandon.
+    Transient failures (timeouts, rate limits, server errors) are retried with backoff within
+    the request deadline, through the shared Gemini circuit breaker (see rag.utils.resilience).
+    Client errors, e.g. invalid arguments or blocked prompts, are raised without retries.
+    Requests sent to Gemini are counted as `llm.calls` and `llm.<class name>.calls` in `metrics`.
+
     Attributes:
-        client (genai.Client): The Google API client initialized using the API key from environment variables.
+        client (genai.Client): The shared Google API client initialized using the API key from environment variables.
+        cache (LLMResponseCache): Shared prompt-to-response cache, None if caching is disabled.
         model (str): The name of the model used for content generation.
         prompt_template (str): A template used to format prompts for the model.
+        context_packer (ContextPacker): Renders retrieved documents into a compact, token-budgeted context.
+        generation_config (types.GenerateContentConfig): Optional generation config, e.g. response schema.
 
     Methods:
         _inference(contents):
             Sends a list of prompt contents to the model and returns the generated text.
+        _inference_stream(contents):
+            Sends a list of prompt contents to the model and yields the generated text as it arrives.
         generate(query: str, **kwargs):
             Formats the prompt using the provided query and context, and generates a response.
+        generate_stream(query: str, **kwargs):
+            Same as generate, but yields response text fragments as they are generated.
     """
 
-    def __init__(self, prompt_template, model_name="gemini-2.0-flash-001"):
-        self.client = genai.Client(api_key=os.environ["GOOGLE_API_KEY"])
+    def __init__(self, prompt_template, model_name="gemini-2.0-flash-001", context_packer=None,
+                 generation_config=None, cache=None):
+        self.client = get_client()
+        self.cache = cache or get_response_cache()
         self.model = model_name
         self.prompt_template = prompt_template
+        self.context_packer = context_packer or ContextPacker()
+        self.generation_config = generation_config
+
+    def _cache_key(self, contents):
+        return make_cache_key(self.model, contents, self.generation_config)
+
+    def _invalidate(self, contents):
+        if self.cache:
+            self.cache.delete(self._cache_key(contents))
 
     def _inference(self, contents):
-        logger.debug(f"[{self.__class__.__name__}] Inferring model with content:'{contents}'")
-        return self.client.models.generate_content(
-            model=self.model,
-            contents=contents,
-        ).text
+        key = self._cache_key(contents)
+        with trace_span(f"llm.{self.__class__.__name__}", model=self.model) as span:
+            if self.cache:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    metrics.increment("llm_cache.hits")
+                    span.set_attribute("cache_hit", True)
+                    logger.debug(f"[{self.__class__.__name__}] Cache hit for request {key[:12]}")
+                    return cached
+                metrics.increment("llm_cache.misses")
 
-    def generate(self, query: str, **kwargs):
-        context = kwargs.get("context", [])
+            def call():
+                logger.debug(f"[{self.__class__.__name__}] Inferring model, prompt of {prompt_length(contents)} chars")
+                self._count_call()
+                trace_store.capture("prompt", model_class=self.__class__.__name__, contents=contents)
+                response = call_with_retry(
+                    self.client.models.generate_content,
+                    dependency=GEMINI_DEPENDENCY,
+                    model=self.model,
+                    contents=contents,
+                    config=self.generation_config,
+                )
+                self._record_usage(span, response)
+                if self.cache and response.text is not None:
+                    self.cache.set(key, response.text)
+                return response.text
+
+            return request_coalescer.run(key, call)
+
+    def _inference_stream(self, contents):
+        key = self._cache_key(contents)
+        with generator_span(f"llm.{self.__class__.__name__}", model=self.model, stream=True) as span:
+            if self.cache:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    metrics.increment("llm_cache.hits")
+                    span.set_attribute("cache_hit", True)
+                    yield cached
+                    return
+                metrics.increment("llm_cache.misses")
+
+            logger.debug(f"[{self.__class__.__name__}] Streaming model, prompt of {prompt_length(contents)} chars")
+            self._count_call()
+            trace_store.capture("prompt", model_class=self.__class__.__name__, contents=contents)
+            parts = []
+            chunk = None
+            for chunk in iterate_in_span(self._stream_with_retry(contents), span):
+                if chunk.text:
+                    parts.append(chunk.text)
+                    yield chunk.text
+
+            self._record_usage(span, chunk)
+            if self.cache and parts:
+                self.cache.set(key, "".join(parts))
+
+    def _stream_with_retry(self, contents):
+        """
+        Stream response chunks. Failures before the first chunk are retried like `_inference` calls,
+        failures after it are raised, as the caller has already used part of the response.
+        """
+        def first_chunk():
+            stream = iter(self.client.models.generate_content_stream(
+                model=self.model,
+                contents=contents,
+                config=self.generation_config,
+            ))
+            return stream, next(stream, None)
+
+        stream, chunk = call_with_retry(first_chunk, dependency=GEMINI_DEPENDENCY)
+        if chunk is None:
+            return
+        yield chunk
+        yield from stream
+
+    def _count_call(self):
+        """Count a Gemini request, cache hits and requests coalesced into another one excluded."""
+        metrics.increment("llm.calls")
+        metrics.increment(f"llm.{self.__class__.__name__}.calls")
+
+    @staticmethod
+    def _record_usage(span, response):
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            span.set_attributes(
+                prompt_tokens=usage.prompt_token_count,
+                output_tokens=usage.candidates_token_count,
+            )
+
+    def _build_contents(self, query: str, **kwargs):
+        context = self.context_packer.pack(kwargs.get("context", []))
         prompt = self.prompt_template.format(
             CONTEXT=context,
             QUERY=query
         )
-        contents = [prompt]
+        return [prompt]
+
+    def generate(self, query: str, **kwargs):
+        contents = self._build_contents(query, **kwargs)
         response = self._inference(contents)
         return response
 
+    def generate_stream(self, query: str, **kwargs):
+        contents = self._build_contents(query, **kwargs)
+        yield from self._inference_stream(contents)
+
 
 class QueryAugmentationModel(BaseGoogleModel):
     """
@@ -66,8 +196,8 @@ class QueryAugmentationModel(BaseGoogleModel):
         BaseGoogleModel
     """
 
-    def __init__(self):
-        super().__init__(prompt_template=QUERY_AUGMENTATION_PROMPT_TEMPLATE)
+    def __init__(self, **kwargs):
+        super().__init__(prompt_template=QUERY_AUGMENTATION_PROMPT_TEMPLATE, **kwargs)
 
 
 class EnhanceSearchModel(BaseGoogleModel):
@@ -78,6 +208,13 @@ class EnhanceSearchModel(BaseGoogleModel):
     It identifies any missing information necessary to fully answer the query and, if found,
     generates a comprehensive summary along with up to three clarifying questions.
 
+    The model is queried in JSON response schema mode and the response is parsed into
+    an EnhanceSearchResult with a tolerant fallback parser. If parsing fails, only this call is
+    re-issued, up to `max_attempts` times. Call failures are not retried here, transient ones were
+    already retried by the shared retry layer. If the call or all attempts fail, an empty result is
+    returned so the pipeline can still answer with the context retrieved so far.
+    Parse failures, retries and time spent on failed attempts are counted in `metrics`.
+
     Inherits from:
         BaseGoogleModel
 
@@ -86,15 +223,44 @@ class EnhanceSearchModel(BaseGoogleModel):
             Generates a response and post-processes it to extract a summary and a list of questions.
     """
 
-    def __init__(self):
-        super().__init__(prompt_template=ENHANCE_SEARCH_PROMPT_TEMPLATE)
+    def __init__(self, max_attempts: int = 3, **kwargs):
+        from google.genai import types
+
+        kwargs.setdefault("generation_config", types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=EnhanceSearchResult,
+        ))
+        super().__init__(prompt_template=ENHANCE_SEARCH_PROMPT_TEMPLATE, **kwargs)
+        self.max_attempts = max_attempts
 
     def generate(self, query: str, **kwargs):
-        response = super().generate(query, **kwargs)
-        response = ast.literal_eval(response[response.find("{"):response.find("}") + 1])
-        summary = response.get("summary")
-        questions = response.get("questions")
-        return summary, questions
+        contents = self._build_contents(query, **kwargs)
+
+        for attempt in range(1, self.max_attempts + 1):
+            start_time = time.perf_counter()
+            try:
+                response = self._inference(contents)
+            except Exception as e:
+                # Retries of transient errors are exhausted, or the deadline, the circuit breaker or
+                # a client error stopped them, another attempt would fail the same way
+                metrics.increment("enhance_search.call_failures")
+                logger.warning(f"[{self.__class__.__name__}] Skipping enhance step, call failure: {e}")
+                return "", []
+
+            try:
+                result = parse_enhance_search_response(response)
+                return result.summary, result.questions
+            except ValueError as e:
+                self._invalidate(contents)
+                metrics.increment("enhance_search.parse_failures")
+                logger.warning(f"[{self.__class__.__name__}] Attempt {attempt} parse failure: {e}")
+
+            metrics.increment("enhance_search.failed_attempt_seconds", time.perf_counter() - start_time)
+            if attempt < self.max_attempts:
+                metrics.increment("enhance_search.retries")
+
+        logger.error(f"[{self.__class__.__name__}] All {self.max_attempts} attempts failed, skipping enhance step")
+        return "", []
 
 
 class AnswerGenerationModel(BaseGoogleModel):
@@ -109,5 +275,33 @@ class AnswerGenerationModel(BaseGoogleModel):
         BaseGoogleModel
     """
 
-    def __init__(self):
-        super().__init__(prompt_template=ANSWER_GENERATION_PROMPT_TEMPLATE)
+    def __init__(self, **kwargs):
+        super().__init__(prompt_template=ANSWER_GENERATION_PROMPT_TEMPLATE, **kwargs)
+
+
+class QuestionGenerationModel(BaseGoogleModel):
+    """
+    A model generating the questions a chunk answers (doc2query), used to build the FAQ index
+    (see rag.build_faq_index).
+
+    Inherits from:
+        BaseGoogleModel
+
+    Methods:
+        generate_questions(document: Document, num_questions: int) -> List[str]:
+            Returns up to `num_questions` questions answered by the document.
+    """
+
+    def __init__(self, **kwargs):
+        from google.genai import types
+
+        kwargs.setdefault("generation_config", types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=list[str],
+        ))
+        super().__init__(prompt_template=QUESTION_GENERATION_PROMPT_TEMPLATE, **kwargs)
+
+    def generate_questions(self, document, num_questions: int = 5):
+        response = self.generate("", context=[document])
+        return parse_question_list(response)[:num_questions]
+
@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+if TYPE_CHECKING:
+    from google import genai
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "llm_cache.sqlite")
+DEFAULT_CACHE_TTL = 24 * 60 * 60
+DEFAULT_CACHE_MAX_ENTRIES = 10000
+
+_client = None
+_client_lock = threading.Lock()
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_client() -> "genai.Client":
+    """
+    Return the process-wide Google GenAI client, creating it on first use.
+
+    The API endpoint can be overridden with the GOOGLE_API_BASE_URL environment variable,
+    e.g. to point the pipeline at a local fake Gemini server.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            # Imported on first use, google.genai takes ~0.5 s to import
+            from google import genai
+            from google.genai import types
+
+            base_url = os.environ.get("GOOGLE_API_BASE_URL")
+            http_options = types.HttpOptions(base_url=base_url) if base_url else None
+            _client = genai.Client(api_key=os.environ["GOOGLE_API_KEY"], http_options=http_options)
+        return _client
+
+
+def get_response_cache() -> Optional["LLMResponseCache"]:
+    """
+    Return the process-wide LLM response cache configured from environment variables,
+    or None if caching is disabled with LLM_CACHE_ENABLED=0.
+    """
+    global _response_cache
+    if os.environ.get("LLM_CACHE_ENABLED", "1") == "0":
+        return None
+
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = LLMResponseCache(
+                path=os.environ.get("LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+                ttl_seconds=float(os.environ.get("LLM_CACHE_TTL", DEFAULT_CACHE_TTL)),
+                max_entries=int(os.environ.get("LLM_CACHE_MAX_ENTRIES", DEFAULT_CACHE_MAX_ENTRIES)),
+            )
+        return _response_cache
+
+
+def _json_default(obj: Any):
+    if isinstance(obj, type) and hasattr(obj, "model_json_schema"):
+        return obj.model_json_schema()
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(exclude_none=True)
+    return repr(obj)
+
+
+def make_cache_key(model: str, contents: Any, config: Any = None) -> str:
+    """
+    Build a cache key from the model name, a hash of the prompt contents and generation params.
+
+    Args:
+        model: Model name
+        contents: Prompt contents sent to the model
+        config: Optional generation config
+
+    Returns:
+        Hex digest identifying the request
+    """
+    params = config.model_dump(exclude_none=True) if hasattr(config, "model_dump") else config
+    payload = json.dumps(
+        {"model": model, "contents": contents, "params": params},
+        default=_json_default,
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    A persistent, size-bounded prompt-to-response cache with TTL, backed by SQLite.
+
+    Entries older than `ttl_seconds` are treated as missing, and once the cache holds more than
+    `max_entries` entries the least recently used ones are evicted. SQLite makes the cache safe to
+    share between threads and between processes (e.g. Streamlit sessions and indexing scripts).
+
+    Attributes:
+        path (str): Path to the SQLite database file.
+        ttl_seconds (float): Time to live of cache entries.
+        max_entries (int): Maximum number of entries kept in the cache.
+
+    Methods:
+        get(key: str) -> Optional[str]:
+            Returns the cached response, or None if missing or expired.
+        set(key: str, response: str):
+            Stores a response and evicts least recently used entries if the cache is full.
+        delete(key: str):
+            Removes an entry, e.g. a response which turned out to be unusable.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl_seconds: float = DEFAULT_CACHE_TTL,
+                 max_entries: int = DEFAULT_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key: str, response: str):
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, response, now, now)
+            )
+            self._connection.execute(
+                "DELETE FROM responses WHERE created_at < ? OR key IN ("
+                "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (now - self.ttl_seconds, self.max_entries)
+            )
+
+    def delete(self, key: str):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+
+class RequestCoalescer:
+    """
+    Coalesces identical in-flight requests into a single call.
+
+    The first caller for a key executes the call, concurrent callers with the same key
+    wait for its result (or exception) instead of issuing their own request. Only complete
+    results are shared, streamed responses are not coalesced.
+
+    Methods:
+        run(key: str, func: Callable[[], Any]) -> Any:
+            Executes func, or waits for an already running call with the same key.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+
+    def run(self, key: str, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._in_flight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not is_leader:
+            return future.result()
+
+        try:
+            future.set_result(func())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+        return future.result()
+
+
+request_coalescer = RequestCoalescer()
@@ -28,9 +28,9 @@ If there is missing information:
  important that addresses the query.
 
 If there is no missing information:
-- Return empty python dictionary
+- Return an empty summary and an empty list of questions.
 
-Format your output as a python dict, "summary" key should contain string with summary,
+Format your output as a JSON object, "summary" key should contain string with summary,
  "questions" key should contain list of question strings.
 
  QUERY: {{QUERY}}
@@ -58,3 +58,17 @@ User Question:
 
 Answer:
 """
+
+
+QUESTION_GENERATION_PROMPT_TEMPLATE = f"""
+You are an AI assistant preparing a FAQ for students and employees of 
+AGH University of Science and Technology.
+Given the passage below, write up to five questions that users would 
+realistically ask and that the passage fully answers.
+Write the questions in the language of the passage, make each one self-contained 
+(name the subject, do not refer to "the passage") and do not repeat questions.
+
+Format your output as a JSON list of question strings.
+
+PASSAGE: {{CONTEXT}}
+"""
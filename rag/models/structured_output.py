@@ -0,0 +1,129 @@
+import re
+import ast
+import json
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+CODE_FENCE_PATTERN = re.compile(r"```(?:json|python)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+
+
+class EnhanceSearchResult(BaseModel):
+    """
+    Typed result of the enhance search step, also used as Gemini response schema.
+
+    Attributes:
+        summary (str): Summary of the key details found in the context, empty if nothing is missing.
+        questions (List[str]): Questions retrieving the missing information, empty if nothing is missing.
+    """
+    summary: str
+    questions: List[str]
+
+
+def _find_json_object(text: str) -> Optional[str]:
+    """
+    Return the first balanced {...} fragment of the text, ignoring braces inside string literals.
+    """
+    start = text.find("{")
+    if start == -1:
+        return None
+
+    depth = 0
+    quote = None
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if quote:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+
+    return None
+
+
+def parse_enhance_search_response(text: str) -> EnhanceSearchResult:
+    """
+    Tolerantly parse an enhance search model response.
+
+    Accepts plain JSON (response schema mode), JSON or python dict literals wrapped in markdown
+    fences or surrounded by free text, and an empty dict meaning that no information is missing.
+
+    Args:
+        text: Raw model response
+
+    Returns:
+        Parsed EnhanceSearchResult
+
+    Raises:
+        ValueError: If the response does not contain a valid result
+    """
+    text = (text or "").strip()
+    fenced = CODE_FENCE_PATTERN.search(text)
+    if fenced:
+        text = fenced.group(1).strip()
+
+    candidates = [text]
+    fragment = _find_json_object(text)
+    if fragment and fragment != text:
+        candidates.append(fragment)
+
+    data = None
+    for candidate in candidates:
+        for loads in (json.loads, ast.literal_eval):
+            try:
+                data = loads(candidate)
+                break
+            except (ValueError, SyntaxError, MemoryError, RecursionError):
+                continue
+        if data is not None:
+            break
+
+    if not isinstance(data, dict):
+        raise ValueError(f"Unable to parse enhance search response: {text[:200]!r}")
+
+    summary = data.get("summary") or ""
+    questions = data.get("questions") or []
+    if isinstance(questions, str):
+        questions = [questions]
+    if not isinstance(summary, str) or not isinstance(questions, list):
+        raise ValueError(f"Unexpected enhance search response structure: {text[:200]!r}")
+
+    return EnhanceSearchResult(summary=summary, questions=[str(q) for q in questions if q])
+
+
+LIST_MARKER_PATTERN = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+
+
+def parse_question_list(text: str) -> List[str]:
+    """
+    Parse a list of questions from a model response: a JSON list (possibly in a code fence),
+    otherwise one question per line with list markers removed.
+
+    Returns:
+        Non-empty, unique questions in response order
+    """
+    fenced = CODE_FENCE_PATTERN.search(text or "")
+    candidate = (fenced.group(1) if fenced else text or "").strip()
+
+    try:
+        parsed = json.loads(candidate)
+    except ValueError:
+        parsed = None
+
+    if isinstance(parsed, list):
+        questions = [str(question).strip() for question in parsed]
+    else:
+        questions = [LIST_MARKER_PATTERN.sub("", line).strip() for line in candidate.splitlines()]
+
+    return list(dict.fromkeys(question for question in questions if question))
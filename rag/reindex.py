@@ -0,0 +1,75 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import argparse
+
+from dotenv import load_dotenv
+from rag.evaluation.query_sets import load_query_set, GOLDEN_QUERY_SET
+from rag.vector_store.collection_versions import CollectionVersions, KEEP_VERSIONS
+from rag.vector_store.milvus_hybrid_search import MilvusHybridSearch
+from rag.vector_store.bulk_import import bulk_build
+from rag.utils.logger import logger
+
+ENV_PATH = ".env"
+# Alias queried by rag.inference
+COLLECTION_NAME = "chatagh"
+
+
+def reindex(data_path, alias=COLLECTION_NAME, queries_path=GOLDEN_QUERY_SET, keep=KEEP_VERSIONS,
+            num_workers=1, promote=True):
+    """
+    Rebuild a collection without downtime: bulk import into a new version (see MilvusBulkLoader),
+    validate it against the live one, switch the alias and drop old versions.
+
+    Args:
+        data_path (str): Path to the corpus store or the directory of JSON files
+        alias (str): Alias queried by inference
+        queries_path (str): Smoke query set used for validation
+        keep (int): Number of previous versions kept for rollbacks
+        num_workers (int): Number of chunking processes
+        promote (bool): Whether to switch the alias after a successful validation
+
+    Returns:
+        dict: Validation report of the new version
+    """
+    load_dotenv(dotenv_path=ENV_PATH)
+    versions = CollectionVersions(alias)
+    version = versions.new_version()
+    logger.info(f"Building {version}, {alias} is served by {versions.current() or alias}")
+
+    bulk_build(data_path, version, num_workers=num_workers)
+
+    report = versions.validate(version, MilvusHybridSearch, load_query_set(queries_path))
+    if not report["passed"]:
+        # Kept for inspection, dropped by a later garbage collection
+        logger.error(f"{version} failed validation, {alias} is unchanged: {report['errors']}")
+        return report
+
+    if promote:
+        versions.promote(version)
+        versions.garbage_collect(keep)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Zero-downtime rebuild of a collection served under an alias",
+        epilog="The first promotion of a collection created before versioning renames it from the alias name to "
+               "<alias>_v0 and then creates the alias: queries of the alias fail for the moment between the two "
+               "calls (Milvus aliases can't share a name with a collection). Later promotions switch atomically.",
+    )
+    parser.add_argument("--data", default="./data", help="Corpus store or directory of JSON files")
+    parser.add_argument("--alias", default=COLLECTION_NAME, help="Alias queried by inference")
+    parser.add_argument("--queries", default=GOLDEN_QUERY_SET, help="Smoke queries for validation")
+    parser.add_argument("--keep", type=int, default=KEEP_VERSIONS, help="Previous versions kept for rollbacks")
+    parser.add_argument("--no-promote", action="store_true", help="Build and validate without switching the alias")
+    parser.add_argument("--rollback", action="store_true", help="Switch the alias back to the previous version")
+    args = parser.parse_args()
+
+    if args.rollback:
+        print(f"{args.alias} now served by {CollectionVersions(args.alias).rollback()}")
+    else:
+        result = reindex(args.data, args.alias, args.queries, args.keep, os.cpu_count(), not args.no_promote)
+        print(json.dumps(result, indent=2))
@@ -0,0 +1,229 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import asyncio
+import argparse
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+
+from rag.adaptive_controller import PIPELINE_MODES, DEFAULT_PIPELINE_MODE
+from rag.inference import inference_stream, preload
+from rag.utils.logger import logger
+from rag.utils.metrics import metrics
+from rag.utils.resilience import CircuitOpenError, DeadlineExceeded
+
+# Concurrent pipeline runs per worker, further requests wait for a slot up to QUEUE_TIMEOUT
+MAX_CONCURRENT_REQUESTS = int(os.environ.get("CHATAGH_MAX_CONCURRENT_REQUESTS", 4))
+QUEUE_TIMEOUT = float(os.environ.get("CHATAGH_QUEUE_TIMEOUT", 10))
+REQUEST_TIMEOUT = float(os.environ.get("CHATAGH_REQUEST_TIMEOUT", 120))
+GRACEFUL_SHUTDOWN_TIMEOUT = 30
+# Returned by a pipeline step when the pipeline is exhausted
+_END = object()
+
+
+class QueryRequest(BaseModel):
+    query: str = Field(min_length=1)
+    mode: str = DEFAULT_PIPELINE_MODE
+
+
+def serialize_document(document):
+    if isinstance(document, dict):
+        return document
+    return {"text": document.page_content, "metadata": document.metadata}
+
+
+def serialize_event(event):
+    if event["type"] == "sources":
+        return {**event, "documents": [serialize_document(doc) for doc in event["documents"]]}
+    return event
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    app.state.slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    # Models, vector store and LLM client are loaded once per worker, off the event loop
+    await asyncio.to_thread(preload)
+    app.state.ready = True
+    logger.info(f"API worker {os.getpid()} ready, max {MAX_CONCURRENT_REQUESTS} concurrent requests")
+    yield
+    app.state.ready = False
+    logger.info(f"API worker {os.getpid()} shutting down")
+
+
+app = FastAPI(title="Chat AGH", lifespan=lifespan)
+
+
+async def acquire_slot(request: Request):
+    try:
+        await asyncio.wait_for(request.app.state.slots.acquire(), QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        metrics.increment("api.rejected")
+        raise HTTPException(status_code=503, detail="Server busy, try again later")
+
+
+def validate(query_request: QueryRequest):
+    if query_request.mode not in PIPELINE_MODES:
+        raise HTTPException(status_code=422, detail=f"mode must be one of {list(PIPELINE_MODES)}")
+
+
+def run_inference(query: str, mode: str):
+    response_parts = []
+    source_docs = []
+    for event in inference_stream(query, mode=mode, timeout=REQUEST_TIMEOUT):
+        if event["type"] == "token":
+            response_parts.append(event["text"])
+        elif event["type"] == "sources":
+            source_docs = event["documents"]
+    return "".join(response_parts), source_docs
+
+
+def finish_stream(pipeline, step, request: Request):
+    """
+    Close a streamed pipeline once no step of it is running and release its concurrency slot.
+    """
+    if step is not None and not step.cancelled() and step.exception() is not None:
+        logger.warning(f"Pipeline step failed: {step.exception()}")
+    try:
+        # Runs the pipeline's cleanup (open spans, speculations) if the client disconnected mid-stream
+        pipeline.close()
+    except ValueError:
+        pass
+    finally:
+        request.app.state.slots.release()
+
+
+@app.get("/healthz")
+async def healthz(request: Request):
+    if not request.app.state.ready:
+        return JSONResponse({"status": "loading"}, status_code=503)
+    return {"status": "ok"}
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """
+    Prometheus metrics (pipeline stage histograms, see rag.utils.tracing) of this worker,
+    or of all workers if PROMETHEUS_MULTIPROC_DIR is set (prometheus_client multiprocess mode).
+    """
+    try:
+        from prometheus_client import CollectorRegistry, generate_latest, multiprocess, CONTENT_TYPE_LATEST
+    except ImportError:
+        raise HTTPException(status_code=404, detail="prometheus_client is not installed")
+
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/metrics/summary")
+async def metrics_summary():
+    """
+    Stage latency summaries and counters of this worker, used by the Streamlit dashboard.
+
+    The registry is in-process, so with several uvicorn workers each request is answered by one
+    of them and reports only the requests it served. `/metrics` with PROMETHEUS_MULTIPROC_DIR set
+    covers all workers.
+    """
+    return {"stages": metrics.summaries(prefix="stage."), "counters": metrics.snapshot()}
+
+
+@app.post("/query")
+async def query(query_request: QueryRequest, request: Request):
+    validate(query_request)
+    await acquire_slot(request)
+
+    # The slot is released when the pipeline thread finishes, not when the request times out,
+    # so timed out requests still count against the concurrency limit while they run
+    task = asyncio.ensure_future(asyncio.to_thread(run_inference, query_request.query, query_request.mode))
+    task.add_done_callback(lambda _: request.app.state.slots.release())
+
+    try:
+        response, source_docs = await asyncio.wait_for(asyncio.shield(task), REQUEST_TIMEOUT)
+    except (asyncio.TimeoutError, DeadlineExceeded):
+        metrics.increment("api.timeouts")
+        raise HTTPException(status_code=504, detail="Request timed out")
+    except CircuitOpenError as e:
+        logger.error(f"Inference failed: {e}")
+        raise HTTPException(status_code=503, detail="Service temporarily unavailable, try again later")
+    except Exception as e:
+        logger.error(f"Inference failed: {e}")
+        raise HTTPException(status_code=500, detail="Inference failed")
+
+    return {"response": response, "documents": [serialize_document(doc) for doc in source_docs]}
+
+
+@app.post("/query/stream")
+async def query_stream(query_request: QueryRequest, request: Request):
+    """
+    Stream pipeline events (progress, sources, tokens) as newline-delimited JSON.
+    """
+    validate(query_request)
+    await acquire_slot(request)
+
+    async def events():
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + REQUEST_TIMEOUT
+        pipeline = inference_stream(query_request.query, mode=query_request.mode, timeout=REQUEST_TIMEOUT)
+        step = None
+        try:
+            while True:
+                # Every step runs in the thread pool and is bounded by the remaining time, so a hanging
+                # call (e.g. generation before the first token) still ends the stream in time
+                step = asyncio.ensure_future(asyncio.to_thread(next, pipeline, _END))
+                try:
+                    event = await asyncio.wait_for(asyncio.shield(step), max(0.0, deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    metrics.increment("api.timeouts")
+                    yield json.dumps({"type": "error", "message": "Request timed out"}) + "\n"
+                    break
+                if event is _END:
+                    break
+                yield json.dumps(serialize_event(event), ensure_ascii=False) + "\n"
+        except DeadlineExceeded:
+            metrics.increment("api.timeouts")
+            yield json.dumps({"type": "error", "message": "Request timed out"}) + "\n"
+        except CircuitOpenError as e:
+            logger.error(f"Inference failed: {e}")
+            yield json.dumps({"type": "error", "message": "Service temporarily unavailable"}) + "\n"
+        except Exception as e:
+            logger.error(f"Inference failed: {e}")
+            yield json.dumps({"type": "error", "message": "Inference failed"}) + "\n"
+        finally:
+            if step is not None and not step.done():
+                # The slot is held until the running step finishes, like in /query
+                step.add_done_callback(lambda _: finish_stream(pipeline, step, request))
+            else:
+                finish_stream(pipeline, step, request)
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Chat AGH HTTP API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("CHATAGH_WORKERS", 1)),
+                        help="Worker processes, each preloads its own models")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        # Read by rag.utils.logger in every worker process
+        os.environ["LOG_FILE_PER_PROCESS"] = "1"
+
+    uvicorn.run(
+        "rag.server:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_TIMEOUT,
+    )
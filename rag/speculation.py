@@ -0,0 +1,112 @@
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Hashable, List, Optional
+
+from rag.utils.logger import logger
+from rag.utils.metrics import metrics
+
+# Threads running speculative work of all requests of the process
+SPECULATION_WORKERS = 8
+# Reciprocal rank fusion constant, dampens the weight of top ranks
+RRF_K = 60
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the thread pool shared by all speculations, created on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=SPECULATION_WORKERS, thread_name_prefix="speculation")
+        return _executor
+
+
+class Speculation:
+    """
+    Work started before it is known whether it is needed, so it runs off the critical path.
+
+    `func` runs in a background thread with a copy of the caller's context, so the request
+    deadline and the current trace span apply to it. It receives a `cancelled` threading.Event
+    and should check it between steps: a blocking call that is already running can't be
+    interrupted, so a cancelled speculation stops at its next step and its result is discarded.
+
+    The time the work overlapped the caller's own work is observed as
+    `speculation.<name>.saved_seconds` (and summed in `saved_seconds_total`), used and cancelled
+    speculations are counted as `speculation.<name>.used` and `speculation.<name>.cancelled`.
+
+    Attributes:
+        name (str): Name used in metrics, e.g. "augmentation".
+        cancelled (threading.Event): Set when the result is no longer needed.
+    """
+
+    def __init__(self, name: str, func: Callable, *args, **kwargs):
+        self.name = name
+        self.cancelled = threading.Event()
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+        self._consumed = False
+        context = contextvars.copy_context()
+        self._future = get_executor().submit(context.run, self._run, func, args, kwargs)
+        metrics.increment(f"speculation.{name}.started")
+
+    def _run(self, func: Callable, args, kwargs) -> Any:
+        try:
+            return func(*args, cancelled=self.cancelled, **kwargs)
+        finally:
+            self.finished_at = time.perf_counter()
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        """
+        Wait for the speculative work and return its result, exceptions of `func` are re-raised.
+        """
+        waiting_since = time.perf_counter()
+        self._consumed = True
+        result = self._future.result(timeout)
+        saved = min(waiting_since, self.finished_at) - self.started_at
+        metrics.observe(f"speculation.{self.name}.saved_seconds", saved)
+        metrics.increment(f"speculation.{self.name}.used")
+        metrics.increment(f"speculation.{self.name}.saved_seconds_total", saved)
+        metrics.observe(f"speculation.{self.name}.waited_seconds", time.perf_counter() - waiting_since)
+        return result
+
+    def cancel(self):
+        """Discard the speculation, a no-op if its result was already used."""
+        if self._consumed or self.cancelled.is_set():
+            return
+        self.cancelled.set()
+        if not self._future.cancel() and not self._future.done():
+            logger.info(f"Speculative {self.name} cancelled while running, its result is discarded")
+        metrics.increment(f"speculation.{self.name}.cancelled")
+
+
+def document_key(document) -> Hashable:
+    """Identity of a retrieved chunk: its chunk_id, otherwise its text."""
+    metadata = getattr(document, "metadata", {})
+    return metadata.get("chunk_id") or getattr(document, "page_content", None) or id(document)
+
+
+def fuse_rankings(rankings: List[List], k: int, key: Callable = document_key) -> List:
+    """
+    Merge retrieval results with reciprocal rank fusion, deduplicating chunks by `key`.
+
+    Ties keep the order of `rankings`, so chunks of the first ranking come first.
+
+    Args:
+        rankings: Retrieved documents of each query, best first
+        k: Number of documents returned
+
+    Returns:
+        Top `k` fused documents
+    """
+    scores = {}
+    documents = {}
+    for ranking in rankings:
+        for rank, document in enumerate(ranking):
+            document_id = key(document)
+            scores[document_id] = scores.get(document_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+            documents.setdefault(document_id, document)
+    return [documents[document_id] for document_id in sorted(scores, key=scores.get, reverse=True)[:k]]
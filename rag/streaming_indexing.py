@@ -0,0 +1,351 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import time
+import queue
+import argparse
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from rag.chunkers.base_chunker import BaseChunker
+from rag.chunkers.chunk_ids import content_hash, chunk_id
+from rag.utils.logger import logger
+from rag.utils.metrics import metrics
+
+# Documents waiting for indexing, a full queue blocks the crawler threads (backpressure)
+QUEUE_SIZE = 256
+# Documents chunked, embedded and upserted together
+BATCH_SIZE = 32
+# Maximum seconds a document waits for its batch to fill up, bounds the crawl-to-searchable latency
+MAX_BATCH_WAIT = 5.0
+
+# Queue item: (doc_id, content, metadata, enqueued_at)
+QueueItem = Tuple[str, str, Dict[str, Any], float]
+
+
+class IndexingCheckpoint:
+    """
+    Content hashes of indexed documents, stored as JSON lines appended after every successful upsert.
+
+    On restart, documents whose content hash didn't change are skipped, so a restarted crawler can
+    re-emit everything without re-embedding it.
+
+    Documents of failed batches are stored with their content in '<path>.failed' until they are
+    indexed. The crawler doesn't emit them again (known file URLs and unchanged sitemap pages aren't
+    fetched again), so StreamingIndexer retries them itself when it starts.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: JSON lines file, created if it doesn't exist
+        """
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.failed_path = path + ".failed"
+        self.hashes = {}
+        # doc_id -> queue item of documents whose indexing failed
+        self.failed = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Line cut off by a crash, its batch gets re-indexed
+                        continue
+                    self.hashes[entry["doc_id"]] = entry["hash"]
+        if os.path.exists(self.failed_path):
+            with open(self.failed_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        item = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self.failed[item[0]] = tuple(item)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def get(self, doc_id: str) -> Optional[str]:
+        return self.hashes.get(doc_id)
+
+    def record(self, entries: Dict[str, str]):
+        """
+        Durably record indexed documents.
+
+        Args:
+            entries: doc_id -> content hash
+        """
+        for doc_id, digest in entries.items():
+            self._file.write(json.dumps({"doc_id": doc_id, "hash": digest, "time": time.time()}, ensure_ascii=False) + "\n")
+            self.hashes[doc_id] = digest
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+        if any(doc_id in self.failed for doc_id in entries):
+            for doc_id in entries:
+                self.failed.pop(doc_id, None)
+            self._write_failed()
+
+    def record_failed(self, items: List[QueueItem]):
+        """
+        Durably store documents whose indexing failed, to be retried by `StreamingIndexer`.
+        """
+        for item in items:
+            self.failed[item[0]] = tuple(item)
+        self._write_failed()
+
+    def _write_failed(self):
+        temp_path = self.failed_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for item in self.failed.values():
+                f.write(json.dumps(list(item), ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.failed_path)
+
+    def close(self):
+        self._file.close()
+
+
+class StreamingIndexer:
+    """
+    Indexes documents while they are being crawled.
+
+    Producers (e.g. WebCrawler threads, see its `document_queue` argument) put
+    (doc_id, content, metadata, enqueued_at) items into the bounded `queue`, which are marked done
+    (`queue.join()`) once indexed or stored as failed in the checkpoint. A background thread
+    collects them into batches of up to `batch_size` documents, waiting at most `max_batch_wait`
+    seconds for a batch to fill up, then chunks, embeds and upserts each batch, so new content is
+    searchable seconds after it was extracted, without intermediate files.
+
+    Documents whose content didn't change since they were last indexed (see IndexingCheckpoint)
+    are skipped. Documents of failed batches are stored in the checkpoint and retried first when
+    the indexer starts again, without a checkpoint they are only logged. Previous chunks of every
+    indexed document are deleted by doc_id before its new chunks are upserted, with or without
+    a checkpoint, so chunks of a changed document don't stay in the collection.
+
+    Attributes:
+        queue: Bounded queue of documents to index
+        stats: Counters of indexed, unchanged and failed documents and indexed chunks
+    """
+
+    def __init__(
+        self,
+        vector_store: Any,
+        chunker: BaseChunker,
+        checkpoint_path: Optional[str] = None,
+        queue_size: int = QUEUE_SIZE,
+        batch_size: int = BATCH_SIZE,
+        max_batch_wait: float = MAX_BATCH_WAIT,
+    ):
+        """
+        Args:
+            vector_store: MilvusHybridSearch collection to index into
+            chunker: Chunker of the documents
+            checkpoint_path: Optional IndexingCheckpoint file, enables restarts without re-embedding
+            queue_size: Maximum number of documents waiting in the queue
+            batch_size: Maximum number of documents indexed together
+            max_batch_wait: Maximum seconds to wait for a batch to fill up
+        """
+        self.vector_store = vector_store
+        self.chunker = chunker
+        self.checkpoint = IndexingCheckpoint(checkpoint_path) if checkpoint_path else None
+        self.batch_size = batch_size
+        self.max_batch_wait = max_batch_wait
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stats = {"indexed": 0, "unchanged": 0, "failed": 0, "chunks": 0}
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="streaming-indexer", daemon=True)
+        self._thread.start()
+        return self
+
+    def put(self, doc_id: str, content: str, metadata: Dict[str, Any]):
+        """
+        Queue a document for indexing, blocks while the queue is full.
+        """
+        self.queue.put((doc_id, content, metadata, time.time()))
+
+    def close(self):
+        """
+        Index the remaining queued documents and stop the background thread.
+        """
+        if self._thread is not None:
+            self.queue.put(None)
+            self._thread.join()
+            self._thread = None
+        if self.checkpoint is not None:
+            self.checkpoint.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _next_batch(self) -> Tuple[List[QueueItem], bool]:
+        """
+        Collect the next batch of queued documents.
+
+        Returns:
+            tuple: (batch, whether the queue was closed)
+        """
+        item = self.queue.get()
+        if item is None:
+            return [], True
+
+        batch = [item]
+        deadline = time.monotonic() + self.max_batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        if self.checkpoint is not None and self.checkpoint.failed:
+            retries = list(self.checkpoint.failed.values())
+            logger.info(f"Retrying {len(retries)} documents of previously failed batches")
+            for i in range(0, len(retries), self.batch_size):
+                self._index_or_record_failure(retries[i:i + self.batch_size])
+
+        closed = False
+        while not closed:
+            batch, closed = self._next_batch()
+            if batch:
+                self._index_or_record_failure(batch)
+            # Indexed (or durably recorded as failed), the crawler waits for this before its checkpoint
+            for _ in range(len(batch) + closed):
+                self.queue.task_done()
+
+    def _index_or_record_failure(self, batch: List[QueueItem]):
+        try:
+            self.index_batch(batch)
+        except Exception as e:
+            self.stats["failed"] += len(batch)
+            metrics.increment("streaming_indexer.failed", len(batch))
+            logger.error(f"Streaming indexing of {len(batch)} documents failed: {e}")
+            if self.checkpoint is not None:
+                # The crawler won't emit them again, they are retried on the next start
+                self.checkpoint.record_failed(batch)
+            else:
+                logger.error(f"Documents not indexed: {[doc_id for doc_id, *_ in batch]}")
+
+    def index_batch(self, batch: List[QueueItem]):
+        """
+        Chunk, embed and upsert a batch of queued documents.
+
+        Args:
+            batch: Queue items, the latest version of a document wins
+        """
+        latest = {doc_id: (content, metadata, enqueued_at) for doc_id, content, metadata, enqueued_at in batch}
+
+        hashes = {}
+        changed = 0
+        documents = []
+        for doc_id, (content, metadata, _) in latest.items():
+            digest = f"{content_hash(content, bits=128):032x}"
+            previous = self.checkpoint.get(doc_id) if self.checkpoint is not None else None
+            if previous == digest:
+                self.stats["unchanged"] += 1
+                continue
+            if previous is not None:
+                changed += 1
+            hashes[doc_id] = digest
+            documents.append(Document(page_content=content, metadata={**metadata, "doc_id": doc_id}))
+
+        if not documents:
+            return
+
+        chunks = self.chunker.chunk(documents)
+        for chunk in chunks:
+            chunk.metadata["chunk_id"] = chunk_id(chunk)
+
+        # Also without a checkpoint entry (no checkpoint, or a crash before it was recorded)
+        # the document may already have chunks in the collection
+        self.vector_store.delete_documents(list(hashes))
+        if chunks:
+            self.vector_store.indexing(chunks)
+        if self.checkpoint is not None:
+            self.checkpoint.record(hashes)
+
+        now = time.time()
+        for doc_id in hashes:
+            metrics.observe("streaming_indexer.latency_s", now - latest[doc_id][2])
+        metrics.increment("streaming_indexer.documents", len(documents))
+        metrics.increment("streaming_indexer.chunks", len(chunks))
+        self.stats["indexed"] += len(documents)
+        self.stats["chunks"] += len(chunks)
+        logger.info(
+            f"Streamed {len(documents)} documents ({len(chunks)} chunks, {changed} updated) "
+            f"to {getattr(self.vector_store, 'collection_name', 'vector store')}, {self.queue.qsize()} queued"
+        )
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from rag.chunkers.token_aware_chunker import TokenAwareChunker
+    from rag.vector_store.milvus_hybrid_search import MilvusHybridSearch
+    from web_scraping.download_all_files import WebCrawler
+
+    parser = argparse.ArgumentParser(description="Crawl a site and index its pages while crawling")
+    parser.add_argument("--url", required=True, help="Starting URL to crawl")
+    parser.add_argument("--collection", default="chatagh", help="Milvus collection to index into")
+    parser.add_argument("--output", default="./output", help="Crawler output directory")
+    parser.add_argument("--checkpoint", default="./output/indexing_checkpoint.jsonl",
+                        help="Indexed documents, unchanged documents are skipped after a restart")
+    parser.add_argument("--crawl-state", default="./output/crawl_state.json",
+                        help="Lastmod of crawled pages, unchanged sitemap pages are not fetched again")
+    parser.add_argument("--crawl-checkpoint", default="./output/crawl_checkpoint.json",
+                        help="Crawl progress, a killed crawl resumes from it")
+    parser.add_argument("--corpus", help="Also write pages to a compact corpus store at this path")
+    parser.add_argument("--max-pages", type=int, default=10000, help="Maximum number of pages to crawl")
+    parser.add_argument("--max-depth", type=int, default=100, help="Maximum depth for crawling")
+    parser.add_argument("--concurrency", type=int, default=5, help="Number of concurrent requests")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Documents indexed together")
+    parser.add_argument("--max-batch-wait", type=float, default=MAX_BATCH_WAIT,
+                        help="Maximum seconds a document waits for its batch")
+    args = parser.parse_args()
+
+    load_dotenv(dotenv_path=".env")
+    indexer = StreamingIndexer(
+        MilvusHybridSearch(args.collection),
+        TokenAwareChunker("intfloat/multilingual-e5-large", max_tokens=512, remove_duplicates=True),
+        checkpoint_path=args.checkpoint,
+        batch_size=args.batch_size,
+        max_batch_wait=args.max_batch_wait,
+    )
+
+    with indexer:
+        crawler = WebCrawler(
+            start_url=args.url,
+            output_dir=args.output,
+            max_pages=args.max_pages,
+            max_depth=args.max_depth,
+            concurrency=args.concurrency,
+            corpus_path=args.corpus,
+            crawl_state_path=args.crawl_state,
+            document_queue=indexer.queue,
+            checkpoint_path=args.crawl_checkpoint,
+        )
+        summary = crawler.crawl()
+
+    print(f"Crawled {summary['pages_crawled']} pages and {summary['files_downloaded']} files "
+          f"in {summary['time_taken']:.2f} seconds")
+    print(f"Indexing: {indexer.stats}")
@@ -1,23 +1,148 @@
-import logging
 import os
-from datetime import datetime
+import glob
+import gzip
+import queue
+import random
+import shutil
+import atexit
+import logging
+import logging.handlers
+
+LOG_DIR = os.environ.get("LOG_DIR", "logs")
+# Processes logging to the same directory at once (API server workers) each need their own file,
+# a RotatingFileHandler shared between processes loses and garbles records when it rotates
+LOG_FILE_PER_PROCESS = os.environ.get("LOG_FILE_PER_PROCESS", "0") == "1"
+LOG_FILE = os.path.join(LOG_DIR, f"ChatAGH.{os.getpid()}.log" if LOG_FILE_PER_PROCESS else "ChatAGH.log")
+LOG_MAX_BYTES = int(os.environ.get("LOG_MAX_BYTES", 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.environ.get("LOG_BACKUP_COUNT", 10))
+LOG_QUEUE_SIZE = 10000
+# Longer messages are truncated, full payloads belong to the opt-in trace store (rag.utils.trace_store)
+LOG_MAX_MESSAGE_CHARS = int(os.environ.get("LOG_MAX_MESSAGE_CHARS", 2000))
+# Fraction of DEBUG records which are kept
+LOG_DEBUG_SAMPLE_RATE = float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", 1.0))
+
+
+class TruncatingFilter(logging.Filter):
+    """
+    Truncates log messages longer than `max_chars`, so a single record can't dump whole contexts.
+    """
+
+    def __init__(self, max_chars: int = LOG_MAX_MESSAGE_CHARS):
+        super().__init__()
+        self.max_chars = max_chars
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        message = record.getMessage()
+        if len(message) > self.max_chars:
+            record.msg = f"{message[:self.max_chars]}... [truncated {len(message) - self.max_chars} chars]"
+            record.args = None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a `sample_rate` fraction of records at or below `level`.
+    """
+
+    def __init__(self, sample_rate: float = LOG_DEBUG_SAMPLE_RATE, level: int = logging.DEBUG):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.level = level
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > self.level or self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler which drops records instead of blocking the request path when the queue is full.
+    """
+
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            NonBlockingQueueHandler.dropped += 1
+
+
+def gzip_rotator(source: str, dest: str):
+    with open(source, "rb") as source_file, gzip.open(dest, "wb") as dest_file:
+        shutil.copyfileobj(source_file, dest_file)
+    os.remove(source)
+
+
+class LazyRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Rotating file handler creating its directory and file with the first record, not when it is
+    created, so importing the logger has no filesystem side effects.
+    """
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+def per_process_path(path: str) -> str:
+    """
+    Path of the file of the current process, e.g. traces.jsonl -> traces.<pid>.jsonl, if LOG_FILE_PER_PROCESS is set.
+    """
+    if not LOG_FILE_PER_PROCESS:
+        return path
+    root, extension = os.path.splitext(path)
+    return f"{root}.{os.getpid()}{extension}"
+
+
+def log_files(log_dir: str = LOG_DIR):
+    """
+    Current (not rotated) log files of all processes, most recently modified first.
+    """
+    paths = glob.glob(os.path.join(log_dir, "ChatAGH.log")) + glob.glob(os.path.join(log_dir, "ChatAGH.*.log"))
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+def create_rotating_file_handler(path: str, max_bytes: int = LOG_MAX_BYTES,
+                                 backup_count: int = LOG_BACKUP_COUNT) -> logging.Handler:
+    """
+    Create a size-based rotating file handler compressing rotated files with gzip.
+    The log directory and file are created when the first record is written.
+    """
+    handler = LazyRotatingFileHandler(
+        path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True
+    )
+    handler.rotator = gzip_rotator
+    handler.namer = lambda name: name + ".gz"
+    return handler
+
+
+def attach_queue_listener(target_logger: logging.Logger, *handlers: logging.Handler) -> logging.handlers.QueueListener:
+    """
+    Route records of the logger through a bounded queue to handlers running in a background thread.
+    """
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    target_logger.addHandler(NonBlockingQueueHandler(log_queue))
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
 
-LOG_DIR = "logs"
-os.makedirs(LOG_DIR, exist_ok=True)
-LOG_FILE = os.path.join(LOG_DIR, f"ChatAGH_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.log")
 
 logger = logging.getLogger("ChatAGHLogger")
 logger.setLevel(logging.DEBUG)
+logger.propagate = False
+logger.addFilter(SamplingFilter())
+logger.addFilter(TruncatingFilter())
 
 formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
 
 console_handler = logging.StreamHandler()
 console_handler.setLevel(logging.INFO)
 console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
 
-file_handler = logging.FileHandler(LOG_FILE, encoding="utf-8")
+file_handler = create_rotating_file_handler(LOG_FILE)
 file_handler.setLevel(logging.DEBUG)
 file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
 
+listener = attach_queue_listener(logger, console_handler, file_handler)
@@ -0,0 +1,78 @@
+import threading
+from collections import defaultdict, deque
+from typing import Dict
+
+MAX_SAMPLES = 2000
+
+
+class MetricsRegistry:
+    """
+    A minimal thread-safe registry of named counters and latency-style observations.
+
+    Counters are used to count events that cost latency but do not fail the pipeline,
+    such as LLM output parse failures and retried calls. Observations (e.g. stage durations)
+    keep a bounded window of recent samples, from which percentiles are computed.
+
+    Methods:
+        increment(name: str, value: float):
+            Increases the counter by the given value.
+        get(name: str) -> float:
+            Returns the current counter value.
+        snapshot() -> Dict[str, float]:
+            Returns a copy of all counters.
+        observe(name: str, value: float):
+            Records a sample of the named observation.
+        summary(name: str) -> Dict[str, float]:
+            Returns count, mean, p50 and p95 of the recent samples.
+        summaries(prefix: str) -> Dict[str, Dict[str, float]]:
+            Returns summaries of all observations starting with the prefix.
+    """
+
+    def __init__(self, max_samples: int = MAX_SAMPLES):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._samples = defaultdict(lambda: deque(maxlen=max_samples))
+        self._observation_counts = defaultdict(int)
+
+    def increment(self, name: str, value: float = 1.0):
+        with self._lock:
+            self._counters[name] += value
+
+    def get(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0.0)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._counters)
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            self._samples[name].append(value)
+            self._observation_counts[name] += 1
+
+    def summary(self, name: str) -> Dict[str, float]:
+        with self._lock:
+            samples = sorted(self._samples.get(name, ()))
+            count = self._observation_counts.get(name, 0)
+
+        if not samples:
+            return {"count": count, "mean": 0.0, "p50": 0.0, "p95": 0.0}
+
+        def percentile(q):
+            return samples[min(len(samples) - 1, round(q / 100 * (len(samples) - 1)))]
+
+        return {
+            "count": count,
+            "mean": sum(samples) / len(samples),
+            "p50": percentile(50),
+            "p95": percentile(95),
+        }
+
+    def summaries(self, prefix: str = "") -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            names = [name for name in self._samples if name.startswith(prefix)]
+        return {name: self.summary(name) for name in sorted(names)}
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,373 @@
+import time
+import random
+import asyncio
+import inspect
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Type
+
+from rag.utils.logger import logger
+from rag.utils.metrics import metrics
+
+DEFAULT_ATTEMPTS = 3
+BASE_DELAY = 0.2
+MAX_DELAY = 2.0
+BACKOFF_MULTIPLIER = 2.0
+# Consecutive failures opening a circuit, and seconds before a trial call is let through
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 30.0
+# Smoothing factor of the call latency moving average
+LATENCY_ALPHA = 0.2
+# HTTP statuses worth retrying: timeouts, rate limits and server errors (Gemini API)
+TRANSIENT_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+# gRPC statuses worth retrying (Milvus)
+TRANSIENT_GRPC_CODES = frozenset({"UNAVAILABLE", "DEADLINE_EXCEEDED", "RESOURCE_EXHAUSTED", "ABORTED"})
+# Transport errors of httpx, requests and pymilvus, matched by class name so the SDKs aren't imported
+TRANSIENT_ERROR_NAMES = frozenset({
+    "TimeoutException", "NetworkError", "RemoteProtocolError", "ConnectionError", "Timeout",
+    "MilvusUnavailableException",
+})
+
+# Absolute deadline (time.monotonic()) of the current request, None if unbounded
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the request's deadline budget is used up."""
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a dependency whose circuit breaker is open."""
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left until the current deadline, None if there is none."""
+    expires_at = _deadline.get()
+    return None if expires_at is None else expires_at - time.monotonic()
+
+
+def check_deadline():
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        metrics.increment("resilience.deadline_exceeded")
+        raise DeadlineExceeded("Request deadline exceeded")
+
+
+def deadline_at(timeout: Optional[float]) -> Optional[float]:
+    """Absolute deadline `timeout` seconds from now, capped by the current deadline."""
+    current = _deadline.get()
+    if timeout is None:
+        return current
+    expires_at = time.monotonic() + timeout
+    return expires_at if current is None else min(current, expires_at)
+
+
+@contextmanager
+def use_deadline(expires_at: Optional[float]):
+    """Run the block with an absolute deadline (see `deadline_at`)."""
+    token = _deadline.set(expires_at)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def deadline(timeout: Optional[float]):
+    """
+    Run the block with a deadline `timeout` seconds from now. Nested deadlines can only shorten it.
+    Works in threads and asyncio tasks, the deadline is a context variable.
+    """
+    with use_deadline(deadline_at(timeout)):
+        yield
+
+
+def iterate_with_deadline(generator: Iterator, expires_at: Optional[float]) -> Iterator:
+    """
+    Iterate a generator with the deadline set while each step runs.
+
+    Generators run in the context of whoever resumes them, e.g. a different thread pool
+    thread per step when streamed by the API server, so the deadline is set around every step.
+    """
+    while True:
+        with use_deadline(expires_at):
+            try:
+                item = next(generator)
+            except StopIteration:
+                return
+        yield item
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    Whether a failed call may succeed when retried: timeouts, connection errors, rate limits and
+    server errors. Client errors (invalid arguments, safety blocks, oversized prompts, schema errors)
+    are not, retrying them only wastes the deadline.
+    """
+    if isinstance(error, (DeadlineExceeded, CircuitOpenError)):
+        return False
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(error).__mro__):
+        return True
+    if getattr(error, "retriable", False) is True:
+        # pymilvus classification of server errors
+        return True
+
+    status_code = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status_code, int):
+        # google.genai APIError, requests and httpx HTTP errors
+        return status_code in TRANSIENT_STATUS_CODES
+
+    code = getattr(error, "code", None)
+    if callable(code):
+        # grpc.RpcError
+        try:
+            return getattr(code(), "name", None) in TRANSIENT_GRPC_CODES
+        except Exception:
+            return False
+    return False
+
+
+def _is_retryable(error: BaseException, retry_on: Optional[Tuple[Type[BaseException], ...]]) -> bool:
+    if isinstance(error, (DeadlineExceeded, CircuitOpenError)):
+        return False
+    return isinstance(error, retry_on) if retry_on is not None else is_transient_error(error)
+
+
+def backoff_delay(attempt: int, base_delay: float = BASE_DELAY, max_delay: float = MAX_DELAY,
+                  multiplier: float = BACKOFF_MULTIPLIER) -> float:
+    """
+    Exponential backoff with full jitter: uniform in [0, min(max_delay, base_delay * multiplier^(attempt - 1))].
+    """
+    return random.uniform(0, min(max_delay, base_delay * multiplier ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of a dependency (e.g. Gemini or Milvus).
+
+    After `failure_threshold` consecutive failures the circuit opens and calls fail immediately
+    with CircuitOpenError instead of waiting for timeouts. After `reset_timeout` seconds one trial
+    call is let through (half open): success closes the circuit, failure opens it again.
+
+    The breaker also keeps a moving average of successful call latencies. The dependency is
+    reported as `degraded` when the circuit isn't closed or calls are slower than `slow_call_seconds`,
+    so callers can skip optional work.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = FAILURE_THRESHOLD, reset_timeout: float = RESET_TIMEOUT,
+                 slow_call_seconds: Optional[float] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.latency = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may be made now."""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self, duration: Optional[float] = None):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit {self.name} closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+            if duration is not None:
+                self.latency = duration if self.latency is None else (
+                    LATENCY_ALPHA * duration + (1 - LATENCY_ALPHA) * self.latency
+                )
+
+    def release_trial(self):
+        """End a half open trial call without a verdict, e.g. when it failed with a client error."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                metrics.increment(f"resilience.{self.name}.opened")
+                logger.warning(f"Circuit {self.name} opened after {self.failures} failures")
+
+    @property
+    def degraded(self) -> bool:
+        if self.state != self.CLOSED:
+            return True
+        return self.slow_call_seconds is not None and self.latency is not None and self.latency > self.slow_call_seconds
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str, **kwargs) -> CircuitBreaker:
+    """
+    Return the process-wide circuit breaker of a dependency, created with `kwargs` on first use.
+    """
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, **kwargs)
+        return _breakers[name]
+
+
+def _before_attempt(breaker: Optional[CircuitBreaker]):
+    check_deadline()
+    if breaker is not None and not breaker.allow():
+        metrics.increment(f"resilience.{breaker.name}.short_circuited")
+        raise CircuitOpenError(f"Circuit {breaker.name} is open")
+
+
+def _retry_delay(name: str, attempt: int, attempts: int, error: Exception, backoff: Dict[str, float]) -> Optional[float]:
+    """Delay before the next attempt, None if the call shouldn't be retried."""
+    if attempt >= attempts:
+        return None
+    delay = backoff_delay(attempt, **backoff)
+    remaining = remaining_time()
+    if remaining is not None and remaining <= delay:
+        # Waiting would use up the budget, fail now so the caller can degrade
+        return None
+    metrics.increment(f"resilience.{name}.retries")
+    logger.warning(f"{name} attempt {attempt}/{attempts} failed: {error}. Retrying in {delay:.2f} s")
+    return delay
+
+
+def call_with_retry(func: Callable, *args, dependency: Optional[str] = None, attempts: int = DEFAULT_ATTEMPTS,
+                    base_delay: float = BASE_DELAY, max_delay: float = MAX_DELAY,
+                    multiplier: float = BACKOFF_MULTIPLIER,
+                    retry_on: Optional[Tuple[Type[BaseException], ...]] = None, **kwargs) -> Any:
+    """
+    Call `func(*args, **kwargs)`, retrying failures with exponential backoff and jitter.
+
+    Only transient errors (see `is_transient_error`), or the exception types of `retry_on` if given,
+    are retried and counted as failures by the circuit breaker. Other errors are raised immediately
+    and don't affect the breaker. Retries stop when the current deadline wouldn't allow another
+    attempt. If `dependency` is given, calls go through its circuit breaker.
+
+    Raises:
+        DeadlineExceeded: The deadline passed before an attempt
+        CircuitOpenError: The dependency's circuit is open
+    """
+    breaker = get_circuit_breaker(dependency) if dependency else None
+    name = dependency or getattr(func, "__qualname__", "call")
+    backoff = dict(base_delay=base_delay, max_delay=max_delay, multiplier=multiplier)
+    for attempt in range(1, attempts + 1):
+        _before_attempt(breaker)
+        start_time = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if not _is_retryable(e, retry_on):
+                # Client errors and errors of nested resilient calls, retrying wouldn't help
+                raise
+            if breaker is not None:
+                breaker.record_failure()
+            delay = _retry_delay(name, attempt, attempts, e, backoff)
+            if delay is None:
+                raise
+            time.sleep(delay)
+            continue
+        finally:
+            if breaker is not None:
+                # A half open trial ended by an error that isn't retried must not block later trials
+                breaker.release_trial()
+        if breaker is not None:
+            breaker.record_success(time.monotonic() - start_time)
+        return result
+
+
+async def async_call_with_retry(func: Callable, *args, dependency: Optional[str] = None,
+                                attempts: int = DEFAULT_ATTEMPTS, base_delay: float = BASE_DELAY,
+                                max_delay: float = MAX_DELAY, multiplier: float = BACKOFF_MULTIPLIER,
+                                retry_on: Optional[Tuple[Type[BaseException], ...]] = None, **kwargs) -> Any:
+    """
+    Async version of `call_with_retry` for coroutine functions. Every attempt is also
+    cancelled when the deadline passes.
+    """
+    breaker = get_circuit_breaker(dependency) if dependency else None
+    name = dependency or getattr(func, "__qualname__", "call")
+    backoff = dict(base_delay=base_delay, max_delay=max_delay, multiplier=multiplier)
+    for attempt in range(1, attempts + 1):
+        _before_attempt(breaker)
+        start_time = time.monotonic()
+        try:
+            result = await asyncio.wait_for(func(*args, **kwargs), remaining_time())
+        except asyncio.TimeoutError as e:
+            if breaker is not None:
+                breaker.record_failure()
+            remaining = remaining_time()
+            if remaining is not None and remaining <= 0:
+                # The attempt was cancelled by the deadline
+                metrics.increment("resilience.deadline_exceeded")
+                raise DeadlineExceeded("Request deadline exceeded") from e
+            delay = _retry_delay(name, attempt, attempts, e, backoff) if _is_retryable(e, retry_on) else None
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+            continue
+        except Exception as e:
+            if not _is_retryable(e, retry_on):
+                raise
+            if breaker is not None:
+                breaker.record_failure()
+            delay = _retry_delay(name, attempt, attempts, e, backoff)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+            continue
+        finally:
+            if breaker is not None:
+                breaker.release_trial()
+        if breaker is not None:
+            breaker.record_success(time.monotonic() - start_time)
+        return result
+
+
+def resilient(dependency: Optional[str] = None, attempts: int = DEFAULT_ATTEMPTS, base_delay: float = BASE_DELAY,
+              max_delay: float = MAX_DELAY, multiplier: float = BACKOFF_MULTIPLIER,
+              retry_on: Optional[Tuple[Type[BaseException], ...]] = None):
+    """
+    Decorator applying `call_with_retry` (or `async_call_with_retry` to coroutine functions).
+    """
+    def decorator(func):
+        options = dict(dependency=dependency, attempts=attempts, base_delay=base_delay,
+                       max_delay=max_delay, multiplier=multiplier, retry_on=retry_on)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await async_call_with_retry(func, *args, **options, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return call_with_retry(func, *args, **options, **kwargs)
+        return wrapper
+
+    return decorator
@@ -0,0 +1,50 @@
+import os
+import json
+import logging
+from datetime import datetime
+from typing import Any
+
+from langchain_core.documents import Document
+
+from rag.utils.logger import attach_queue_listener, create_rotating_file_handler, per_process_path
+
+# Opt-in: large payloads (prompts, retrieved chunks, answers) are only captured if a path is set
+# Like log files, each API server worker writes its own file (e.g. traces.<pid>.jsonl) if LOG_FILE_PER_PROCESS is set
+TRACE_STORE_PATH = os.environ.get("CHATAGH_TRACE_STORE")
+if TRACE_STORE_PATH:
+    TRACE_STORE_PATH = per_process_path(TRACE_STORE_PATH)
+
+_trace_logger = logging.getLogger("ChatAGHTraceStore")
+_trace_logger.setLevel(logging.INFO)
+_trace_logger.propagate = False
+
+if TRACE_STORE_PATH:
+    _trace_handler = create_rotating_file_handler(TRACE_STORE_PATH)
+    _trace_handler.setFormatter(logging.Formatter("%(message)s"))
+    attach_queue_listener(_trace_logger, _trace_handler)
+
+
+def _to_serializable(value: Any):
+    if isinstance(value, Document):
+        return {"text": value.page_content, "metadata": value.metadata}
+    return str(value)
+
+
+def is_enabled() -> bool:
+    return bool(TRACE_STORE_PATH)
+
+
+def capture(event: str, **payload):
+    """
+    Write a large payload as one JSON line to the trace store, without blocking the caller.
+    Does nothing unless the CHATAGH_TRACE_STORE environment variable points to a JSONL file.
+
+    Args:
+        event: Event name, e.g. "retrieval" or "prompt"
+        **payload: JSON-serializable payload, LangChain Documents are serialized with their metadata
+    """
+    if not TRACE_STORE_PATH:
+        return
+
+    record = {"timestamp": datetime.now().isoformat(), "event": event, **payload}
+    _trace_logger.info(json.dumps(record, default=_to_serializable, ensure_ascii=False))
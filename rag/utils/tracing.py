@@ -0,0 +1,206 @@
+import os
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Iterator
+
+from rag.utils.logger import logger
+from rag.utils.metrics import metrics
+
+SERVICE_NAME = "chatagh"
+NUMERIC_ATTRIBUTES = ("chunks", "prompt_tokens", "output_tokens", "time_to_first_token")
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 2048, 4096, 8192, 16384, 32768)
+
+try:
+    from prometheus_client import Counter, Histogram
+
+    STAGE_DURATION = Histogram(
+        "chatagh_stage_duration_seconds", "Duration of inference pipeline stages", ["stage"],
+        buckets=DURATION_BUCKETS
+    )
+    STAGE_TOKENS = Histogram(
+        "chatagh_stage_tokens", "Token counts of inference pipeline stages", ["stage", "kind"],
+        buckets=TOKEN_BUCKETS
+    )
+    STAGE_CACHE_HITS = Counter("chatagh_stage_cache_hits", "Cache hits of inference pipeline stages", ["stage"])
+except ImportError:
+    STAGE_DURATION = STAGE_TOKENS = STAGE_CACHE_HITS = None
+
+_tracer = None
+_tracer_lock = threading.Lock()
+_tracer_configured = False
+
+
+def get_tracer():
+    """
+    Return the OpenTelemetry tracer, or None if opentelemetry is not installed.
+
+    If the OpenTelemetry SDK and OTLP exporter are installed and OTEL_EXPORTER_OTLP_ENDPOINT
+    is set, spans are exported in batches to that endpoint. Otherwise the globally configured
+    tracer provider is used (a no-op one, unless configured by the host application).
+    """
+    global _tracer, _tracer_configured
+    with _tracer_lock:
+        if _tracer_configured:
+            return _tracer
+        _tracer_configured = True
+
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            return None
+
+        if os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT"):
+            try:
+                from opentelemetry.sdk.resources import Resource
+                from opentelemetry.sdk.trace import TracerProvider
+                from opentelemetry.sdk.trace.export import BatchSpanProcessor
+                from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+                provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+                provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+                trace.set_tracer_provider(provider)
+            except ImportError as e:
+                logger.warning(f"OTLP trace export disabled, missing dependency: {e}")
+
+        _tracer = trace.get_tracer(SERVICE_NAME)
+        return _tracer
+
+
+class Span:
+    """
+    A pipeline stage span recording its duration and attributes such as token counts,
+    chunk counts and cache hits.
+
+    Attributes:
+        name (str): Stage name, e.g. "augmentation" or "milvus_search".
+        attributes (Dict[str, Any]): Span attributes.
+        duration (float): Span duration in seconds, set when the span ends.
+    """
+
+    def __init__(self, name: str, attributes: Dict[str, Any], otel_span=None):
+        self.name = name
+        self.attributes = dict(attributes)
+        self.start_time = time.perf_counter()
+        self.duration = None
+        self._otel_span = otel_span
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start_time
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+
+def _record(span: Span):
+    metrics.observe(f"stage.{span.name}.seconds", span.duration)
+    if STAGE_DURATION is not None:
+        STAGE_DURATION.labels(stage=span.name).observe(span.duration)
+
+    for key in NUMERIC_ATTRIBUTES:
+        value = span.attributes.get(key)
+        if isinstance(value, (int, float)):
+            metrics.observe(f"stage.{span.name}.{key}", value)
+            if STAGE_TOKENS is not None and key.endswith("tokens"):
+                STAGE_TOKENS.labels(stage=span.name, kind=key).observe(value)
+
+    if span.attributes.get("cache_hit"):
+        metrics.increment(f"stage.{span.name}.cache_hits")
+        if STAGE_CACHE_HITS is not None:
+            STAGE_CACHE_HITS.labels(stage=span.name).inc()
+
+    if span._otel_span is not None:
+        for key, value in span.attributes.items():
+            if isinstance(value, (str, bool, int, float)):
+                span._otel_span.set_attribute(f"{SERVICE_NAME}.{key}", value)
+
+
+@contextmanager
+def trace_span(name: str, **attributes):
+    """
+    Trace a pipeline stage.
+
+    The span is recorded as an OpenTelemetry span (nested spans form a trace), as Prometheus
+    histograms and in the in-process `metrics` registry used by the Streamlit dashboard.
+
+    Args:
+        name: Stage name
+        **attributes: Initial span attributes
+
+    Yields:
+        Span, whose attributes can be updated while the stage runs
+    """
+    tracer = get_tracer()
+    otel_context = tracer.start_as_current_span(name) if tracer is not None else nullcontext()
+
+    with otel_context as otel_span:
+        span = Span(name, attributes, otel_span)
+        try:
+            yield span
+        except Exception as e:
+            span.set_attribute("error", type(e).__name__)
+            raise
+        finally:
+            span.duration = span.elapsed()
+            _record(span)
+
+
+@contextmanager
+def generator_span(name: str, **attributes):
+    """
+    Trace a pipeline stage spanning the yields of a generator.
+
+    Unlike `trace_span`, the OpenTelemetry span is not made current: a generator can be resumed
+    in a different context at every step (e.g. a thread pool thread per step when streamed by
+    the API server), where a span attached by an earlier step can't be detached. Iterate
+    the stage's work with `iterate_in_span` so spans started by each step are its children.
+
+    Args:
+        name: Stage name
+        **attributes: Initial span attributes
+
+    Yields:
+        Span, whose attributes can be updated while the stage runs
+    """
+    tracer = get_tracer()
+    otel_span = tracer.start_span(name) if tracer is not None else None
+    span = Span(name, attributes, otel_span)
+    try:
+        yield span
+    except Exception as e:
+        span.set_attribute("error", type(e).__name__)
+        if otel_span is not None:
+            otel_span.record_exception(e)
+        raise
+    finally:
+        span.duration = span.elapsed()
+        _record(span)
+        if otel_span is not None:
+            otel_span.end()
+
+
+def iterate_in_span(generator: Iterator, span: Span) -> Iterator:
+    """
+    Iterate a generator with the span of a `generator_span` current while each step runs.
+    """
+    if span._otel_span is None:
+        yield from generator
+        return
+
+    from opentelemetry import trace
+
+    try:
+        while True:
+            with trace.use_span(span._otel_span, end_on_exit=False):
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    return
+            yield item
+    finally:
+        generator.close()
@@ -1,11 +1,10 @@
 import os
 import json
 
-import time
-import functools
-
 from dotenv import load_dotenv
 from langchain_core.documents import Document
+from rag.corpus.corpus_store import CorpusReader, is_corpus_store
+from rag.utils.resilience import resilient
 
 
 def load_json_data(path: str):
@@ -18,7 +17,7 @@ def load_json_data(path: str):
             i += 1
             document = Document(
                 page_content=file_data["content"],
-                metadata=file_data["metadata"]
+                metadata={**file_data["metadata"], "doc_id": os.path.splitext(file)[0]}
             )
             documents.append(document)
         except Exception as e:
@@ -26,6 +25,17 @@ def load_json_data(path: str):
 
     return documents
 
+
+def load_documents(path: str):
+    """
+    Load documents from a compact corpus store (see rag.corpus.corpus_store)
+    or from a directory of per-page JSON files.
+    """
+    if is_corpus_store(path):
+        with CorpusReader(path) as reader:
+            return reader.to_documents()
+    return load_json_data(path)
+
 def load_env():
     env_path = os.path.join(os.getcwd(), 'config', '.env')
     if os.path.exists(env_path):
@@ -34,25 +44,20 @@ def load_env():
         load_dotenv()
 
 
-def retry_on_exception(attempts=3, delay=1, backoff=10, exception=Exception):
+def retry_on_exception(attempts=3, delay=0.2, backoff=2, exception=None, max_delay=2.0, dependency=None):
     """
-    A decorator to retry a function call if it raises a specified exception.
+    A decorator to retry a function call if it raises a specified exception, by default
+    only transient errors (see rag.utils.resilience.is_transient_error).
+
+    Delays grow exponentially from `delay` by `backoff` up to `max_delay`, with full jitter, and
+    retries stop early when the request deadline (see rag.utils.resilience) doesn't leave time
+    for another attempt. Works for sync and async functions.
     """
-    def decorator(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            current_delay = delay
-            for attempt in range(1, attempts + 1):
-                try:
-                    return func(*args, **kwargs)
-                except exception as e:
-                    if attempt == attempts:
-                        raise
-                    else:
-                        print(f"Attempt {attempt} failed: {e}. Retrying in {current_delay} seconds...")
-                        time.sleep(current_delay)
-                        current_delay *= backoff
-
-        return wrapper
-
-    return decorator
+    return resilient(
+        dependency=dependency,
+        attempts=attempts,
+        base_delay=delay,
+        max_delay=max_delay,
+        multiplier=backoff,
+        retry_on=exception if exception is None or isinstance(exception, tuple) else (exception,),
+    )
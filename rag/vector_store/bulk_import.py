@@ -0,0 +1,313 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import json
+import time
+import argparse
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+from pymilvus import Collection, DataType, connections, utility
+from pymilvus.bulk_writer import BulkFileType, LocalBulkWriter, RemoteBulkWriter
+
+from rag.chunkers.chunk_ids import chunk_id
+from rag.utils.logger import logger
+
+# MinIO of milvus/docker-compose.yml, bulk import files must be in the bucket Milvus reads from
+MINIO_ENDPOINT = os.environ.get("MINIO_ENDPOINT", "localhost:9000")
+MINIO_ACCESS_KEY = os.environ.get("MINIO_ACCESS_KEY", "minioadmin")
+MINIO_SECRET_KEY = os.environ.get("MINIO_SECRET_KEY", "minioadmin")
+MINIO_BUCKET = os.environ.get("MINIO_BUCKET", "a-bucket")
+BULK_REMOTE_PATH = "bulk"
+# Chunks embedded at once while writing the files
+EMBEDDING_BATCH_SIZE = 256
+# Target size of a Parquet file in bytes, larger files import faster
+FILE_CHUNK_SIZE = 512 * 1024 * 1024
+IMPORT_POLL_INTERVAL = 2.0
+MANIFEST_FILE = "manifest.json"
+
+
+def minio_connect_param() -> RemoteBulkWriter.S3ConnectParam:
+    return RemoteBulkWriter.S3ConnectParam(
+        endpoint=MINIO_ENDPOINT,
+        access_key=MINIO_ACCESS_KEY,
+        secret_key=MINIO_SECRET_KEY,
+        bucket_name=MINIO_BUCKET,
+        secure=False,
+    )
+
+
+class MilvusBulkLoader:
+    """
+    Columnar bulk import and export of a MilvusHybridSearch collection.
+
+    Instead of inserting rows as Python dicts over gRPC, chunks are embedded offline and written
+    with their text, metadata and dense vectors into Parquet files, which Milvus imports directly
+    from its object storage (MinIO). BM25 sparse vectors are computed by Milvus during the import.
+
+    Files are written to MinIO (`remote=True`, ready to import) or to a local directory, e.g. for
+    backups, which `import_files` uploads first. Local writes store a manifest.json with the file
+    batches (paths relative to the directory), so a directory of exported files can be restored into a new collection version
+    (see rag.vector_store.collection_versions).
+    """
+
+    def __init__(self, collection_name: str, path: str, remote: bool = True, connect_param: Any = None,
+                 uri: str = "http://localhost:19530"):
+        """
+        Args:
+            collection_name: Existing collection whose schema the files follow
+            path: Path of the files, in the MinIO bucket if `remote`, otherwise a local directory
+            remote: Whether files are written to MinIO
+            connect_param: S3 connection of the remote writer (default: MinIO of milvus/docker-compose.yml)
+            uri: Milvus server URI
+        """
+        # Collection and utility use the default ORM connection
+        connections.connect("default", uri=uri)
+        self.collection_name = collection_name
+        self.path = path
+        self.remote = remote
+        self.connect_param = connect_param or minio_connect_param()
+        self.schema = Collection(collection_name).schema
+        dense_field = next(field for field in self.schema.fields if field.name == "dense")
+        self.dense_dtype = dense_field.dtype
+
+    def _writer(self):
+        if self.remote:
+            return RemoteBulkWriter(
+                schema=self.schema,
+                remote_path=self.path,
+                connect_param=self.connect_param,
+                chunk_size=FILE_CHUNK_SIZE,
+                file_type=BulkFileType.PARQUET,
+            )
+        os.makedirs(self.path, exist_ok=True)
+        return LocalBulkWriter(
+            schema=self.schema,
+            local_path=self.path,
+            chunk_size=FILE_CHUNK_SIZE,
+            file_type=BulkFileType.PARQUET,
+        )
+
+    def _dense(self, vector) -> np.ndarray:
+        if self.dense_dtype == DataType.FLOAT16_VECTOR:
+            if isinstance(vector, (bytes, bytearray)):
+                return np.frombuffer(vector, dtype=np.float16)
+            return np.asarray(vector, dtype=np.float16)
+        return np.asarray(vector, dtype=np.float32)
+
+    def _write_rows(self, rows: Iterable[Dict[str, Any]]) -> List[List[str]]:
+        writer = self._writer()
+        count = 0
+        for row in rows:
+            writer.append_row(row)
+            count += 1
+        writer.commit()
+
+        batch_files = writer.batch_files
+        if self.remote:
+            logger.info(f"Wrote {count} rows to {len(batch_files)} file batches in {MINIO_BUCKET}/{self.path}")
+        else:
+            # Paths relative to the directory, so it can be moved or copied to another machine
+            manifest = {
+                "collection_name": self.collection_name,
+                "rows": count,
+                "batch_files": [[os.path.relpath(file, self.path) for file in files] for files in batch_files],
+            }
+            with open(os.path.join(self.path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+            logger.info(f"Wrote {count} rows to {len(batch_files)} file batches in {self.path}")
+        return batch_files
+
+    def write_documents(self, documents: List[Document], embedding_model: Any,
+                        batch_size: int = EMBEDDING_BATCH_SIZE) -> List[List[str]]:
+        """
+        Embed chunks and write them to bulk import files.
+
+        Args:
+            documents: Chunks to write, ids are taken from `metadata["chunk_id"]` or computed
+            embedding_model: SentenceTransformer used for the dense vectors
+            batch_size: Number of chunks embedded at once
+
+        Returns:
+            File batches, each is imported as one import task
+        """
+        def rows():
+            for i in range(0, len(documents), batch_size):
+                batch = documents[i:i + batch_size]
+                embeddings = embedding_model.encode([doc.page_content for doc in batch])
+                for doc, embedding in zip(batch, embeddings):
+                    yield {
+                        "id": doc.metadata.get("chunk_id") or chunk_id(doc),
+                        "text": doc.page_content,
+                        "metadata": doc.metadata,
+                        "dense": self._dense(embedding),
+                    }
+                logger.info(f"Embedded {min(i + batch_size, len(documents))}/{len(documents)} chunks")
+
+        return self._write_rows(rows())
+
+    def export_collection(self, source_collection: Optional[str] = None, batch_size: int = 1000) -> List[List[str]]:
+        """
+        Export a collection (text, metadata and dense vectors) to bulk import files, for backups
+        and for restoring it without re-embedding.
+
+        Args:
+            source_collection: Collection or alias to export (default: the loader's collection)
+            batch_size: Number of rows fetched at once
+
+        Returns:
+            File batches
+        """
+        collection = Collection(source_collection or self.collection_name)
+        iterator = collection.query_iterator(batch_size=batch_size, output_fields=["id", "text", "metadata", "dense"])
+
+        def rows():
+            try:
+                while True:
+                    results = iterator.next()
+                    if not results:
+                        break
+                    for result in results:
+                        yield {
+                            "id": result["id"],
+                            "text": result["text"],
+                            "metadata": result["metadata"],
+                            "dense": self._dense(result["dense"]),
+                        }
+            finally:
+                iterator.close()
+
+        return self._write_rows(rows())
+
+    def upload(self, batch_files: List[List[str]]) -> List[List[str]]:
+        """
+        Upload local files to the MinIO bucket of Milvus.
+
+        Returns:
+            File batches with their object paths
+        """
+        from minio import Minio
+
+        client = Minio(MINIO_ENDPOINT, access_key=MINIO_ACCESS_KEY, secret_key=MINIO_SECRET_KEY, secure=False)
+        if not client.bucket_exists(MINIO_BUCKET):
+            client.make_bucket(MINIO_BUCKET)
+
+        remote_batches = []
+        for files in batch_files:
+            remote_files = []
+            for file in files:
+                object_name = f"{BULK_REMOTE_PATH}/{os.path.relpath(file, os.path.dirname(self.path))}"
+                client.fput_object(MINIO_BUCKET, object_name, file)
+                remote_files.append(object_name)
+            remote_batches.append(remote_files)
+        return remote_batches
+
+    def import_files(self, batch_files: List[List[str]], timeout: float = 3600) -> int:
+        """
+        Bulk import file batches into the collection and wait until all imports finish.
+
+        Args:
+            batch_files: File batches written by this loader (local files are uploaded first)
+            timeout: Maximum seconds to wait for the imports
+
+        Raises:
+            RuntimeError: If an import fails or doesn't finish in time
+
+        Returns:
+            Number of imported rows
+        """
+        if not self.remote:
+            batch_files = self.upload(batch_files)
+
+        task_ids = [utility.do_bulk_insert(self.collection_name, files) for files in batch_files]
+        deadline = time.monotonic() + timeout
+        rows = 0
+        for task_id in task_ids:
+            while True:
+                state = utility.get_bulk_insert_state(task_id)
+                if state.state == state.ImportCompleted:
+                    rows += state.row_count
+                    break
+                if state.state in (state.ImportFailed, state.ImportFailedAndCleaned):
+                    raise RuntimeError(f"Bulk import {task_id} into {self.collection_name} failed: {state.failed_reason}")
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"Bulk import {task_id} into {self.collection_name} timed out")
+                time.sleep(IMPORT_POLL_INTERVAL)
+
+        logger.info(f"Bulk imported {rows} rows into {self.collection_name}")
+        return rows
+
+
+def bulk_build(data_path: str, collection_name: str, chunker: Any = None, num_workers: int = 1) -> int:
+    """
+    Chunk and embed documents offline, then bulk import them into a collection, e.g. a new
+    collection version (see rag.reindex).
+
+    Args:
+        data_path: Path to the corpus store or the directory of JSON files
+        collection_name: Collection to import into, created if it doesn't exist
+        chunker: Chunker to use, defaults to TokenAwareChunker with 512 tokens
+        num_workers: Number of chunking processes
+
+    Returns:
+        Number of imported rows
+    """
+    from rag.utils.utils import load_documents
+    from rag.chunkers.parallel_chunker import ParallelChunker
+    from rag.chunkers.token_aware_chunker import TokenAwareChunker
+    from rag.vector_store.milvus_hybrid_search import MilvusHybridSearch
+
+    # Creates the collection with its schema and indexes
+    vector_store = MilvusHybridSearch(collection_name)
+    chunker = chunker or TokenAwareChunker("intfloat/multilingual-e5-large", max_tokens=512, remove_duplicates=True)
+    if num_workers > 1:
+        chunker = ParallelChunker(chunker, num_workers=num_workers)
+    chunks = chunker.chunk(load_documents(data_path))
+
+    loader = MilvusBulkLoader(collection_name, f"{BULK_REMOTE_PATH}/{collection_name}")
+    return loader.import_files(loader.write_documents(chunks, vector_store.dense_embedding_model))
+
+
+def load_manifest(path: str) -> Dict[str, Any]:
+    """
+    Load the manifest of a directory of locally written files, with file paths resolved against the directory.
+    """
+    with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as f:
+        manifest = json.load(f)
+    manifest["batch_files"] = [[os.path.join(path, file) for file in files] for files in manifest["batch_files"]]
+    return manifest
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from rag.vector_store.milvus_hybrid_search import MilvusHybridSearch
+
+    parser = argparse.ArgumentParser(description="Milvus bulk import, export and restore")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Chunk and embed documents, then bulk import them")
+    build.add_argument("--data", default="./data", help="Corpus store or directory of JSON files")
+    build.add_argument("--collection", required=True, help="Collection to import into, created if missing")
+
+    export = subparsers.add_parser("export", help="Export a collection to local Parquet files")
+    export.add_argument("--collection", required=True, help="Collection or alias to export")
+    export.add_argument("--output", required=True, help="Local directory of the files")
+
+    restore = subparsers.add_parser("restore", help="Import exported files into a collection")
+    restore.add_argument("--input", required=True, help="Directory of exported files")
+    restore.add_argument("--collection", required=True, help="Collection to import into, created if missing")
+    args = parser.parse_args()
+
+    load_dotenv(dotenv_path=".env")
+
+    if args.command == "build":
+        bulk_build(args.data, args.collection, num_workers=os.cpu_count())
+    elif args.command == "export":
+        MilvusBulkLoader(args.collection, args.output, remote=False).export_collection()
+    else:
+        # Creates the collection with the same schema and indexes
+        MilvusHybridSearch(args.collection)
+        loader = MilvusBulkLoader(args.collection, args.input, remote=False)
+        loader.import_files(load_manifest(args.input)["batch_files"])
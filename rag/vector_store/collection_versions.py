@@ -0,0 +1,199 @@
+import re
+import time
+from typing import Callable, Dict, List, Optional
+
+from pymilvus import MilvusClient
+
+from rag.evaluation.retrieval_metrics import unique_ranking, recall_at_k
+from rag.utils.logger import logger
+
+VERSION_PATTERN = r"_v(\d{14}|0)$"
+# Versions kept besides the live one, for rollbacks
+KEEP_VERSIONS = 2
+# A new version must have at least this fraction of the live version's rows
+MIN_ROW_RATIO = 0.9
+# Mean recall@k of the golden queries may drop by at most this much against the live version
+MAX_RECALL_DROP = 0.05
+VALIDATION_K = 10
+
+
+def version_name(alias: str, timestamp: Optional[float] = None) -> str:
+    """
+    Name of a new collection version, e.g. 'chatagh_v20250316170531'.
+    """
+    return f"{alias}_v{time.strftime('%Y%m%d%H%M%S', time.gmtime(timestamp))}"
+
+
+class CollectionVersions:
+    """
+    Blue/green versions of a collection served under an alias.
+
+    Queries always use the alias (e.g. 'chatagh'). A rebuild writes into a new collection
+    '<alias>_v<timestamp>' which isn't queried until it passes `validate`, then `promote` switches
+    the alias to it atomically, so queries never see a half-built or duplicated collection.
+    Previous versions are kept for `rollback` and dropped by `garbage_collect`.
+
+    A collection created before versioning, named like the alias itself, is renamed to '<alias>_v0'
+    by the first `promote`, which then creates the alias directly on the promoted version. Milvus
+    aliases can't share a name with a collection, so queries of the alias fail for the moment
+    between the rename and the alias creation; the new version is loaded before, to keep it short.
+    """
+
+    def __init__(self, alias: str, uri: str = "http://localhost:19530"):
+        """
+        Args:
+            alias: Alias queried by inference, e.g. 'chatagh'
+            uri: Milvus server URI
+        """
+        self.alias = alias
+        self.client = MilvusClient(uri=uri)
+        self.version_pattern = re.compile(re.escape(alias) + VERSION_PATTERN)
+
+    def versions(self) -> List[str]:
+        """All versions of the collection, oldest first."""
+        return sorted(
+            (name for name in self.client.list_collections() if self.version_pattern.fullmatch(name)),
+            key=lambda name: int(self.version_pattern.fullmatch(name).group(1))
+        )
+
+    def current(self) -> Optional[str]:
+        """Version the alias points to, or None."""
+        try:
+            return self.client.describe_alias(self.alias).get("collection_name")
+        except Exception:
+            return None
+
+    def new_version(self) -> str:
+        """Name for a new version, to be built with e.g. `indexing(data_path, name)`."""
+        return version_name(self.alias)
+
+    def row_count(self, collection_name: str) -> int:
+        self.client.flush(collection_name)
+        return int(self.client.get_collection_stats(collection_name).get("row_count", 0))
+
+    def validate(self, version: str, search_factory: Callable, queries: List[dict],
+                 k: int = VALIDATION_K, min_row_ratio: float = MIN_ROW_RATIO,
+                 max_recall_drop: float = MAX_RECALL_DROP) -> Dict:
+        """
+        Check a new version before it is promoted.
+
+        Checks:
+            - the version is loaded and has at least `min_row_ratio` of the live version's rows
+            - every smoke query returns results
+            - mean recall@k of the queries' relevant URLs drops by at most `max_recall_drop`
+              against the live version
+
+        Args:
+            version: Collection to validate
+            search_factory: Callable returning a search backend (e.g. MilvusHybridSearch) of a collection name
+            queries: Smoke queries, dicts with 'query' and optionally 'relevant_urls' (see rag.evaluation.query_sets)
+            k: Number of retrieved chunks per query
+            min_row_ratio: Minimum row count relative to the live version
+            max_recall_drop: Maximum drop of mean recall@k relative to the live version
+
+        Returns:
+            dict: Report with 'passed', 'errors' and the measured values
+        """
+        errors = []
+        # Live collection, possibly not yet versioned
+        current = self.current() or (self.alias if self.client.has_collection(self.alias) else None)
+        report = {"version": version, "current": current, "rows": self.row_count(version)}
+
+        load_state = str(self.client.get_load_state(version).get("state", ""))
+        if "Loaded" not in load_state:
+            errors.append(f"{version} is not loaded ({load_state})")
+        if report["rows"] == 0:
+            errors.append(f"{version} is empty")
+
+        if current:
+            report["current_rows"] = self.row_count(current)
+            if report["rows"] < min_row_ratio * report["current_rows"]:
+                errors.append(f"{version} has {report['rows']} rows, live version {report['current_rows']}")
+
+        def mean_recall(search, check_results: bool) -> float:
+            recalls = []
+            for query in queries:
+                chunks = search.search(query["query"], k=k)
+                if check_results and not chunks:
+                    errors.append(f"No results in {version} for '{query['query']}'")
+                if query.get("relevant_urls"):
+                    ranking = unique_ranking(chunk.metadata.get("url", "") for chunk in chunks)
+                    recalls.append(recall_at_k(ranking, set(query["relevant_urls"]), k))
+            return sum(recalls) / len(recalls) if recalls else 0.0
+
+        report["recall"] = mean_recall(search_factory(version), check_results=True)
+        if current:
+            report["current_recall"] = mean_recall(search_factory(current), check_results=False)
+            if report["recall"] < report["current_recall"] - max_recall_drop:
+                errors.append(f"Recall@{k} dropped from {report['current_recall']:.3f} to {report['recall']:.3f}")
+
+        report["errors"] = errors
+        report["passed"] = not errors
+        logger.info(f"Validation of {version}: {'passed' if report['passed'] else 'failed'} {report}")
+        return report
+
+    def _adopt_unversioned(self) -> Optional[str]:
+        """
+        Rename a collection named like the alias to '<alias>_v0', so the alias can take its name.
+
+        Returns:
+            The new name of the collection, or None if there is no unversioned collection
+        """
+        if self.current() is not None or not self.client.has_collection(self.alias):
+            return None
+        legacy = f"{self.alias}_v0"
+        logger.warning(f"Renaming unversioned collection {self.alias} to {legacy}")
+        self.client.rename_collection(self.alias, legacy)
+        return legacy
+
+    def promote(self, version: str):
+        """
+        Atomically switch the alias to a version, new queries are served by it immediately.
+
+        Returns:
+            The previously served version, or None
+        """
+        self.client.load_collection(version)
+        previous = self.current()
+        if previous is None:
+            # The alias is created right after the rename, on the promoted version
+            previous = self._adopt_unversioned()
+            self.client.create_alias(version, self.alias)
+        else:
+            self.client.alter_alias(version, self.alias)
+        logger.info(f"Alias {self.alias} switched from {previous} to {version}")
+        return previous
+
+    def rollback(self) -> Optional[str]:
+        """
+        Switch the alias back to the version preceding the live one.
+
+        Returns:
+            The version now served, or None if there is no older version
+        """
+        versions = self.versions()
+        current = self.current()
+        older = versions[:versions.index(current)] if current in versions else []
+        if not older:
+            return None
+        self.promote(older[-1])
+        return older[-1]
+
+    def garbage_collect(self, keep: int = KEEP_VERSIONS) -> List[str]:
+        """
+        Drop old versions, keeping the live one, the `keep` newest older ones and any newer
+        (e.g. still building) ones.
+
+        Returns:
+            Dropped versions
+        """
+        versions = self.versions()
+        current = self.current()
+        if current not in versions:
+            return []
+        older = versions[:versions.index(current)]
+        dropped = older[:max(0, len(older) - keep)]
+        for version in dropped:
+            self.client.drop_collection(version)
+            logger.info(f"Dropped collection version {version}")
+        return dropped
@@ -0,0 +1,151 @@
+import hashlib
+from typing import Dict, List
+
+from langchain_core.documents import Document
+from pymilvus import MilvusClient, DataType
+
+from rag.chunkers.chunk_ids import MAX_CHUNK_ID, chunk_id
+from rag.embeddings.query_embedding_service import get_sentence_transformer, get_query_embedding_service
+from rag.utils.resilience import call_with_retry
+from rag.utils.tracing import trace_span
+from rag.vector_store.milvus_hybrid_search import DENSE_MODEL_NAME, MILVUS_DEPENDENCY
+
+MAX_QUESTION_LENGTH = 1000
+MAX_ANSWER_LENGTH = 10000
+MAX_TEXT_LENGTH = 5000
+
+
+def question_id(question: str, chunk: Document) -> int:
+    """
+    Deterministic id of a generated question of a chunk, so rebuilding the index upserts.
+    """
+    key = f"{chunk.metadata.get('chunk_id') or chunk_id(chunk)}\x00{question.strip().lower()}"
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") & MAX_CHUNK_ID
+
+
+class MilvusFAQIndex:
+    """
+    Index of questions generated offline for corpus chunks (doc2query), see rag.build_faq_index.
+
+    Each row holds a question embedding, a pointer to the chunk answering it (`metadata["chunk_id"]`,
+    the chunk's id in the main collection) with the chunk text and metadata, and optionally
+    a precomputed answer grounded in that chunk. Rows are self-contained, so a lookup is
+    a single dense vector search with no further round trips.
+
+    Methods:
+        add(entries: List[Dict]) -> int:
+            Embeds and upserts questions, dicts with 'question', 'document' and optional 'answer'.
+        lookup(query: str, k: int) -> List[Dict]:
+            Returns the k most similar questions with 'question', 'answer', 'score' and 'document'.
+        exists(collection_name: str, uri: str) -> bool:
+            Whether the index has been built.
+    """
+
+    def __init__(self, collection_name: str, uri: str = "http://localhost:19530"):
+        """
+        Args:
+            collection_name: Name of the Milvus collection, created if it doesn't exist
+            uri: Milvus server URI
+        """
+        self.collection_name = collection_name
+        self.client = MilvusClient(uri=uri)
+        self.dense_embedding_model = get_sentence_transformer(DENSE_MODEL_NAME)
+        self.query_embedding_service = get_query_embedding_service(DENSE_MODEL_NAME)
+
+        if not self.client.has_collection(collection_name):
+            self._create_collection()
+
+    @staticmethod
+    def exists(collection_name: str, uri: str = "http://localhost:19530") -> bool:
+        return MilvusClient(uri=uri).has_collection(collection_name)
+
+    def _create_collection(self):
+        schema = MilvusClient.create_schema(auto_id=False, enable_dynamic_field=True)
+        schema.add_field(field_name="id", datatype=DataType.INT64, is_primary=True, auto_id=False)
+        schema.add_field(field_name="question", datatype=DataType.VARCHAR, max_length=MAX_QUESTION_LENGTH)
+        schema.add_field(field_name="answer", datatype=DataType.VARCHAR, max_length=MAX_ANSWER_LENGTH)
+        schema.add_field(field_name="text", datatype=DataType.VARCHAR, max_length=MAX_TEXT_LENGTH)
+        schema.add_field(field_name="metadata", datatype=DataType.JSON)
+        schema.add_field(
+            field_name="dense",
+            datatype=DataType.FLOAT_VECTOR,
+            dim=self.dense_embedding_model.get_sentence_embedding_dimension()
+        )
+
+        index_params = self.client.prepare_index_params()
+        index_params.add_index(
+            field_name="dense",
+            index_name="dense_index",
+            index_type="IVF_FLAT",
+            metric_type="IP",
+            params={"nlist": 128},
+        )
+
+        self.client.create_collection(
+            collection_name=self.collection_name,
+            schema=schema,
+            index_params=index_params
+        )
+
+    def add(self, entries: List[Dict], batch_size: int = 100) -> int:
+        """
+        Embed and upsert generated questions.
+
+        Args:
+            entries: Dicts with 'question', 'document' (the chunk answering it) and optional 'answer'
+            batch_size: Number of questions embedded and upserted at once
+
+        Returns:
+            Number of upserted questions
+        """
+        for i in range(0, len(entries), batch_size):
+            batch = entries[i:i + batch_size]
+            embeddings = self.dense_embedding_model.encode([entry["question"] for entry in batch])
+            rows = []
+            for entry, embedding in zip(batch, embeddings):
+                document = entry["document"]
+                rows.append({
+                    "id": question_id(entry["question"], document),
+                    "question": entry["question"][:MAX_QUESTION_LENGTH],
+                    "answer": (entry.get("answer") or "")[:MAX_ANSWER_LENGTH],
+                    "text": document.page_content[:MAX_TEXT_LENGTH],
+                    "metadata": {**document.metadata, "chunk_id": document.metadata.get("chunk_id") or chunk_id(document)},
+                    "dense": embedding.tolist(),
+                })
+            self.client.upsert(collection_name=self.collection_name, data=rows)
+        return len(entries)
+
+    def lookup(self, query: str, k: int = 3) -> List[Dict]:
+        """
+        Find the generated questions most similar to a query.
+
+        Returns:
+            Matches, best first, with 'question', 'answer' (empty if not precomputed),
+            'score' (inner product, the cosine similarity for e5 which normalizes its embeddings)
+            and 'document' (the answering chunk)
+        """
+        with trace_span("embedding"):
+            query_embedding = self.query_embedding_service.embed(query)
+
+        with trace_span("faq_search", k=k):
+            results = call_with_retry(
+                self.client.search,
+                dependency=MILVUS_DEPENDENCY,
+                collection_name=self.collection_name,
+                data=[query_embedding.tolist()],
+                anns_field="dense",
+                search_params={"metric_type": "IP", "params": {"nprobe": 10}},
+                limit=k,
+                output_fields=["question", "answer", "text", "metadata"]
+            )[0]
+
+        return [
+            {
+                "question": r["entity"]["question"],
+                "answer": r["entity"]["answer"],
+                "score": r["distance"],
+                "document": Document(page_content=r["entity"]["text"], metadata=r["entity"]["metadata"]),
+            }
+            for r in results
+        ]
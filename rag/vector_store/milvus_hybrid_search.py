@@ -1,7 +1,13 @@
-from typing import List
+import json
+from typing import List, Dict, Tuple
 
+import numpy as np
 from langchain_core.documents import Document
-from sentence_transformers import SentenceTransformer
+from rag.chunkers.chunk_ids import chunk_id
+from rag.embeddings.query_embedding_service import get_sentence_transformer, get_query_embedding_service
+from rag.utils.logger import logger
+from rag.utils.resilience import call_with_retry, get_circuit_breaker
+from rag.utils.tracing import trace_span
 from pymilvus import (
     MilvusClient,
     utility,
@@ -13,24 +19,67 @@ from pymilvus import (
     connections
 )
 
+DENSE_MODEL_NAME = "intfloat/multilingual-e5-large"
+RRF_K = 100
+MILVUS_DEPENDENCY = "milvus"
+# Average search latency above which Milvus is considered slow and optional searches are skipped
+MILVUS_SLOW_CALL_SECONDS = 2.0
+milvus_circuit_breaker = get_circuit_breaker(MILVUS_DEPENDENCY, slow_call_seconds=MILVUS_SLOW_CALL_SECONDS)
+AGREEMENT_TOP_N = 5
+
+# Dense field type, index type and index params of each compression option.
+# Index memory per 1024-d vector: none ~4 KB, float16 ~2 KB, sq8 ~1 KB, pq (m=64) 64 B
+DENSE_COMPRESSION = {
+    "none": (DataType.FLOAT_VECTOR, "IVF_FLAT", {"nlist": 128}),
+    "float16": (DataType.FLOAT16_VECTOR, "IVF_FLAT", {"nlist": 128}),
+    "sq8": (DataType.FLOAT_VECTOR, "IVF_SQ8", {"nlist": 128}),
+    "pq": (DataType.FLOAT_VECTOR, "IVF_PQ", {"nlist": 128, "m": 64, "nbits": 8}),
+}
+
 
 class MilvusHybridSearch:
-    def __init__(self, collection_name: str, uri: str = "http://localhost:19530"):
+    def __init__(self, collection_name: str, uri: str = "http://localhost:19530", dense_compression: str = "none"):
+        """
+        Args:
+            collection_name: Name of the Milvus collection, created if it doesn't exist
+            uri: Milvus server URI
+            dense_compression: Dense vector storage of a new collection, one of DENSE_COMPRESSION.
+                Existing collections keep the storage they were created with.
+        """
+        if dense_compression not in DENSE_COMPRESSION:
+            raise ValueError(f"dense_compression must be one of {list(DENSE_COMPRESSION)}")
+
         connections.connect("default", uri=uri)
         self.collection_name = collection_name
         self.client = MilvusClient(uri=uri)
-        self.dense_embedding_model = SentenceTransformer("intfloat/multilingual-e5-large")
+        self.dense_embedding_model = get_sentence_transformer(DENSE_MODEL_NAME)
+        # Concurrent searches share batched forward passes of the query encoder
+        self.query_embedding_service = get_query_embedding_service(DENSE_MODEL_NAME)
 
         if not utility.has_collection(self.collection_name):
-            self._create_collection()
+            self._create_collection(dense_compression)
+
+        description = self.client.describe_collection(self.collection_name)
+        dense_field = next((f for f in description.get("fields", []) if f.get("name") == "dense"), {})
+        self.dense_dtype = dense_field.get("type", DataType.FLOAT_VECTOR)
+
+        # Collections created before deterministic chunk ids generate their own ids
+        self.auto_id = description.get("auto_id", False)
+        if self.auto_id:
+            logger.warning(
+                f"Collection {self.collection_name} uses auto generated ids, re-indexing will insert duplicates. "
+                f"Recreate the collection to enable idempotent upserts."
+            )
+
+    def _create_collection(self, dense_compression: str = "none"):
+        dense_dtype, dense_index_type, dense_index_params = DENSE_COMPRESSION[dense_compression]
 
-    def _create_collection(self):
         schema = MilvusClient.create_schema(
             auto_id=False,
             enable_dynamic_field=True,
         )
 
-        schema.add_field(field_name="id", datatype=DataType.INT64, is_primary=True, auto_id=True)
+        schema.add_field(field_name="id", datatype=DataType.INT64, is_primary=True, auto_id=False)
 
         schema.add_field(
             field_name="text",
@@ -46,7 +95,7 @@ class MilvusHybridSearch:
         )
 
         schema.add_field(field_name="sparse", datatype=DataType.SPARSE_FLOAT_VECTOR)
-        schema.add_field(field_name="dense", datatype=DataType.FLOAT_VECTOR, dim=self.dense_embedding_model.get_sentence_embedding_dimension())
+        schema.add_field(field_name="dense", datatype=dense_dtype, dim=self.dense_embedding_model.get_sentence_embedding_dimension())
 
         bm25_function = Function(
             name="text_bm25_emb",
@@ -62,10 +111,9 @@ class MilvusHybridSearch:
         index_params.add_index(
             field_name="dense",
             index_name="dense_index",
-            index_type="IVF_FLAT",
+            index_type=dense_index_type,
             metric_type="IP",
-            params={"nlist": 128},
-            dimension=768,
+            params=dense_index_params,
         )
 
         index_params.add_index(
@@ -86,12 +134,15 @@ class MilvusHybridSearch:
         """
         Index documents in batches to improve performance and memory management.
 
+        Chunks are upserted with deterministic ids (`metadata["chunk_id"]`, computed if missing),
+        so indexing the same chunks again overwrites them instead of adding duplicates.
+
         Args:
             documents: List of Document objects to index
             batch_size: Number of documents to process in each batch
 
         Returns:
-            List of results from all batch insertions
+            List of results from all batch upserts
         """
         results = []
         total_docs = len(documents)
@@ -100,7 +151,7 @@ class MilvusHybridSearch:
             batch_docs = documents[i:i + batch_size]
             batch_contents = [doc.page_content for doc in batch_docs]
 
-            batch_embeddings = self.dense_embedding_model.encode(batch_contents).tolist()
+            batch_embeddings = self._to_dense(self.dense_embedding_model.encode(batch_contents))
             print(f"Batch {i // batch_size + 1} embedding finished: {len(batch_embeddings)} vectors")
 
             batch_data = [
@@ -108,20 +159,52 @@ class MilvusHybridSearch:
                 for doc, emb in zip(batch_docs, batch_embeddings)
             ]
 
-            batch_result = self.client.insert(
+            if not self.auto_id:
+                for doc, row in zip(batch_docs, batch_data):
+                    row["id"] = doc.metadata.get("chunk_id") or chunk_id(doc)
+
+            write = self.client.insert if self.auto_id else self.client.upsert
+            batch_result = write(
                 collection_name=self.collection_name,
                 data=batch_data
             )
 
             results.append(batch_result)
             print(
-                f"Inserted batch {i // batch_size + 1}/{(total_docs + batch_size - 1) // batch_size}: {len(batch_docs)} documents")
+                f"Upserted batch {i // batch_size + 1}/{(total_docs + batch_size - 1) // batch_size}: {len(batch_docs)} documents")
 
         print(f"Indexing complete: {total_docs} total documents processed in {len(results)} batches")
         return results
 
+    def delete_documents(self, doc_ids: List[str]):
+        """
+        Delete all chunks of the given source documents (by `metadata["doc_id"]`),
+        e.g. before re-indexing documents whose content changed.
+
+        Args:
+            doc_ids: Ids of the source documents
+        """
+        if not doc_ids:
+            return None
+        return self.client.delete(
+            collection_name=self.collection_name,
+            filter=f'metadata["doc_id"] in {json.dumps(list(doc_ids), ensure_ascii=False)}'
+        )
+
+    def _to_dense(self, embeddings: np.ndarray):
+        """
+        Convert embeddings to the representation expected by the dense field.
+        """
+        if self.dense_dtype == DataType.FLOAT16_VECTOR:
+            return list(np.asarray(embeddings, dtype=np.float16))
+        return np.asarray(embeddings, dtype=np.float32).tolist()
+
+    def _embed_query(self, query: str):
+        with trace_span("embedding"):
+            return self._to_dense(self.query_embedding_service.embed(query)[None, :])[0]
+
     def search(self, query: str, k: int = 5) -> List[Document]:
-        query_embedding = self.dense_embedding_model.encode(query).tolist()
+        query_embedding = self._embed_query(query)
 
         reqs = [
             AnnSearchRequest(
@@ -143,18 +226,94 @@ class MilvusHybridSearch:
             )
         ]
 
-        ranker = RRFRanker(100)
+        ranker = RRFRanker(RRF_K)
 
-        res = self.client.hybrid_search(
-            collection_name=self.collection_name,
-            reqs=reqs,
-            ranker=ranker,
-            limit=k,
-            output_fields=["*"]
-        )
+        with trace_span("milvus_search", k=k) as span:
+            res = call_with_retry(
+                self.client.hybrid_search,
+                dependency=MILVUS_DEPENDENCY,
+                collection_name=self.collection_name,
+                reqs=reqs,
+                ranker=ranker,
+                limit=k,
+                output_fields=["*"]
+            )
+            span.set_attribute("chunks", len(res[0]))
 
         retrieved_chunks = [
-            Document(page_content=r["entity"]["text"], metadata=r["entity"]["metadata"]) for r in res[0]
+            Document(
+                page_content=r["entity"]["text"],
+                metadata={**r["entity"]["metadata"], "score": r["distance"]}
+            )
+            for r in res[0]
         ]
 
-        return retrieved_chunks
\ No newline at end of file
+        return retrieved_chunks
+
+    def search_with_signals(self, query: str, k: int = 5) -> Tuple[List[Document], Dict[str, float]]:
+        """
+        Hybrid search returning cheap query difficulty signals alongside the results.
+
+        BM25 and dense searches are issued separately and fused locally with the same
+        reciprocal rank fusion as `search`, so per-retriever rankings and scores are available.
+
+        Args:
+            query: Search query
+            k: Number of chunks to return
+
+        Returns:
+            Tuple of retrieved chunks and signals:
+                - dense_top_score: inner product score of the best dense match
+                - dense_margin: difference between the best and the mean of the top k dense scores
+                - agreement: overlap of BM25 and dense top results (0-1)
+        """
+        query_embedding = self._embed_query(query)
+
+        with trace_span("milvus_search", k=k, signals=True):
+            sparse_res = call_with_retry(
+                self.client.search,
+                dependency=MILVUS_DEPENDENCY,
+                collection_name=self.collection_name,
+                data=[query],
+                anns_field="sparse",
+                search_params={"metric_type": "BM25"},
+                limit=k * 2,
+                output_fields=["*"]
+            )[0]
+            dense_res = call_with_retry(
+                self.client.search,
+                dependency=MILVUS_DEPENDENCY,
+                collection_name=self.collection_name,
+                data=[query_embedding],
+                anns_field="dense",
+                search_params={"metric_type": "IP", "params": {"nprobe": 10}},
+                limit=k * 2,
+                output_fields=["*"]
+            )[0]
+
+        fused_scores = {}
+        entities = {}
+        for results in (sparse_res, dense_res):
+            for rank, r in enumerate(results):
+                fused_scores[r["id"]] = fused_scores.get(r["id"], 0.0) + 1.0 / (RRF_K + rank + 1)
+                entities[r["id"]] = r["entity"]
+
+        top_ids = sorted(fused_scores, key=fused_scores.get, reverse=True)[:k]
+        retrieved_chunks = [
+            Document(
+                page_content=entities[i]["text"],
+                metadata={**entities[i]["metadata"], "score": fused_scores[i]}
+            )
+            for i in top_ids
+        ]
+
+        dense_scores = [r["distance"] for r in dense_res[:k]]
+        sparse_top = {r["id"] for r in sparse_res[:AGREEMENT_TOP_N]}
+        dense_top = {r["id"] for r in dense_res[:AGREEMENT_TOP_N]}
+        signals = {
+            "dense_top_score": dense_scores[0] if dense_scores else 0.0,
+            "dense_margin": dense_scores[0] - sum(dense_scores) / len(dense_scores) if dense_scores else 0.0,
+            "agreement": len(sparse_top & dense_top) / AGREEMENT_TOP_N,
+        }
+
+        return retrieved_chunks, signals
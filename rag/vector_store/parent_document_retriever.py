@@ -0,0 +1,144 @@
+from typing import Any, List, Dict, Tuple, Optional
+
+from langchain_core.documents import Document
+from rag.corpus.corpus_store import CorpusReader
+from rag.utils.logger import logger
+
+PARENT_CHARS = 2000
+MAX_PARENT_CHARS = 4000
+PARENT_METADATA_FIELDS = ["url", "title"]
+
+
+class ParentDocumentRetriever:
+    """
+    Small-to-big retriever: searches small child chunks, returns larger parent windows.
+
+    Child chunks are indexed in their own collection (e.g. a TokenAwareChunker with a small
+    token budget over a corpus store), each with 'doc_id' and 'start_index' metadata. For every
+    retrieved child the surrounding window of about `parent_chars` characters is cut from the
+    document in the corpus store and snapped to line boundaries. Overlapping windows of the same
+    document are merged (up to `max_parent_chars`), so several matching children of one passage
+    produce a single parent. Parents are ordered by their best child and scored by its score.
+
+    Exposes the same `search` and `search_with_signals` interface as MilvusHybridSearch.
+    """
+
+    def __init__(
+        self,
+        child_store: Any,
+        docstore: CorpusReader,
+        parent_chars: int = PARENT_CHARS,
+        max_parent_chars: int = MAX_PARENT_CHARS,
+        metadata_fields: Optional[List[str]] = None,
+    ):
+        """
+        Args:
+            child_store: Vector store with the child chunks, e.g. MilvusHybridSearch
+            docstore: Corpus store with the full documents, keyed by 'doc_id'
+            parent_chars: Target size of the window around a child chunk
+            max_parent_chars: Maximum size of a parent assembled from merged windows
+            metadata_fields: Document metadata fields copied to parents (default: url and title)
+        """
+        self.child_store = child_store
+        self.docstore = docstore
+        self.parent_chars = parent_chars
+        self.max_parent_chars = max_parent_chars
+        self.metadata_fields = metadata_fields or PARENT_METADATA_FIELDS
+
+    def search(self, query: str, k: int = 5) -> List[Document]:
+        """
+        Search `k` child chunks and return their deduplicated parent windows (at most `k`).
+        """
+        return self.expand(self.child_store.search(query, k))
+
+    def search_with_signals(self, query: str, k: int = 5) -> Tuple[List[Document], Dict[str, float]]:
+        children, signals = self.child_store.search_with_signals(query, k)
+        return self.expand(children), signals
+
+    def expand(self, children: List[Document]) -> List[Document]:
+        """
+        Replace child chunks with parent windows. Children without a document in the
+        docstore are returned unchanged.
+        """
+        contents = {}
+        windows: Dict[str, List[List]] = {}
+        results = []
+
+        for rank, child in enumerate(children):
+            doc_id = child.metadata.get("doc_id")
+            if doc_id is None or doc_id not in self.docstore:
+                results.append((rank, child))
+                continue
+
+            if doc_id not in contents:
+                contents[doc_id] = self.docstore.get_content(doc_id)
+            span = self._locate(contents[doc_id], child)
+            if span is None:
+                results.append((rank, child))
+                continue
+
+            start, end = self._window(contents[doc_id], *span)
+            windows.setdefault(doc_id, []).append([start, end, rank, child.metadata.get("score", 0.0), 1])
+
+        for doc_id, doc_windows in windows.items():
+            metadata = self.docstore.get_metadata(doc_id, self.metadata_fields)
+            for start, end, rank, score, count in self._merge(doc_windows):
+                parent = Document(
+                    page_content=contents[doc_id][start:end].strip(),
+                    metadata={
+                        **metadata,
+                        "doc_id": doc_id,
+                        "start_index": start,
+                        "end_index": end,
+                        "score": score,
+                        "child_chunks": count,
+                    }
+                )
+                results.append((rank, parent))
+
+        results.sort(key=lambda result: result[0])
+        parents = [document for _, document in results]
+        logger.debug("Expanded {} child chunks into {} parent passages".format(len(children), len(parents)))
+        return parents
+
+    @staticmethod
+    def _locate(content: str, child: Document) -> Optional[Tuple[int, int]]:
+        start = child.metadata.get("start_index")
+        text = child.page_content
+        if not isinstance(start, int) or content[start:start + len(text)] != text:
+            # Fall back to searching, start_index is not reliable for every chunker
+            start = content.find(text)
+            if start == -1:
+                return None
+        return start, start + len(text)
+
+    def _window(self, content: str, start: int, end: int) -> Tuple[int, int]:
+        extra = max(0, self.parent_chars - (end - start)) // 2
+        window_start = max(0, start - extra)
+        window_end = min(len(content), end + extra)
+
+        # Snap to line boundaries without cutting into the child
+        line_start = content.find("\n", window_start, start)
+        if window_start > 0 and line_start != -1:
+            window_start = line_start + 1
+        line_end = content.rfind("\n", end, window_end)
+        if window_end < len(content) and line_end != -1:
+            window_end = line_end
+
+        return window_start, window_end
+
+    def _merge(self, windows: List[List]) -> List[List]:
+        merged = []
+        for window in sorted(windows):
+            if merged and window[0] <= merged[-1][1]:
+                last = merged[-1]
+                if window[1] <= last[1] or window[1] - last[0] <= self.max_parent_chars:
+                    last[1] = max(last[1], window[1])
+                    last[2] = min(last[2], window[2])
+                    last[3] = max(last[3], window[3])
+                    last[4] += window[4]
+                    continue
+                # Too large to merge, keep the windows but don't repeat the overlapping text
+                window = [last[1]] + window[1:]
+            merged.append(list(window))
+        return merged
@@ -0,0 +1,228 @@
+import os
+import tempfile
+import weakref
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+FIRST_PASS_TYPES = ("float32", "float16", "int8", "binary")
+RESCORE_TYPES = ("float32", "float16")
+
+# Number of set bits of every byte value, used for Hamming distances of packed binary codes
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint16)
+# Rows processed at once when codes are re-quantized or rescore vectors are copied
+COPY_BATCH = 65536
+
+
+class QuantizedDenseIndex:
+    """
+    Dense vector index with compressed in-memory codes and optional float rescoring from disk.
+
+    The first pass scores all vectors in a compressed representation kept in memory:
+        - "float32": exact inner product, 4 bytes per dimension (baseline)
+        - "float16": inner product over half precision vectors, 2 bytes per dimension
+        - "int8": per-dimension scalar quantization (like Milvus SQ8), 1 byte per dimension
+        - "binary": sign bits compared by Hamming distance, 1 bit per dimension
+
+    If `rescore_type` is set, the best `k * rescore_multiplier` candidates of the first pass are
+    rescored with the exact inner product of vectors stored in that type, which recovers most of
+    the recall lost by quantization. The rescore vectors are memory-mapped from a file and only the
+    candidates are read, so they take disk space, not memory: for a 1024-d model, binary codes keep
+    128 bytes per vector in memory, and rescoring with float16 adds 2 KB per vector on disk.
+
+    The int8 range is calibrated on the first added batch and refitted when a later batch falls
+    outside of it: stored codes are then re-quantized to the wider range (adding at most half a
+    quantization step of error), so the result doesn't depend on how vectors are batched.
+
+    Methods:
+        add(ids: List[int], embeddings: np.ndarray):
+            Adds normalized embeddings with their ids.
+        search(query_embedding: np.ndarray, k: int) -> List[Tuple[int, float]]:
+            Returns (id, score) pairs of the k best matches.
+        memory_bytes() -> int:
+            Returns memory used by ids and first pass codes.
+        disk_bytes() -> int:
+            Returns disk space used by the rescore vectors.
+        save(path: str) / load(path: str):
+            Persist the index to a .npz file and the rescore vectors to a .npy file next to it.
+    """
+
+    def __init__(self, first_pass: str = "binary", rescore_type: Optional[str] = "float16",
+                 rescore_multiplier: int = 10, rescore_path: Optional[str] = None):
+        """
+        Args:
+            first_pass: Representation scored for all vectors, one of FIRST_PASS_TYPES
+            rescore_type: Representation used to rescore candidates, one of RESCORE_TYPES or None
+            rescore_multiplier: Number of first pass candidates per requested result
+            rescore_path: File of the rescore vectors, a temporary file removed with the index by default
+        """
+        if first_pass not in FIRST_PASS_TYPES:
+            raise ValueError(f"first_pass must be one of {FIRST_PASS_TYPES}")
+        if rescore_type is not None and rescore_type not in RESCORE_TYPES:
+            raise ValueError(f"rescore_type must be one of {RESCORE_TYPES} or None")
+
+        self.first_pass = first_pass
+        self.rescore_type = rescore_type
+        self.rescore_multiplier = rescore_multiplier
+        self.rescore_path = rescore_path
+
+        self.ids = np.empty(0, dtype=np.int64)
+        self.codes = None
+        # Memory-mapped, read-only view of the rescore vectors file
+        self.rescore_vectors = None
+        self._rescore_file_created = False
+        # int8 quantization parameters, refitted when added vectors fall outside of their range
+        self.offset = None
+        self.scale = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, ids: List[int], embeddings: np.ndarray):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        codes = self._encode(embeddings)
+
+        self.ids = np.concatenate([self.ids, np.asarray(ids, dtype=np.int64)])
+        self.codes = codes if self.codes is None else np.concatenate([self.codes, codes])
+
+        if self.rescore_type is not None:
+            self._append_rescore_vectors(embeddings.astype(self.rescore_type))
+
+    def _append_rescore_vectors(self, vectors: np.ndarray):
+        if not self._rescore_file_created:
+            if self.rescore_path is None:
+                file_descriptor, self.rescore_path = tempfile.mkstemp(suffix=".rescore")
+                os.close(file_descriptor)
+                weakref.finalize(self, _remove_file, self.rescore_path)
+            with open(self.rescore_path, "wb") as f:
+                if self.rescore_vectors is not None:
+                    # Loaded index, the saved vectors are copied, so adding doesn't modify the saved file
+                    _write_rows(f, self.rescore_vectors)
+            self._rescore_file_created = True
+
+        with open(self.rescore_path, "ab") as f:
+            f.write(vectors.tobytes())
+        self.rescore_vectors = np.memmap(self.rescore_path, dtype=self.rescore_type, mode="r",
+                                         shape=(len(self), vectors.shape[1]))
+
+    def _encode(self, embeddings: np.ndarray) -> np.ndarray:
+        if self.first_pass == "binary":
+            return np.packbits(embeddings > 0, axis=1)
+        if self.first_pass == "int8":
+            self._fit_int8_range(embeddings.min(axis=0), embeddings.max(axis=0))
+            codes = np.round((embeddings - self.offset) / self.scale)
+            return (np.clip(codes, 0, 255) - 128).astype(np.int8)
+        return embeddings.astype(self.first_pass)
+
+    def _fit_int8_range(self, low: np.ndarray, high: np.ndarray):
+        if self.offset is not None:
+            old_high = self.offset + 255.0 * self.scale
+            # Values within half a step of the range round to its end codes
+            if np.all(low >= self.offset - self.scale / 2) and np.all(high <= old_high + self.scale / 2):
+                return
+            low, high = np.minimum(low, self.offset), np.maximum(high, old_high)
+
+        offset = low.astype(np.float32)
+        scale = (np.maximum(high - low, 1e-12) / 255.0).astype(np.float32)
+        if self.codes is not None:
+            # Stored codes are re-quantized to the wider range
+            for start in range(0, len(self.codes), COPY_BATCH):
+                batch = self.codes[start:start + COPY_BATCH]
+                values = self.offset + self.scale * (batch.astype(np.float32) + 128)
+                batch[:] = (np.clip(np.round((values - offset) / scale), 0, 255) - 128).astype(np.int8)
+        self.offset, self.scale = offset, scale
+
+    def _first_pass_scores(self, query: np.ndarray) -> np.ndarray:
+        if self.first_pass == "binary":
+            query_code = np.packbits(query > 0)
+            # Higher is better, as for inner products
+            return -POPCOUNT[np.bitwise_xor(self.codes, query_code)].sum(axis=1, dtype=np.int32)
+        if self.first_pass == "int8":
+            # <offset + scale * (code + 128), q> = <code, scale * q> + <offset + 128 * scale, q>
+            return self.codes.astype(np.float32) @ (self.scale * query) + (self.offset + 128 * self.scale) @ query
+        return self.codes.astype(np.float32) @ query
+
+    def search(self, query_embedding: np.ndarray, k: int = 5) -> List[Tuple[int, float]]:
+        if not len(self):
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        scores = self._first_pass_scores(query)
+
+        if self.rescore_type is not None:
+            candidates = self._top_k(scores, k * self.rescore_multiplier)
+            scores = self.rescore_vectors[candidates].astype(np.float32) @ query
+            order = candidates[self._top_k(scores, k)]
+            scores = self.rescore_vectors[order].astype(np.float32) @ query
+        else:
+            order = self._top_k(scores, k)
+            scores = scores[order]
+
+        return [(int(self.ids[i]), float(score)) for i, score in zip(order, scores)]
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top], kind="stable")]
+
+    def memory_bytes(self) -> int:
+        total = self.ids.nbytes
+        for array in (self.codes, self.offset, self.scale):
+            if array is not None:
+                total += array.nbytes
+        return total
+
+    def disk_bytes(self) -> int:
+        return 0 if self.rescore_vectors is None else self.rescore_vectors.nbytes
+
+    def bytes_per_vector(self) -> float:
+        """Memory per vector, without ids."""
+        return (self.memory_bytes() - self.ids.nbytes) / max(len(self), 1)
+
+    def disk_bytes_per_vector(self) -> float:
+        return self.disk_bytes() / max(len(self), 1)
+
+    @staticmethod
+    def _rescore_file(path: str) -> str:
+        return f"{path[:-len('.npz')] if path.endswith('.npz') else path}.rescore.npy"
+
+    def save(self, path: str):
+        arrays = {"ids": self.ids, "codes": self.codes}
+        if self.offset is not None:
+            arrays["offset"] = self.offset
+            arrays["scale"] = self.scale
+        np.savez(path, first_pass=self.first_pass, rescore_type=str(self.rescore_type), **arrays)
+
+        if self.rescore_vectors is not None:
+            # Copied in batches from the mapped file, the vectors are never loaded at once
+            rescore_file = self._rescore_file(path)
+            with open(rescore_file + ".tmp", "wb") as f:
+                np.lib.format.write_array_header_1_0(f, np.lib.format.header_data_from_array_1_0(self.rescore_vectors))
+                _write_rows(f, self.rescore_vectors)
+            os.replace(rescore_file + ".tmp", rescore_file)
+
+    @classmethod
+    def load(cls, path: str, rescore_multiplier: int = 10) -> "QuantizedDenseIndex":
+        data = np.load(path)
+        rescore_type = str(data["rescore_type"])
+        index = cls(str(data["first_pass"]), None if rescore_type == "None" else rescore_type, rescore_multiplier)
+        index.ids = data["ids"]
+        index.codes = data["codes"]
+        if index.rescore_type is not None:
+            index.rescore_vectors = np.load(cls._rescore_file(path), mmap_mode="r")
+        if "offset" in data:
+            index.offset = data["offset"]
+            index.scale = data["scale"]
+        return index
+
+
+def _write_rows(file, array: np.ndarray):
+    """Write the raw rows of a (memory-mapped) array in batches, without reading it at once."""
+    for start in range(0, len(array), COPY_BATCH):
+        file.write(np.ascontiguousarray(array[start:start + COPY_BATCH]).tobytes())
+
+
+def _remove_file(path: str):
+    if os.path.exists(path):
+        os.remove(path)
@@ -1,25 +1,65 @@
 import streamlit as st
-import tempfile
+import pandas as pd
+import requests
+import json
 import time
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from rag.utils.utils import load_env
-from rag.indexing import indexing
-from rag.inference import inference
-from rag.utils.logger import LOG_FILE
-
-
-def read_logs():
-    """Read logs from the log file."""
-    try:
-        with open(LOG_FILE, "r", encoding="utf-8") as file:
-            return file.readlines()
-    except FileNotFoundError:
+from rag.adaptive_controller import PIPELINE_MODES, DEFAULT_PIPELINE_MODE
+from rag.utils.logger import log_files
+
+MAX_LOG_BYTES = 1024 * 1024
+# The pipeline runs in the API server (rag/server.py), the app is a thin client of it
+API_URL = os.environ.get("CHATAGH_API_URL", "http://localhost:8000")
+API_TIMEOUT = 300
+
+
+def stream_events(query, mode):
+    """Yield pipeline events streamed by the API server as newline-delimited JSON."""
+    with requests.post(
+        f"{API_URL}/query/stream", json={"query": query, "mode": mode}, stream=True, timeout=API_TIMEOUT
+    ) as response:
+        if response.status_code != 200:
+            try:
+                detail = response.json().get("detail")
+            except ValueError:
+                # e.g. an HTML error page of a proxy
+                detail = None
+            raise RuntimeError(detail or f"API error {response.status_code}")
+        for line in response.iter_lines(decode_unicode=True):
+            if line:
+                yield json.loads(line)
+
+
+def read_log_file(path, max_bytes):
+    """Read the last `max_bytes` of a log file."""
+    with open(path, "rb") as file:
+        file.seek(0, os.SEEK_END)
+        size = file.tell()
+        file.seek(max(0, size - max_bytes))
+        lines = file.read().decode("utf-8", errors="replace").splitlines(keepends=True)
+        return lines[1:] if size > max_bytes else lines
+
+
+def read_logs(max_bytes=MAX_LOG_BYTES):
+    """Read the last `max_bytes` of the log files, one per API server worker with several workers."""
+    paths = log_files()
+    if not paths:
         return ["Log file not found. Please check if the log file exists."]
-    except Exception as e:
-        return [f"Error reading logs: {str(e)}"]
+
+    lines = []
+    for path in paths:
+        try:
+            file_lines = read_log_file(path, max_bytes // len(paths))
+        except Exception as e:
+            file_lines = [f"Error reading logs: {str(e)}\n"]
+        if len(paths) > 1:
+            lines.append(f"==> {os.path.basename(path)} <==\n")
+        lines.extend(file_lines)
+    return lines
 
 
 def auto_refresh_logs():
@@ -28,29 +68,90 @@ def auto_refresh_logs():
         st.experimental_rerun()
 
 
+def run_inference(query, mode):
+    """Run inference, rendering progress events and answer tokens as they arrive."""
+    status = st.status("Running inference...", expanded=True)
+    st.subheader("Model Response")
+    response_placeholder = st.empty()
+
+    response = ""
+    source_docs = []
+    try:
+        for event in stream_events(query, mode):
+            if event["type"] == "error":
+                raise RuntimeError(event["message"])
+            elif event["type"] == "progress":
+                status.write(event["message"])
+            elif event["type"] == "sources":
+                source_docs = event["documents"]
+                status.update(label="Generating answer...")
+            elif event["type"] == "token":
+                response += event["text"]
+                response_placeholder.markdown(response)
+    except Exception:
+        status.update(label="Inference failed", state="error")
+        raise
+
+    status.update(label="Inference complete", state="complete", expanded=False)
+
+    st.subheader("Retrieved Documents")
+    for i, doc in enumerate(source_docs):
+        with st.expander(f"Document {i + 1}"):
+            st.write(doc)
+
+
+def render_metrics_dashboard():
+    """Show per-stage latency percentiles, token and chunk counts collected by pipeline spans of the API worker."""
+    st.header("Pipeline stages")
+    st.caption("Collected by a single API worker: with several workers the numbers cover only the requests it served.")
+
+    try:
+        summary_response = requests.get(f"{API_URL}/metrics/summary", timeout=10)
+        summary_response.raise_for_status()
+        api_metrics = summary_response.json()
+    except requests.RequestException as e:
+        st.error(f"Unable to fetch metrics from {API_URL}: {e}")
+        return
+
+    rows = []
+    for name, summary in api_metrics["stages"].items():
+        stage, measure = name[len("stage."):].rsplit(".", 1)
+        rows.append({"stage": stage, "measure": measure, **summary})
+
+    if not rows:
+        st.info("No pipeline spans recorded yet. Run a query first.")
+        return
+
+    stages = pd.DataFrame(rows)
+    durations = stages[stages["measure"] == "seconds"].drop(columns="measure").set_index("stage")
+    st.subheader("Latency (seconds)")
+    st.dataframe(durations)
+    st.bar_chart(durations[["p50", "p95"]])
+
+    st.subheader("Tokens and chunks")
+    st.dataframe(stages[stages["measure"] != "seconds"].set_index(["stage", "measure"]))
+
+    st.subheader("Counters")
+    st.json(api_metrics["counters"])
+
+
 def main():
     st.title("Chat AGH development")
 
     load_env()
 
-    tab1, tab2 = st.tabs(["Inference", "Logs"])
+    tab1, tab2, tab3 = st.tabs(["Inference", "Logs", "Metrics"])
 
     with tab1:
         st.header("Inference")
         query = st.text_area("Enter your query", height=100)
+        mode = st.selectbox("Pipeline mode", PIPELINE_MODES, index=PIPELINE_MODES.index(DEFAULT_PIPELINE_MODE))
         if st.button("Run Inference"):
             if query:
-                with st.spinner("Running inference..."):
-                    try:
-                        response, source_docs = inference(query)
-                        st.subheader("Model Response")
-                        st.write(response)
-                        st.subheader("Retrieved Documents")
-                        for i, doc in enumerate(source_docs):
-                            with st.expander(f"Document {i + 1}"):
-                                st.write(doc)
-                    except Exception as e:
-                        st.error(f"Error during inference: {str(e)}")
+                try:
+                    run_inference(query, mode)
+                except Exception as e:
+                    st.error(f"Error during inference: {str(e)}")
             else:
                 st.error("Please enter a query")
 
@@ -81,5 +182,9 @@ def main():
             mime="text/plain"
         )
 
+    with tab3:
+        render_metrics_dashboard()
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
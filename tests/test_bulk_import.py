@@ -0,0 +1,173 @@
+import json
+import os
+import shutil
+import itertools
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pymilvus.bulk_writer")
+pq = pytest.importorskip("pyarrow.parquet")
+minio = pytest.importorskip("minio")
+
+from langchain_core.documents import Document
+from pymilvus import CollectionSchema, DataType, FieldSchema, Function, FunctionType
+
+from rag.vector_store import bulk_import
+from rag.vector_store.bulk_import import MilvusBulkLoader, load_manifest
+
+DIM = 4
+
+
+def collection_schema():
+    schema = CollectionSchema([
+        FieldSchema("id", DataType.INT64, is_primary=True),
+        FieldSchema("text", DataType.VARCHAR, max_length=5000, enable_analyzer=True),
+        FieldSchema("metadata", DataType.JSON),
+        FieldSchema("sparse", DataType.SPARSE_FLOAT_VECTOR),
+        FieldSchema("dense", DataType.FLOAT_VECTOR, dim=DIM),
+    ], enable_dynamic_field=True)
+    schema.add_function(Function(
+        name="text_bm25_emb",
+        input_field_names=["text"],
+        output_field_names=["sparse"],
+        function_type=FunctionType.BM25,
+    ))
+    return schema
+
+
+class FakeMinio:
+    """Stand-in for the MinIO client, the bucket is a local directory."""
+
+    root = None
+
+    def __init__(self, endpoint, access_key=None, secret_key=None, secure=False):
+        pass
+
+    def bucket_exists(self, bucket):
+        return os.path.isdir(os.path.join(self.root, bucket))
+
+    def make_bucket(self, bucket):
+        os.makedirs(os.path.join(self.root, bucket))
+
+    def fput_object(self, bucket, object_name, file_path):
+        target = os.path.join(self.root, bucket, object_name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy(file_path, target)
+
+
+class FakeImportState:
+    ImportCompleted = "completed"
+    ImportFailed = "failed"
+    ImportFailedAndCleaned = "failed_and_cleaned"
+
+    def __init__(self, row_count):
+        self.state = self.ImportCompleted
+        self.row_count = row_count
+        self.failed_reason = ""
+
+
+class FakeMilvus:
+    """Stand-in for the Milvus ORM: collections are lists of rows, imports read the Parquet files."""
+
+    def __init__(self, bucket_dir):
+        self.bucket_dir = bucket_dir
+        self.collections = {}
+        self.tasks = {}
+        self._task_ids = itertools.count(1)
+
+    def do_bulk_insert(self, collection_name, files):
+        rows = []
+        for file in files:
+            for row in pq.read_table(os.path.join(self.bucket_dir, file)).to_pylist():
+                metadata = row["metadata"]
+                rows.append({
+                    "id": row["id"],
+                    "text": row["text"],
+                    "metadata": json.loads(metadata) if isinstance(metadata, str) else metadata,
+                    "dense": list(row["dense"]),
+                })
+        self.collections.setdefault(collection_name, []).extend(rows)
+        task_id = next(self._task_ids)
+        self.tasks[task_id] = FakeImportState(len(rows))
+        return task_id
+
+    def get_bulk_insert_state(self, task_id):
+        return self.tasks[task_id]
+
+    def collection(self, name):
+        milvus = self
+
+        class FakeIterator:
+            def __init__(self, batch_size):
+                self.rows = list(milvus.collections.get(name, []))
+                self.batch_size = batch_size
+
+            def next(self):
+                batch, self.rows = self.rows[:self.batch_size], self.rows[self.batch_size:]
+                return batch
+
+            def close(self):
+                pass
+
+        class FakeCollection:
+            schema = collection_schema()
+
+            def query_iterator(self, batch_size, output_fields):
+                return FakeIterator(batch_size)
+
+        return FakeCollection()
+
+
+class FakeEmbeddingModel:
+    def encode(self, texts):
+        return np.array([[len(text), 1.0, 0.5, -1.0] for text in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def milvus(tmp_path, monkeypatch):
+    bucket_root = tmp_path / "minio"
+    bucket_root.mkdir()
+    FakeMinio.root = str(bucket_root)
+    fake = FakeMilvus(os.path.join(str(bucket_root), bulk_import.MINIO_BUCKET))
+
+    monkeypatch.setattr(minio, "Minio", FakeMinio)
+    monkeypatch.setattr(bulk_import.connections, "connect", lambda *args, **kwargs: None)
+    monkeypatch.setattr(bulk_import, "Collection", fake.collection)
+    monkeypatch.setattr(bulk_import.utility, "do_bulk_insert", fake.do_bulk_insert)
+    monkeypatch.setattr(bulk_import.utility, "get_bulk_insert_state", fake.get_bulk_insert_state)
+    return fake
+
+
+def test_write_import_export_round_trip(tmp_path, milvus):
+    documents = [
+        Document(page_content=f"Chunk {i} " + "x" * i, metadata={"chunk_id": 1000 + i, "url": f"https://agh.edu.pl/{i}"})
+        for i in range(25)
+    ]
+
+    built = MilvusBulkLoader("chatagh_v1", str(tmp_path / "build"), remote=False)
+    batch_files = built.write_documents(documents, FakeEmbeddingModel(), batch_size=10)
+    assert load_manifest(str(tmp_path / "build"))["rows"] == len(documents)
+    assert built.import_files(batch_files) == len(documents)
+
+    imported = {row["id"]: row for row in milvus.collections["chatagh_v1"]}
+    assert set(imported) == {doc.metadata["chunk_id"] for doc in documents}
+    assert imported[1003]["text"] == documents[3].page_content
+    assert imported[1003]["metadata"]["url"] == "https://agh.edu.pl/3"
+
+    exported = MilvusBulkLoader("chatagh_v1", str(tmp_path / "backup"), remote=False)
+    exported.export_collection(batch_size=7)
+
+    # The backup directory is restored after being moved elsewhere
+    shutil.move(str(tmp_path / "backup"), str(tmp_path / "moved"))
+    manifest = load_manifest(str(tmp_path / "moved"))
+    assert all(file.startswith(str(tmp_path / "moved")) for files in manifest["batch_files"] for file in files)
+    restored = MilvusBulkLoader("chatagh_v2", str(tmp_path / "moved"), remote=False)
+    assert restored.import_files(manifest["batch_files"]) == len(documents)
+
+    restored_rows = {row["id"]: row for row in milvus.collections["chatagh_v2"]}
+    assert restored_rows.keys() == imported.keys()
+    for row_id, row in imported.items():
+        assert restored_rows[row_id]["text"] == row["text"]
+        assert restored_rows[row_id]["metadata"] == row["metadata"]
+        np.testing.assert_allclose(restored_rows[row_id]["dense"], row["dense"])
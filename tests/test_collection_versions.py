@@ -0,0 +1,214 @@
+import pytest
+from langchain_core.documents import Document
+
+from rag.vector_store import collection_versions
+from rag.vector_store.collection_versions import CollectionVersions
+
+
+class FakeMilvusClient:
+    """
+    Stand-in for MilvusClient: collections are lists of chunk URLs, aliases map to collection names.
+    Like Milvus, an alias can't take the name of a collection and an aliased collection can't be dropped.
+    """
+
+    def __init__(self, uri=None):
+        self.collections = {}
+        self.loaded = set()
+        self.aliases = {}
+        # Names resolved by queries of the alias after every call, to detect downtime
+        self.served = []
+
+    def add_collection(self, name, urls, loaded=True):
+        self.collections[name] = list(urls)
+        if loaded:
+            self.loaded.add(name)
+
+    def resolve(self, name):
+        return self.aliases.get(name, name if name in self.collections else None)
+
+    def _record(self):
+        self.served.append(self.resolve("chatagh"))
+
+    def list_collections(self):
+        return list(self.collections)
+
+    def has_collection(self, name):
+        return name in self.collections
+
+    def describe_alias(self, alias):
+        if alias not in self.aliases:
+            raise Exception(f"alias {alias} not found")
+        return {"alias": alias, "collection_name": self.aliases[alias]}
+
+    def flush(self, name):
+        pass
+
+    def get_collection_stats(self, name):
+        return {"row_count": len(self.collections[self.resolve(name)])}
+
+    def get_load_state(self, name):
+        return {"state": "<LoadState: Loaded>" if self.resolve(name) in self.loaded else "<LoadState: NotLoad>"}
+
+    def load_collection(self, name):
+        self.loaded.add(name)
+        self._record()
+
+    def rename_collection(self, old_name, new_name):
+        self.collections[new_name] = self.collections.pop(old_name)
+        if old_name in self.loaded:
+            self.loaded.discard(old_name)
+            self.loaded.add(new_name)
+        self._record()
+
+    def create_alias(self, collection_name, alias):
+        if alias in self.collections or alias in self.aliases:
+            raise Exception(f"{alias} already exists")
+        self.aliases[alias] = collection_name
+        self._record()
+
+    def alter_alias(self, collection_name, alias):
+        self.aliases[alias] = collection_name
+        self._record()
+
+    def drop_collection(self, name):
+        if name in self.aliases.values():
+            raise Exception(f"{name} has an alias")
+        del self.collections[name]
+        self.loaded.discard(name)
+
+
+class FakeSearch:
+    """Search backend of a fake collection, returns its chunks in order."""
+
+    def __init__(self, client, name):
+        self.urls = client.collections[client.resolve(name)]
+
+    def search(self, query, k=10):
+        return [Document(page_content=query, metadata={"url": url}) for url in self.urls[:k]]
+
+
+QUERIES = [
+    {"query": "Kiedy jest sesja?", "relevant_urls": ["https://agh.edu.pl/sesja"]},
+    {"query": "Jak zapisać się na akademik?", "relevant_urls": ["https://agh.edu.pl/akademiki"]},
+]
+GOOD_URLS = ["https://agh.edu.pl/sesja", "https://agh.edu.pl/akademiki"] + [f"https://agh.edu.pl/{i}" for i in range(18)]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = FakeMilvusClient()
+    monkeypatch.setattr(collection_versions, "MilvusClient", lambda uri: client)
+    return client
+
+
+def search_factory(client):
+    return lambda name: FakeSearch(client, name)
+
+
+def test_validated_version_is_promoted(client):
+    client.add_collection("chatagh_v20260101000000", GOOD_URLS)
+    client.aliases["chatagh"] = "chatagh_v20260101000000"
+    client.add_collection("chatagh_v20260201000000", GOOD_URLS)
+    versions = CollectionVersions("chatagh")
+
+    report = versions.validate("chatagh_v20260201000000", search_factory(client), QUERIES)
+    assert report["passed"], report["errors"]
+    assert report["recall"] == report["current_recall"] == 1.0
+
+    assert versions.promote("chatagh_v20260201000000") == "chatagh_v20260101000000"
+    assert versions.current() == "chatagh_v20260201000000"
+
+
+@pytest.mark.parametrize("urls, loaded, error", [
+    (GOOD_URLS[:10], True, "rows"),
+    (GOOD_URLS[2:] + ["https://agh.edu.pl/x", "https://agh.edu.pl/y"], True, "Recall"),
+    (GOOD_URLS, False, "not loaded"),
+    ([], True, "empty"),
+])
+def test_validation_rejects_bad_versions(client, urls, loaded, error):
+    client.add_collection("chatagh_v20260101000000", GOOD_URLS)
+    client.aliases["chatagh"] = "chatagh_v20260101000000"
+    client.add_collection("chatagh_v20260201000000", urls, loaded=loaded)
+
+    report = CollectionVersions("chatagh").validate("chatagh_v20260201000000", search_factory(client), QUERIES)
+    assert not report["passed"]
+    assert any(error in message for message in report["errors"])
+
+
+def test_rollback_switches_to_previous_version(client):
+    for name in ("chatagh_v20260101000000", "chatagh_v20260201000000", "chatagh_v20260301000000"):
+        client.add_collection(name, GOOD_URLS)
+    client.aliases["chatagh"] = "chatagh_v20260301000000"
+    versions = CollectionVersions("chatagh")
+
+    assert versions.rollback() == "chatagh_v20260201000000"
+    assert versions.current() == "chatagh_v20260201000000"
+    assert versions.rollback() == "chatagh_v20260101000000"
+    # No older version left
+    assert versions.rollback() is None
+    assert versions.current() == "chatagh_v20260101000000"
+
+
+def test_garbage_collect_keeps_live_and_newest_older_versions(client):
+    names = [f"chatagh_v2026{month:02d}01000000" for month in range(1, 7)]
+    for name in names:
+        client.add_collection(name, GOOD_URLS)
+    # The newest version is still being built, the alias serves the fifth one
+    client.aliases["chatagh"] = names[4]
+    client.add_collection("other_v20260101000000", GOOD_URLS)
+
+    dropped = CollectionVersions("chatagh").garbage_collect(keep=2)
+
+    assert dropped == names[:2]
+    assert sorted(client.collections) == names[2:] + ["other_v20260101000000"]
+
+
+def test_unversioned_collection_is_adopted_on_first_promotion(client):
+    client.add_collection("chatagh", GOOD_URLS)
+    client.add_collection("chatagh_v20260201000000", GOOD_URLS, loaded=False)
+    versions = CollectionVersions("chatagh")
+
+    # The live, not yet versioned collection is the validation baseline
+    report = versions.validate("chatagh_v20260201000000", search_factory(client), QUERIES)
+    assert report["current"] == "chatagh"
+
+    assert versions.promote("chatagh_v20260201000000") == "chatagh_v0"
+    assert versions.current() == "chatagh_v20260201000000"
+    assert versions.versions() == ["chatagh_v0", "chatagh_v20260201000000"]
+    # The version was loaded while the old collection still served queries, the alias was created
+    # right after the rename, directly on the promoted version
+    assert client.served == ["chatagh", None, "chatagh_v20260201000000"]
+
+    assert versions.rollback() == "chatagh_v0"
+
+
+@pytest.mark.parametrize("urls, promoted", [(GOOD_URLS, True), (GOOD_URLS[5:], False)])
+def test_reindex_bulk_builds_and_promotes_only_validated_versions(client, monkeypatch, urls, promoted):
+    pytest.importorskip("pymilvus.bulk_writer")
+    from rag import reindex
+
+    for month in (1, 2, 3):
+        client.add_collection(f"chatagh_v2026{month:02d}01000000", GOOD_URLS)
+    client.aliases["chatagh"] = "chatagh_v20260301000000"
+    built = []
+
+    def bulk_build(data_path, collection_name, num_workers=1):
+        built.append(collection_name)
+        client.add_collection(collection_name, urls)
+        return len(urls)
+
+    monkeypatch.setattr(reindex, "bulk_build", bulk_build)
+    monkeypatch.setattr(reindex, "MilvusHybridSearch", search_factory(client))
+    monkeypatch.setattr(reindex, "load_query_set", lambda path: QUERIES)
+
+    report = reindex.reindex("./corpus", keep=1)
+
+    assert report["passed"] == promoted
+    versions = CollectionVersions("chatagh")
+    if promoted:
+        assert versions.current() == built[0]
+        assert versions.versions() == ["chatagh_v20260301000000", built[0]]
+    else:
+        # Kept for inspection, the live version is unchanged
+        assert versions.current() == "chatagh_v20260301000000"
+        assert built[0] in versions.versions()
@@ -0,0 +1,61 @@
+import json
+import os
+
+from rag.corpus.corpus_store import INDEX_FILE, CorpusReader, CorpusWriter
+
+METADATA = {
+    "url": "https://agh.edu.pl/rekrutacja",
+    "title": "Rekrutacja „na studia” – terminy",
+    "headings": [{"level": 1, "text": "Terminy"}],
+    "source": {"type": "page", "depth": 2},
+}
+
+
+def write_corpus(path):
+    with CorpusWriter(path) as writer:
+        writer.add("rekrutacja", "Rekrutacja trwa do 15 lipca.", METADATA)
+        writer.add("pusty", "Bez metadanych")
+
+
+def test_metadata_is_stored_as_given(tmp_path):
+    path = str(tmp_path / "corpus")
+    write_corpus(path)
+
+    with CorpusReader(path) as reader:
+        document = reader.get("rekrutacja")
+        assert document.page_content == "Rekrutacja trwa do 15 lipca."
+        assert document.metadata == {**METADATA, "doc_id": "rekrutacja"}
+        assert reader.get_metadata("pusty") == {}
+
+
+def test_projection_decodes_only_the_requested_fields(tmp_path):
+    path = str(tmp_path / "corpus")
+    write_corpus(path)
+
+    with CorpusReader(path) as reader:
+        assert reader.get_metadata("rekrutacja", ["title", "source", "missing"]) == {
+            "title": METADATA["title"], "source": METADATA["source"]
+        }
+        # Other fields are never parsed: corrupting their bytes doesn't affect the projection
+        offset, _ = reader._index["rekrutacja"]["metadata"]
+        start, size = reader._index["rekrutacja"]["fields"]["headings"]
+        reader._metadata = bytearray(reader._metadata)
+        reader._metadata[offset + start:offset + start + size] = b"#" * size
+        assert reader.get_metadata("rekrutacja", ["url"]) == {"url": METADATA["url"]}
+
+
+def test_stores_without_field_offsets_are_read(tmp_path):
+    path = str(tmp_path / "corpus")
+    write_corpus(path)
+    index_path = os.path.join(path, INDEX_FILE)
+    with open(index_path, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f]
+    with open(index_path, "w", encoding="utf-8") as f:
+        for entry in entries:
+            entry.pop("fields")
+            f.write(json.dumps(entry) + "\n")
+
+    with CorpusReader(path) as reader:
+        assert reader.get_metadata("rekrutacja", ["url", "headings"]) == {
+            "url": METADATA["url"], "headings": METADATA["headings"]
+        }
@@ -0,0 +1,124 @@
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("bs4")
+pytest.importorskip("fitz")
+
+from web_scraping.download_all_files import WebCrawler
+
+
+class FileServer(ThreadingHTTPServer):
+    """Serves `files` (path -> text) with an ETag and answers conditional requests with 304."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FileHandler)
+        self.files = {}
+        self.requests = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+
+class FileHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        data = self.server.files[self.path].encode("utf-8")
+        etag = f'"{hashlib.md5(data).hexdigest()}"'
+        self.server.requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ListQueue(list):
+    def put(self, item):
+        self.append(item)
+
+
+@pytest.fixture
+def server():
+    server = FileServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def crawl_file(server, tmp_path, url):
+    emitted = ListQueue()
+    crawler = WebCrawler(server.url, output_dir=str(tmp_path / "output"), delay=0, use_sitemaps=False,
+                         document_queue=emitted)
+    result = crawler.download_file(url, 1)
+    crawler.save_state()
+    return crawler, result, emitted
+
+
+def test_files_are_revalidated_with_conditional_requests(server, tmp_path):
+    server.files["/files/regulamin.txt"] = "Regulamin studiów, wersja 1"
+    url = f"{server.url}/files/regulamin.txt"
+
+    first, result, emitted = crawl_file(server, tmp_path, url)
+    assert result["text"] == "Regulamin studiów, wersja 1"
+    assert len(emitted) == 1
+    doc_id = emitted[0][0]
+
+    # Unchanged: 304, the cached text is reused and the document isn't indexed again
+    second, result, emitted = crawl_file(server, tmp_path, url)
+    assert server.requests[-1][1] == next(iter(first.blob_store.url_map.values()))["etag"]
+    assert result["text"] == "Regulamin studiów, wersja 1"
+    assert emitted == []
+    assert [file["doc_id"] for file in second.downloaded_files] == [doc_id]
+
+    # Republished at the same URL: downloaded, extracted and emitted again under the same doc_id
+    server.files["/files/regulamin.txt"] = "Regulamin studiów, wersja 2"
+    third, result, emitted = crawl_file(server, tmp_path, url)
+    assert result["text"] == "Regulamin studiów, wersja 2"
+    assert [(item[0], item[1]) for item in emitted] == [(doc_id, "Regulamin studiów, wersja 2")]
+    assert third.downloaded_files[0]["sha256"] == emitted[0][2]["sha256"] != second.downloaded_files[0]["sha256"]
+
+    # The mapping now points to the new version
+    _, result, emitted = crawl_file(server, tmp_path, url)
+    assert result["text"] == "Regulamin studiów, wersja 2"
+    assert emitted == []
+
+
+def test_interrupted_crawl_resumes_from_checkpoint(server, tmp_path):
+    server.files["/files/regulamin.txt"] = "Regulamin studiów"
+    checkpoint_path = str(tmp_path / "crawl_checkpoint.json")
+
+    def create_crawler():
+        return WebCrawler(server.url, output_dir=str(tmp_path / "output"), delay=0, use_sitemaps=False,
+                          checkpoint_path=checkpoint_path)
+
+    crawler = create_crawler()
+    crawler.processed_urls.add(f"{server.url}/")
+    crawler.crawl_url(f"{server.url}/files/regulamin.txt", 1)
+    crawler.frontier.add(f"{server.url}/studia", 1)
+    crawler.frontier.add(f"{server.url}/studia/rekrutacja", 2, priority=1.0)
+    crawler.save_state()
+
+    # Killed here, a new crawler with the same checkpoint continues with the queued URLs
+    resumed = create_crawler()
+    assert resumed.load_checkpoint()
+    assert resumed.processed_urls == crawler.processed_urls
+    assert [file["url"] for file in resumed.downloaded_files] == [f"{server.url}/files/regulamin.txt"]
+    assert [resumed.frontier.pop() for _ in range(len(resumed.frontier))] == [
+        (f"{server.url}/studia", 1), (f"{server.url}/studia/rekrutacja", 2)
+    ]
+    assert not resumed.frontier.add(f"{server.url}/files/regulamin.txt", 1)
@@ -0,0 +1,249 @@
+import re
+import zlib
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from rag import build_faq_index as faq_builder
+from rag import inference
+from rag.evaluation import pipeline_modes
+from rag.vector_store import faq_index
+from rag.vector_store.faq_index import MilvusFAQIndex, question_id
+
+DIM = 64
+
+
+class FakeEmbeddingModel:
+    """Bag of words embeddings, normalized so identical questions have similarity 1."""
+
+    def encode(self, texts):
+        vectors = np.zeros((len(texts), DIM), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                vectors[row, zlib.crc32(word.encode()) % DIM] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    def get_sentence_embedding_dimension(self):
+        return DIM
+
+
+class FakeQueryEmbeddingService:
+    def __init__(self, model):
+        self.model = model
+
+    def embed(self, query):
+        return self.model.encode([query])[0]
+
+
+class FakeMilvusClient:
+    """Stand-in for MilvusClient: a collection is a dict of rows searched by inner product."""
+
+    collections = {}
+
+    def __init__(self, uri=None):
+        pass
+
+    def has_collection(self, collection_name):
+        return collection_name in self.collections
+
+    def upsert(self, collection_name, data):
+        rows = self.collections.setdefault(collection_name, {})
+        for row in data:
+            rows[row["id"]] = row
+
+    def search(self, collection_name, data, anns_field, search_params, limit, output_fields):
+        rows = list(self.collections[collection_name].values())
+        results = []
+        for query in data:
+            scored = sorted(rows, key=lambda row: -float(np.dot(row[anns_field], query)))[:limit]
+            results.append([
+                {"distance": float(np.dot(row[anns_field], query)), "entity": {field: row[field] for field in output_fields}}
+                for row in scored
+            ])
+        return results
+
+
+class StubQuestionGenerator:
+    """Returns the questions listed in the chunk metadata."""
+
+    def generate_questions(self, document, num_questions):
+        return document.metadata["questions"][:num_questions]
+
+
+class StubAnswerModel:
+    def generate(self, question, context):
+        if "park" in question:
+            return "I am not able to find the answer in the provided context."
+        return f"Answer: {context[0].page_content}"
+
+
+class StubChunker:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def chunk(self, documents):
+        return documents
+
+
+CHUNKS = [
+    Document(
+        page_content="The dean's office is open from 9 to 14 on weekdays.",
+        metadata={"url": "https://agh.edu.pl/dean", "questions": [
+            "When is the dean's office open?", "What are the dean's office opening hours?", "Where to park at AGH?",
+        ]},
+    ),
+    Document(
+        page_content="The scholarship application deadline is October 15.",
+        metadata={"url": "https://agh.edu.pl/scholarship", "questions": [
+            "What is the scholarship application deadline?",
+        ]},
+    ),
+]
+
+
+@pytest.fixture
+def milvus(monkeypatch):
+    monkeypatch.setattr(FakeMilvusClient, "collections", {})
+    model = FakeEmbeddingModel()
+    monkeypatch.setattr(faq_index, "MilvusClient", FakeMilvusClient)
+    monkeypatch.setattr(faq_index, "get_sentence_transformer", lambda name: model)
+    monkeypatch.setattr(faq_index, "get_query_embedding_service", lambda name: FakeQueryEmbeddingService(model))
+    # The index exists, _create_collection needs a Milvus server
+    FakeMilvusClient.collections["chatagh_faq"] = {}
+    return FakeMilvusClient
+
+
+@pytest.fixture
+def built_index(milvus, monkeypatch):
+    monkeypatch.setattr(faq_builder, "load_documents", lambda path: [Document(c.page_content, metadata=dict(c.metadata)) for c in CHUNKS])
+    monkeypatch.setattr(faq_builder, "ParallelChunker", StubChunker)
+    monkeypatch.setattr(faq_builder, "TokenAwareChunker", StubChunker)
+    monkeypatch.setattr(faq_builder, "create_question_generator", lambda name: StubQuestionGenerator())
+    faq_builder.build_faq_index("./data", "chatagh_faq", num_questions=3)
+    return MilvusFAQIndex("chatagh_faq")
+
+
+def test_build_faq_index_with_stub_generator(built_index, milvus, monkeypatch):
+    rows = milvus.collections["chatagh_faq"]
+    assert sorted(row["question"] for row in rows.values()) == sorted(
+        question for chunk in CHUNKS for question in chunk.metadata["questions"]
+    )
+    assert all(row["metadata"]["chunk_id"] for row in rows.values())
+
+    # Question ids are deterministic, rebuilding the index upserts the same rows
+    faq_builder.build_faq_index("./data", "chatagh_faq", num_questions=3)
+    assert len(milvus.collections["chatagh_faq"]) == len(rows)
+
+    chunk = Document(CHUNKS[0].page_content, metadata={"chunk_id": 42})
+    assert question_id("When is the dean's office open?", chunk) == question_id(" when is the DEAN'S office open? ", chunk)
+
+
+def test_generate_entries_drops_unanswered_questions():
+    entries = faq_builder.generate_entries(CHUNKS[0], StubQuestionGenerator(), 3, answer_model=StubAnswerModel())
+
+    assert [entry["question"] for entry in entries] == CHUNKS[0].metadata["questions"][:2]
+    assert all(entry["answer"].startswith("Answer:") for entry in entries)
+
+
+def test_match_faq_threshold(built_index, monkeypatch):
+    monkeypatch.setattr(inference, "_faq_index", built_index)
+
+    matches = inference.match_faq("What is the scholarship application deadline?")
+    assert matches[0]["question"] == "What is the scholarship application deadline?"
+    assert matches[0]["document"].metadata["url"] == "https://agh.edu.pl/scholarship"
+    assert all(match["score"] >= inference.FAQ_CONFIDENCE_THRESHOLD for match in matches)
+
+    assert inference.match_faq("How do I register for a dormitory room?") == []
+
+    monkeypatch.setattr(inference, "FAQ_CONFIDENCE_THRESHOLD", 1.01)
+    assert inference.match_faq("What is the scholarship application deadline?") == []
+
+
+def test_match_faq_falls_back_when_lookup_fails(built_index, monkeypatch):
+    def failing_lookup(query, k):
+        raise ConnectionError("Milvus is down")
+
+    monkeypatch.setattr(built_index, "lookup", failing_lookup)
+    monkeypatch.setattr(inference, "_faq_index", built_index)
+
+    assert inference.match_faq("What is the scholarship application deadline?") == []
+
+
+def test_faq_hit_answers_with_precomputed_answer(monkeypatch):
+    match = {
+        "question": "What is the scholarship application deadline?",
+        "answer": "October 15.",
+        "score": 0.97,
+        "document": CHUNKS[1],
+    }
+    monkeypatch.setattr(inference, "match_faq", lambda query: [match])
+
+    def no_retrieval():
+        raise AssertionError("The full pipeline must not run on a FAQ hit")
+
+    monkeypatch.setattr(inference, "get_vector_store", no_retrieval)
+
+    events = list(inference._run_pipeline("scholarship deadline?", "balanced"))
+    assert [event["type"] for event in events] == ["progress", "sources", "token"]
+    assert events[1]["documents"] == [CHUNKS[1]]
+    assert events[2]["text"] == "October 15."
+
+
+def test_precomputed_faq_answer_makes_no_llm_calls(monkeypatch):
+    match = {"question": "What is the scholarship application deadline?", "answer": "October 15.",
+             "score": 0.97, "document": CHUNKS[1]}
+    monkeypatch.setattr(inference, "match_faq", lambda query: [match])
+
+    result = pipeline_modes.run_query({"query": "scholarship deadline?", "answer_keywords": ["October"]}, "balanced")
+    assert result["faq_hit"]
+    assert result["llm_calls"] == 0
+    assert result["keyword_recall"] == 1.0
+
+
+def test_faq_is_used_in_every_mode_unless_disabled(monkeypatch):
+    class FullPipelineStarted(Exception):
+        pass
+
+    match = {"question": "What is the scholarship application deadline?", "answer": "October 15.",
+             "score": 0.97, "document": CHUNKS[1]}
+
+    def full_pipeline():
+        raise FullPipelineStarted
+
+    monkeypatch.setattr(inference, "match_faq", lambda query: [match])
+    monkeypatch.setattr(inference, "get_vector_store", full_pipeline)
+
+    # The default mode answers head queries from the FAQ index too
+    for mode in ("fast", "balanced", "thorough"):
+        events = list(inference._run_pipeline("scholarship deadline?", mode))
+        assert events[-1] == {"type": "token", "text": "October 15."}
+
+    with pytest.raises(FullPipelineStarted):
+        list(inference._run_pipeline("scholarship deadline?", "thorough", faq=False))
+
+
+def test_missing_faq_index_is_checked_again(monkeypatch):
+    exists = iter([False, False, True])
+
+    class BuiltLaterFAQIndex(MilvusFAQIndex):
+        def __init__(self, collection_name):
+            self.collection_name = collection_name
+
+        @staticmethod
+        def exists(collection_name, uri=None):
+            return next(exists)
+
+    monkeypatch.setattr(faq_index, "MilvusFAQIndex", BuiltLaterFAQIndex)
+    monkeypatch.setattr(inference, "_faq_index", None)
+    monkeypatch.setattr(inference, "_faq_index_missing_at", None)
+
+    monkeypatch.setattr(inference, "FAQ_RECHECK_SECONDS", 3600.0)
+    assert inference.get_faq_index() is None
+    # Not checked again before FAQ_RECHECK_SECONDS
+    assert inference.get_faq_index() is None
+
+    monkeypatch.setattr(inference, "FAQ_RECHECK_SECONDS", 0.0)
+    assert inference.get_faq_index() is None
+    assert isinstance(inference.get_faq_index(), MilvusFAQIndex)
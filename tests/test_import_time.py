@@ -0,0 +1,12 @@
+import pytest
+
+from rag.evaluation.import_time_budget import IMPORT_BUDGETS, check_budgets
+
+
+@pytest.mark.parametrize("module, budget", sorted(IMPORT_BUDGETS.items()))
+def test_import_time_budget(module, budget):
+    result, = check_budgets({module: budget})
+
+    if result["error"] and result["error"].startswith("ModuleNotFoundError"):
+        pytest.skip(f"{module} dependencies are not installed: {result['error']}")
+    assert result["passed"], f"{module}: {'; '.join(result['errors'])}"
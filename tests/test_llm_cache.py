@@ -0,0 +1,206 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("google.genai")
+
+from rag.models import llm_cache
+from rag.models.google_genai_models import EnhanceSearchModel, QueryAugmentationModel
+from rag.models.llm_cache import LLMResponseCache
+from rag.utils.metrics import metrics
+
+
+class FakeGemini(ThreadingHTTPServer):
+    """Local stand-in for the Gemini API answering every prompt with 'Answer to: <prompt>'."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeGeminiHandler)
+        self.requests = []
+        self.delay = 0.0
+        # Status code and response text replacing 'Answer to: <prompt>'
+        self.status = 200
+        self.text = None
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def record(self, path, prompt):
+        with self._lock:
+            self.requests.append((path, prompt))
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = "".join(part["text"] for content in body["contents"] for part in content["parts"])
+        self.server.record(self.path, prompt)
+        time.sleep(self.server.delay)
+
+        if self.server.status != 200:
+            data = json.dumps({"error": {"code": self.server.status, "message": "Invalid argument", "status": "INVALID_ARGUMENT"}}).encode()
+            self.send_response(self.server.status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+
+        if ":streamGenerateContent" in self.path:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for text in ("Answer ", f"to: {prompt}"):
+                self.wfile.write(f"data: {json.dumps(self._response(text))}\r\n\r\n".encode())
+            return
+
+        data = json.dumps(self._response(self.server.text or f"Answer to: {prompt}")).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    @staticmethod
+    def _response(text):
+        return {
+            "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}}],
+            "usageMetadata": {"promptTokenCount": 10, "candidatesTokenCount": 5},
+        }
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        self.now += 0.001
+        return self.now
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    server = FakeGemini()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("GOOGLE_API_BASE_URL", server.url)
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    monkeypatch.setattr(llm_cache, "_client", None)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_cache.time, "time", clock.time)
+    return clock
+
+
+def make_model(tmp_path, **cache_kwargs):
+    return QueryAugmentationModel(cache=LLMResponseCache(str(tmp_path / "llm_cache.sqlite"), **cache_kwargs))
+
+
+def test_cache_hit(gemini, tmp_path):
+    model = make_model(tmp_path)
+    calls_before = metrics.get("llm.calls")
+
+    first = model.generate("Kiedy jest sesja?")
+    second = model.generate("Kiedy jest sesja?")
+
+    assert first == second
+    assert "Kiedy jest sesja?" in first
+    assert len(gemini.requests) == 1
+    assert metrics.get("llm.calls") - calls_before == 1
+
+    # The cache is persistent, a new model (e.g. another process) reads the same entries
+    assert make_model(tmp_path).generate("Kiedy jest sesja?") == first
+    assert len(gemini.requests) == 1
+
+
+def test_expired_entries_are_requested_again(gemini, tmp_path, clock):
+    model = make_model(tmp_path, ttl_seconds=60)
+
+    model.generate("Kiedy jest sesja?")
+    clock.now += 30
+    model.generate("Kiedy jest sesja?")
+    assert len(gemini.requests) == 1
+
+    clock.now += 61
+    model.generate("Kiedy jest sesja?")
+    assert len(gemini.requests) == 2
+
+
+def test_least_recently_used_entries_are_evicted(gemini, tmp_path, clock):
+    model = make_model(tmp_path, max_entries=2)
+
+    model.generate("first")
+    model.generate("second")
+    model.generate("first")
+    assert len(gemini.requests) == 2
+
+    # "second" is the least recently used entry
+    model.generate("third")
+    model.generate("first")
+    assert len(gemini.requests) == 3
+
+    model.generate("second")
+    assert len(gemini.requests) == 4
+
+
+def test_concurrent_identical_requests_are_coalesced(gemini, tmp_path):
+    gemini.delay = 0.3
+    model = make_model(tmp_path)
+    start = threading.Barrier(8)
+    responses = []
+
+    def ask():
+        start.wait()
+        responses.append(model.generate("Jak zapisać się na akademik?"))
+
+    threads = [threading.Thread(target=ask) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(gemini.requests) == 1
+    assert len(responses) == 8 and len(set(responses)) == 1
+
+
+def test_streamed_responses_are_cached(gemini, tmp_path):
+    model = make_model(tmp_path)
+
+    streamed = "".join(model.generate_stream("Kiedy jest sesja?"))
+    assert "".join(model.generate_stream("Kiedy jest sesja?")) == streamed
+    assert [path for path, prompt in gemini.requests] == [
+        "/v1beta/models/gemini-2.0-flash-001:streamGenerateContent?alt=sse"
+    ]
+
+    # Streams and complete responses of the same prompt share the cache entry
+    assert model.generate("Kiedy jest sesja?") == streamed
+    assert len(gemini.requests) == 1
+
+
+def test_enhance_search_retries_only_parse_failures(gemini, tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm_cache.sqlite"))
+    model = EnhanceSearchModel(max_attempts=3, cache=cache)
+
+    gemini.text = "not a JSON object"
+    assert model.generate("Kiedy jest sesja?", context=[]) == ("", [])
+    assert len(gemini.requests) == 3
+
+    # A client error is not retried, neither by the retry layer nor by the model
+    gemini.status = 400
+    assert model.generate("Jak zapisać się na akademik?", context=[]) == ("", [])
+    assert len(gemini.requests) == 4
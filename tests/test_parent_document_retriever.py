@@ -0,0 +1,110 @@
+import pytest
+from langchain_core.documents import Document
+
+from rag import indexing as indexing_module
+from rag.chunkers.base_chunker import BaseChunker
+from rag.corpus.corpus_store import CorpusReader, CorpusWriter
+from rag.vector_store import milvus_hybrid_search
+from rag.vector_store.parent_document_retriever import ParentDocumentRetriever
+
+DEAN_OFFICE = "\n".join([
+    "Dziekanat Wydziału Informatyki",
+    "Godziny otwarcia: poniedziałek-piątek 9-14.",
+    "W czwartki dziekanat jest nieczynny.",
+    "Wnioski o stypendium przyjmowane są do 15 października.",
+    "Kontakt: dziekanat@agh.edu.pl",
+])
+DORMITORIES = "\n".join([
+    "Miasteczko Studenckie AGH",
+    "Wnioski o miejsce w akademiku składa się w systemie USOS.",
+    "Opłaty za akademik wnosi się do 10 dnia miesiąca.",
+])
+
+
+class LineChunker(BaseChunker):
+    """One child chunk per line, with its start index."""
+
+    def chunk(self, documents):
+        return [chunk for document in documents for chunk in self.chunk_text(document.page_content, document.metadata)]
+
+    def chunk_text(self, text, metadata=None):
+        chunks, start = [], 0
+        for line in text.split("\n"):
+            chunks.append(Document(page_content=line, metadata={**(metadata or {}), "start_index": start}))
+            start += len(line) + 1
+        return chunks
+
+
+class FakeChildStore:
+    """Stand-in for MilvusHybridSearch: returns the indexed chunks containing a query word, in index order."""
+
+    stores = {}
+
+    def __init__(self, collection_name):
+        self.collection_name = collection_name
+        self.chunks = self.stores.setdefault(collection_name, [])
+
+    def indexing(self, chunks):
+        self.chunks.extend(chunks)
+
+    def search(self, query, k=5):
+        words = query.lower().split()
+        return [chunk for chunk in self.chunks if any(word in chunk.page_content.lower() for word in words)][:k]
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    path = str(tmp_path / "corpus")
+    writer = CorpusWriter(path)
+    writer.add("dziekanat", DEAN_OFFICE, {"url": "https://agh.edu.pl/dziekanat", "title": "Dziekanat"})
+    writer.add("akademiki", DORMITORIES, {"url": "https://agh.edu.pl/akademiki", "title": "Akademiki"})
+    writer.close()
+    return path
+
+
+@pytest.fixture
+def children(corpus, monkeypatch):
+    monkeypatch.setattr(FakeChildStore, "stores", {})
+    monkeypatch.setattr(milvus_hybrid_search, "MilvusHybridSearch", FakeChildStore)
+    collection_name, count = indexing_module.index_children(corpus, chunker=LineChunker())
+    assert collection_name == indexing_module.CHILD_COLLECTION_NAME
+    return FakeChildStore(collection_name)
+
+
+def test_children_are_indexed_with_their_parent_id(children):
+    assert len(children.chunks) == 8
+    assert {chunk.metadata["doc_id"] for chunk in children.chunks} == {"dziekanat", "akademiki"}
+    assert all(isinstance(chunk.metadata["start_index"], int) for chunk in children.chunks)
+
+
+def test_index_children_requires_a_corpus_store(tmp_path):
+    with pytest.raises(ValueError):
+        indexing_module.index_children(str(tmp_path), chunker=LineChunker())
+
+
+def test_children_are_expanded_to_parent_passages(corpus, children):
+    with CorpusReader(corpus) as reader:
+        retriever = ParentDocumentRetriever(children, reader, parent_chars=200, max_parent_chars=400)
+
+        parents = retriever.search("czwartki stypendium", k=5)
+
+        # Both matching children of the dean's office page are merged into one parent window
+        assert len(parents) == 1
+        parent = parents[0]
+        assert parent.metadata["doc_id"] == "dziekanat"
+        assert parent.metadata["url"] == "https://agh.edu.pl/dziekanat"
+        assert parent.metadata["child_chunks"] == 2
+        assert "W czwartki dziekanat jest nieczynny." in parent.page_content
+        assert "Wnioski o stypendium przyjmowane są do 15 października." in parent.page_content
+        assert parent.page_content == DEAN_OFFICE[parent.metadata["start_index"]:parent.metadata["end_index"]].strip()
+
+        # Parents of different documents keep the order of their best child
+        parents = retriever.search("wnioski", k=5)
+        assert [parent.metadata["doc_id"] for parent in parents] == ["dziekanat", "akademiki"]
+
+
+def test_children_without_a_parent_are_returned_unchanged(corpus):
+    orphan = Document(page_content="Strona spoza korpusu", metadata={"doc_id": "missing"})
+
+    with CorpusReader(corpus) as reader:
+        assert ParentDocumentRetriever(FakeChildStore("orphans"), reader).expand([orphan]) == [orphan]
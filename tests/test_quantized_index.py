@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from rag.evaluation.compression_benchmark import synthetic_embeddings
+from rag.vector_store.quantized_index import QuantizedDenseIndex
+
+DIM = 64
+
+
+@pytest.fixture(scope="module")
+def embeddings():
+    return synthetic_embeddings(2000, 20, dimension=DIM, num_clusters=16)
+
+
+def exact_top_k(vectors, query, k):
+    return list(np.argsort(-(vectors @ query), kind="stable")[:k])
+
+
+def test_rescore_vectors_are_on_disk(embeddings, tmp_path):
+    vectors, queries = embeddings
+    index = QuantizedDenseIndex("binary", "float16", rescore_path=str(tmp_path / "vectors.rescore"))
+    index.add(list(range(len(vectors))), vectors)
+
+    assert isinstance(index.rescore_vectors, np.memmap)
+    assert index.bytes_per_vector() == DIM / 8
+    assert index.disk_bytes_per_vector() == 2 * DIM
+    assert (tmp_path / "vectors.rescore").stat().st_size == index.disk_bytes()
+
+    for query in queries:
+        assert [doc_id for doc_id, _ in index.search(query, 1)] == exact_top_k(vectors, query, 1)
+
+
+def test_int8_range_is_refitted_for_later_batches(embeddings):
+    vectors, queries = embeddings
+    # The first batch covers only a part of the range of the others
+    order = np.argsort(vectors[:, 0])
+    batched = QuantizedDenseIndex("int8", None)
+    for start in range(0, len(vectors), 500):
+        batched.add(list(order[start:start + 500]), vectors[order[start:start + 500]])
+    at_once = QuantizedDenseIndex("int8", None)
+    at_once.add(list(range(len(vectors))), vectors)
+
+    np.testing.assert_allclose(batched.offset, at_once.offset, atol=1e-6)
+    for query in queries:
+        expected = set(exact_top_k(vectors, query, 10))
+        assert len({doc_id for doc_id, _ in batched.search(query, 10)} & expected) >= 9
+
+
+def test_save_and_load(embeddings, tmp_path):
+    vectors, queries = embeddings
+    index = QuantizedDenseIndex("int8", "float16")
+    index.add(list(range(1000)), vectors[:1000])
+    index.save(str(tmp_path / "index.npz"))
+
+    loaded = QuantizedDenseIndex.load(str(tmp_path / "index.npz"))
+    assert isinstance(loaded.rescore_vectors, np.memmap)
+    assert loaded.search(queries[0], 5) == index.search(queries[0], 5)
+
+    # Adding to a loaded index leaves the saved files unchanged
+    saved_size = (tmp_path / "index.rescore.npy").stat().st_size
+    loaded.add(list(range(1000, len(vectors))), vectors[1000:])
+    assert (tmp_path / "index.rescore.npy").stat().st_size == saved_size
+    assert len(loaded.rescore_vectors) == len(vectors)
+    for query in queries:
+        assert [doc_id for doc_id, _ in loaded.search(query, 1)] == exact_top_k(vectors, query, 1)
@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from web_scraping.frontier import normalize_url
+from web_scraping.seeding import SitemapSeeder
+
+SITE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "seeding_site")
+
+
+class FixtureSiteHandler(BaseHTTPRequestHandler):
+    """Serves the files of SITE_DIR, '/' is index.html and {BASE} is replaced with the site URL."""
+
+    def do_GET(self):
+        name = self.path.split("?", 1)[0].lstrip("/") or "index.html"
+        path = os.path.join(SITE_DIR, name)
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+
+        with open(path, encoding="utf-8") as f:
+            data = f.read().replace("{BASE}", self.server.url).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html" if name.endswith(".html") else "text/xml")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureSiteHandler)
+    server.daemon_threads = True
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.url
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def crawler_factory(site, tmp_path):
+    pytest.importorskip("bs4")
+    pytest.importorskip("fitz")
+    from web_scraping.download_all_files import WebCrawler
+
+    def create(**kwargs):
+        return WebCrawler(site, output_dir=str(tmp_path / "output"), delay=0, **kwargs)
+
+    return create
+
+
+def pop_all(frontier):
+    urls = []
+    while len(frontier):
+        urls.append(frontier.pop()[0])
+    return urls
+
+
+def test_seeder_reads_sitemap_index_and_feeds(site):
+    seeder = SitemapSeeder(requests.Session())
+
+    entries = seeder.seed(site)
+    sources = {entry.url[len(site):]: entry.source for entry in entries}
+
+    assert sources == {
+        "/archiwum/2019": "sitemap",
+        "/studia/rekrutacja": "sitemap",
+        "/studia/stypendia": "sitemap",
+        "/aktualnosci/dzien-otwarty": "feed",
+        "/aktualnosci/inauguracja": "feed",
+    }
+    rekrutacja = next(entry for entry in entries if entry.url.endswith("/studia/rekrutacja"))
+    assert rekrutacja.lastmod.isoformat() == "2026-10-10T08:00:00+00:00"
+    assert rekrutacja.changefreq == "weekly"
+
+
+def test_robots_disallowed_urls_are_not_seeded_or_crawled(site, crawler_factory):
+    crawler = crawler_factory()
+    crawler.seed_frontier()
+
+    assert not any("/private/" in url for url in pop_all(crawler.frontier))
+    assert not crawler.is_valid_url(f"{site}/private/raport")
+    assert crawler.is_valid_url(f"{site}/studia/rekrutacja")
+
+
+def test_seeds_are_queued_most_recently_modified_first(site, crawler_factory):
+    crawler = crawler_factory()
+    crawler.seed_frontier()
+
+    sitemap_urls = [url for url in pop_all(crawler.frontier) if "/aktualnosci/" not in url]
+    # Same changefreq and priority, so lastmod decides
+    assert sitemap_urls == [f"{site}/studia/rekrutacja", f"{site}/studia/stypendia", f"{site}/archiwum/2019"]
+    assert crawler.frontier.stats["seeded"] == 5
+
+
+def test_unchanged_pages_of_the_crawl_state_are_skipped(site, crawler_factory, tmp_path):
+    crawl_state_path = tmp_path / "crawl_state.json"
+    crawl_state_path.write_text(json.dumps({
+        # Unchanged since the previous crawl
+        normalize_url(f"{site}/studia/rekrutacja"): "2026-10-10T08:00:00+00:00",
+        # Modified since the previous crawl
+        normalize_url(f"{site}/studia/stypendia"): "2026-08-01T00:00:00+00:00",
+    }))
+    crawler = crawler_factory(crawl_state_path=str(crawl_state_path))
+    crawler.seed_frontier()
+
+    queued = pop_all(crawler.frontier)
+    assert f"{site}/studia/rekrutacja" not in queued
+    assert f"{site}/studia/stypendia" in queued
+    assert crawler.frontier.stats["unchanged"] == 1
+    # Links to the unchanged page found while crawling are not queued either
+    assert not crawler.frontier.add(f"{site}/studia/rekrutacja", 2)
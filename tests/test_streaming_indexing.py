@@ -0,0 +1,117 @@
+import json
+import threading
+
+import pytest
+from langchain_core.documents import Document
+
+from rag.chunkers.base_chunker import BaseChunker
+from rag.streaming_indexing import StreamingIndexer
+
+
+class ParagraphChunker(BaseChunker):
+    """One chunk per paragraph."""
+
+    def chunk(self, documents):
+        return [chunk for document in documents for chunk in self.chunk_text(document.page_content, document.metadata)]
+
+    def chunk_text(self, text, metadata=None):
+        return [Document(page_content=part, metadata=dict(metadata or {})) for part in text.split("\n\n")]
+
+
+class FakeVectorStore:
+    """Stand-in for MilvusHybridSearch: chunks by chunk_id, with a log of the delete and upsert calls."""
+
+    collection_name = "chatagh_test"
+
+    def __init__(self, fail=False):
+        self.chunks = {}
+        self.calls = []
+        self.fail = fail
+        self.indexed = threading.Event()
+
+    def delete_documents(self, doc_ids):
+        self.calls.append(("delete", sorted(doc_ids)))
+        self.chunks = {key: chunk for key, chunk in self.chunks.items() if chunk.metadata["doc_id"] not in doc_ids}
+
+    def indexing(self, chunks):
+        if self.fail:
+            raise ConnectionError("Milvus is down")
+        self.calls.append(("upsert", sorted({chunk.metadata["doc_id"] for chunk in chunks})))
+        self.chunks.update({chunk.metadata["chunk_id"]: chunk for chunk in chunks})
+        self.indexed.set()
+
+    def texts(self, doc_id):
+        return sorted(chunk.page_content for chunk in self.chunks.values() if chunk.metadata["doc_id"] == doc_id)
+
+
+def index(vector_store, documents, checkpoint_path=None, **kwargs):
+    with StreamingIndexer(vector_store, ParagraphChunker(), checkpoint_path=checkpoint_path, **kwargs) as indexer:
+        for doc_id, content in documents:
+            indexer.put(doc_id, content, {"url": f"https://agh.edu.pl/{doc_id}"})
+    return indexer
+
+
+def test_documents_are_indexed_in_batches():
+    vector_store = FakeVectorStore()
+    documents = [(f"doc{i}", f"Page {i}\n\nDetails {i}") for i in range(10)]
+
+    indexer = index(vector_store, documents, batch_size=4, max_batch_wait=60)
+
+    # The batch waits until it is full or the queue is closed
+    assert [len(doc_ids) for call, doc_ids in vector_store.calls if call == "upsert"] == [4, 4, 2]
+    assert indexer.stats == {"indexed": 10, "unchanged": 0, "failed": 0, "chunks": 20}
+    assert vector_store.texts("doc3") == ["Details 3", "Page 3"]
+
+
+def test_partial_batch_is_indexed_after_max_batch_wait():
+    vector_store = FakeVectorStore()
+    with StreamingIndexer(vector_store, ParagraphChunker(), batch_size=32, max_batch_wait=0.05) as indexer:
+        indexer.put("doc0", "Page 0", {"url": "https://agh.edu.pl/doc0"})
+        # Indexed without more documents or the queue being closed
+        assert vector_store.indexed.wait(5)
+        indexer.queue.join()
+
+
+def test_checkpoint_skips_unchanged_documents_after_restart(tmp_path):
+    checkpoint_path = str(tmp_path / "checkpoint.jsonl")
+    vector_store = FakeVectorStore()
+    index(vector_store, [("doc0", "Page 0"), ("doc1", "Page 1")], checkpoint_path)
+
+    with open(checkpoint_path, encoding="utf-8") as f:
+        assert sorted(json.loads(line)["doc_id"] for line in f) == ["doc0", "doc1"]
+
+    vector_store.calls.clear()
+    indexer = index(vector_store, [("doc0", "Page 0"), ("doc1", "Page 1, updated")], checkpoint_path)
+
+    assert indexer.stats["unchanged"] == 1
+    assert vector_store.calls == [("delete", ["doc1"]), ("upsert", ["doc1"])]
+
+
+@pytest.mark.parametrize("with_checkpoint", [True, False])
+def test_changed_document_replaces_its_chunks(tmp_path, with_checkpoint):
+    checkpoint_path = str(tmp_path / "checkpoint.jsonl") if with_checkpoint else None
+    vector_store = FakeVectorStore()
+
+    index(vector_store, [("doc0", "Rekrutacja\n\nTermin: 1 lipca")], checkpoint_path)
+    index(vector_store, [("doc0", "Rekrutacja\n\nTermin: 15 lipca")], checkpoint_path)
+
+    # Old chunks are deleted before the new ones are upserted, without a checkpoint too
+    assert vector_store.calls[-2:] == [("delete", ["doc0"]), ("upsert", ["doc0"])]
+    assert vector_store.texts("doc0") == ["Rekrutacja", "Termin: 15 lipca"]
+
+
+def test_failed_batches_are_retried_on_restart(tmp_path):
+    checkpoint_path = str(tmp_path / "checkpoint.jsonl")
+
+    indexer = index(FakeVectorStore(fail=True), [("doc0", "Page 0"), ("doc1", "Page 1")], checkpoint_path)
+    assert indexer.stats["failed"] == 2
+    with open(checkpoint_path + ".failed", encoding="utf-8") as f:
+        assert sorted(json.loads(line)[0] for line in f) == ["doc0", "doc1"]
+
+    # The crawler doesn't emit them again, the indexer retries them when it starts
+    vector_store = FakeVectorStore()
+    indexer = index(vector_store, [], checkpoint_path)
+    assert indexer.stats["indexed"] == 2
+    assert vector_store.texts("doc1") == ["Page 1"]
+    with open(checkpoint_path + ".failed", encoding="utf-8") as f:
+        assert f.read() == ""
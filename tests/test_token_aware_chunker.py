@@ -0,0 +1,41 @@
+import re
+from types import SimpleNamespace
+
+import pytest
+
+transformers = pytest.importorskip("transformers")
+
+from rag.chunkers.token_aware_chunker import TokenAwareChunker
+
+
+class WordTokenizer:
+    """Stand-in for the fast tokenizer: one token per word."""
+
+    def __init__(self):
+        self.backend_tokenizer = self
+
+    def encode_batch(self, texts, add_special_tokens=False):
+        return [SimpleNamespace(offsets=[match.span() for match in re.finditer(r"\S+", text)]) for text in texts]
+
+
+@pytest.fixture
+def chunker(monkeypatch):
+    monkeypatch.setattr(transformers.AutoTokenizer, "from_pretrained", lambda *args, **kwargs: WordTokenizer())
+    return TokenAwareChunker(max_tokens=1000, reserved_tokens=0, min_tokens=0, max_bytes=100)
+
+
+def test_chunks_are_capped_on_utf8_bytes(chunker):
+    # 3-byte typographic characters: 50 characters, 150 bytes
+    text = "„Regulamin” – zał. … " * 10 + "\n\n" + "ąę " * 40
+
+    chunks = chunker.chunk_text(text)
+
+    assert all(len(chunk.page_content.encode("utf-8")) <= 100 for chunk in chunks)
+    assert " ".join(chunk.page_content for chunk in chunks).split() == text.split()
+
+
+def test_token_longer_than_max_bytes_is_cut(chunker):
+    chunks = chunker.chunk_text("…" * 80)
+
+    assert all(len(chunk.page_content.encode("utf-8")) <= 100 for chunk in chunks)
+    assert "".join(chunk.page_content for chunk in chunks) == "…" * 80
@@ -0,0 +1,34 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CAPTURE = """
+from rag.utils import trace_store
+trace_store.capture("response", query="Kiedy jest sesja?")
+"""
+
+
+def capture_in_process(tmp_path, per_process):
+    env = {**os.environ, "CHATAGH_TRACE_STORE": str(tmp_path / "traces.jsonl"), "LOG_DIR": str(tmp_path / "logs"),
+           "LOG_FILE_PER_PROCESS": "1" if per_process else "0"}
+    subprocess.run([sys.executable, "-c", CAPTURE], cwd=ROOT, env=env, check=True)
+
+
+def test_worker_processes_write_their_own_trace_files(tmp_path):
+    capture_in_process(tmp_path, per_process=True)
+    capture_in_process(tmp_path, per_process=True)
+
+    files = sorted(path.name for path in tmp_path.glob("traces.*.jsonl"))
+    assert len(files) == 2
+    assert not (tmp_path / "traces.jsonl").exists()
+    for name in files:
+        with open(tmp_path / name, encoding="utf-8") as f:
+            assert [json.loads(line)["query"] for line in f] == ["Kiedy jest sesja?"]
+
+
+def test_single_process_writes_the_configured_file(tmp_path):
+    capture_in_process(tmp_path, per_process=False)
+
+    assert [path.name for path in tmp_path.glob("traces*")] == ["traces.jsonl"]
@@ -0,0 +1,122 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from dataclasses import dataclass
+
+MAX_BLOB_BYTES = 50 * 1024 * 1024
+
+
+class BlobTooLargeError(Exception):
+    """Raised when a streamed blob exceeds the size limit."""
+
+
+@dataclass
+class Blob:
+    sha256: str
+    path: str
+    size: int
+    is_new: bool
+
+
+class BlobStore:
+    """
+    Content-addressed file store.
+
+    Files are stored once under blobs/<first 2 hex digits>/<sha256><extension>, whatever URL or
+    file name they were downloaded from. The SHA-256 is computed while the download is streamed
+    to a temporary file, so nothing is read twice. A URL -> blob mapping (url_map.json) records
+    where every blob was found, with the ETag and Last-Modified headers of the response for
+    conditional requests of the next crawl, and extracted text is stored next to the blob, so
+    extraction and OCR run once per distinct file.
+    """
+
+    def __init__(self, root, max_bytes=MAX_BLOB_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.blobs_dir = os.path.join(root, 'blobs')
+        self.url_map_path = os.path.join(root, 'url_map.json')
+        os.makedirs(self.blobs_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.url_map = {}
+        if os.path.exists(self.url_map_path):
+            with open(self.url_map_path, encoding='utf-8') as f:
+                self.url_map = json.load(f)
+
+    def blob_path(self, sha256, extension=''):
+        return os.path.join(self.blobs_dir, sha256[:2], f"{sha256}{extension}")
+
+    def text_path(self, sha256):
+        return self.blob_path(sha256, '.md')
+
+    def put_stream(self, chunks, extension=''):
+        """
+        Store a file from an iterable of byte chunks.
+
+        Raises:
+            BlobTooLargeError: If the stream exceeds `max_bytes`, nothing is stored
+
+        Returns:
+            Blob, with is_new=False if identical content was already stored
+        """
+        digest = hashlib.sha256()
+        size = 0
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.blobs_dir, suffix='.part')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as temp_file:
+                for chunk in chunks:
+                    if not chunk:
+                        continue
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise BlobTooLargeError(f"Blob exceeds {self.max_bytes} bytes")
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+
+            sha256 = digest.hexdigest()
+            path = self.blob_path(sha256, extension)
+            with self._lock:
+                is_new = not os.path.exists(path)
+                if is_new:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(temp_path, path)
+            return Blob(sha256=sha256, path=path, size=size, is_new=is_new)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def map_url(self, url, blob, **info):
+        with self._lock:
+            self.url_map[url] = {'sha256': blob.sha256, 'path': blob.path, 'size': blob.size, **info}
+
+    def lookup_url(self, url):
+        """Blob info of a URL downloaded before, or None."""
+        with self._lock:
+            entry = self.url_map.get(url)
+        if entry and os.path.exists(entry['path']):
+            return entry
+        return None
+
+    def read_text(self, sha256):
+        """Previously extracted text of a blob, or None."""
+        path = self.text_path(sha256)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+
+    def write_text(self, sha256, text):
+        path = self.text_path(sha256)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def save(self):
+        """Write the URL mapping, atomically so a crash while saving keeps the previous one."""
+        temp_path = self.url_map_path + '.tmp'
+        with self._lock:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.url_map, f, indent=2)
+            os.replace(temp_path, self.url_map_path)
@@ -1,5 +1,9 @@
+import sys
 import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 import re
+import gzip
 import json
 import time
 import hashlib
@@ -16,6 +20,11 @@ import fitz  # PyMuPDF
 import tempfile
 from tqdm import tqdm
 
+from rag.corpus.corpus_store import CorpusWriter
+from web_scraping.frontier import URLFrontier, normalize_url
+from web_scraping.seeding import SitemapSeeder, seed_priority, parse_date
+from web_scraping.blob_store import BlobStore, BlobTooLargeError, MAX_BLOB_BYTES
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -27,6 +36,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Patterns are compiled once, is_valid_url runs for every extracted link
+SKIP_URL_PATTERN = re.compile(
+    r'\.(css|js|jpg|jpeg|png|gif|svg|ico|mp3|mp4|avi|mov)$'
+    r'|(calendar|login|logout|signin|signout|register|admin)'
+    r'|(facebook\.com|twitter\.com|linkedin\.com|instagram\.com)',
+    re.IGNORECASE
+)
+DOCUMENT_EXTENSIONS = ('.pdf', '.docx', '.doc', '.txt', '.rtf')
+# Special URL patterns that might be document downloads
+DOCUMENT_URL_PATTERN = re.compile(r'download\.php|/download/|/file/|/document/|/get/|alias=', re.IGNORECASE)
+MAX_PAGE_BYTES = 5 * 1024 * 1024
+# Crawled pages between saves of the URL -> blob mapping and the crawl state
+SAVE_STATE_EVERY_PAGES = 100
+
 
 class ContentProcessor:
     """Process different types of content and convert to text"""
@@ -83,7 +106,10 @@ class WebCrawler:
     """Web crawler for extracting content and downloading files"""
 
     def __init__(self, start_url, output_dir="./output", max_pages=1000, max_depth=10,
-                 concurrency=5, delay=0.5, allowed_domains=None):
+                 concurrency=5, delay=0.5, allowed_domains=None, corpus_path=None,
+                 max_urls_per_pattern=500, use_bloom_filter=False, use_sitemaps=True, crawl_state_path=None,
+                 max_file_bytes=MAX_BLOB_BYTES, max_page_bytes=MAX_PAGE_BYTES, document_queue=None,
+                 checkpoint_path=None):
         # Parse the start URL to get the base domain
         parsed_url = urlparse(start_url)
         self.base_domain = parsed_url.netloc
@@ -105,23 +131,29 @@ class WebCrawler:
         os.makedirs(self.files_dir, exist_ok=True)
         os.makedirs(self.raw_html_dir, exist_ok=True)
 
-        # Track processed URLs and content hashes to detect duplicates
+        # Downloaded files are stored once per distinct content, whatever URL they come from
+        self.blob_store = BlobStore(self.files_dir, max_bytes=max_file_bytes)
+        self.max_page_bytes = max_page_bytes
+
+        # Track processed URLs (normalized) and content hashes to detect duplicates
         self.processed_urls = set()
         self.content_hashes = set()
         self.file_urls = set()
 
+        # Queued and visited URLs are deduplicated by the frontier, which also limits URL patterns (traps)
+        self.frontier = URLFrontier(max_urls_per_pattern=max_urls_per_pattern, use_bloom_filter=use_bloom_filter)
+
         # File extensions to download
-        self.file_extensions = ['.pdf', '.docx', '.doc', '.txt', '.rtf']
-
-        # Special URL patterns that might be document downloads
-        self.special_url_patterns = [
-            r'download\.php',
-            r'/download/',
-            r'/file/',
-            r'/document/',
-            r'/get/',
-            r'alias='
-        ]
+        self.file_extensions = list(DOCUMENT_EXTENSIONS)
+
+        # Seeding from robots.txt, sitemaps and feeds, and lastmod of pages from the previous crawl
+        self.use_sitemaps = use_sitemaps
+        self.crawl_state_path = crawl_state_path
+        self.crawl_state = {}
+        if crawl_state_path and os.path.exists(crawl_state_path):
+            with open(crawl_state_path, encoding='utf-8') as f:
+                self.crawl_state = json.load(f)
+        self.seed_lastmods = {}
 
         # Session for requests
         self.session = requests.Session()
@@ -129,10 +161,30 @@ class WebCrawler:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
 
+        self.seeder = SitemapSeeder(self.session) if use_sitemaps else None
+
         # Results storage
         self.pages = []
         self.downloaded_files = []
 
+        # Optional compact corpus store, pages and file texts are appended as they are extracted
+        self.corpus_writer = CorpusWriter(corpus_path) if corpus_path else None
+
+        # Optional bounded queue of extracted documents for streaming indexing (rag.streaming_indexing),
+        # a full queue blocks the crawler threads until the indexer catches up
+        self.document_queue = document_queue
+
+        # Optional checkpoint of queued and visited URLs and of the pages and files indexes, a crawl
+        # started again with the same checkpoint resumes where the previous one stopped
+        self.checkpoint_path = checkpoint_path
+
+    def emit_document(self, doc_id, content, metadata):
+        """Pass an extracted document to the corpus store and the indexing queue"""
+        if self.corpus_writer:
+            self.corpus_writer.add(doc_id, content, metadata)
+        if self.document_queue is not None:
+            self.document_queue.put((doc_id, content, metadata, time.time()))
+
     def is_valid_url(self, url):
         """Check if URL should be processed"""
         if not url or not url.startswith('http'):
@@ -148,44 +200,58 @@ class WebCrawler:
             return False
 
         # Skip common non-content URLs
-        skip_patterns = [
-            r'\.(css|js|jpg|jpeg|png|gif|svg|ico|mp3|mp4|avi|mov)$',
-            r'(calendar|login|logout|signin|signout|register|admin)',
-            r'(facebook\.com|twitter\.com|linkedin\.com|instagram\.com)'
-        ]
-
-        for pattern in skip_patterns:
-            if re.search(pattern, url, re.IGNORECASE):
-                return False
+        if SKIP_URL_PATTERN.search(url):
+            return False
 
-        return True
+        # Respect robots.txt rules read while seeding
+        return self.seeder is None or self.seeder.can_fetch(f"{parsed.scheme}://{parsed.netloc}", url)
 
     def is_likely_document_url(self, url):
         """Check if URL is likely to be a document download"""
-        # Check for file extensions
-        if any(url.lower().endswith(ext) for ext in self.file_extensions):
-            return True
-
-        # Check for special URL patterns
-        if any(re.search(pattern, url, re.IGNORECASE) for pattern in self.special_url_patterns):
-            return True
-
-        return False
+        return url.lower().endswith(DOCUMENT_EXTENSIONS) or bool(DOCUMENT_URL_PATTERN.search(url))
 
     def download_file(self, url, depth):
         """Download a file and process its content"""
-        if url in self.file_urls:
+        if normalize_url(url) in self.file_urls:
             return None
 
-        self.file_urls.add(url)
+        self.file_urls.add(normalize_url(url))
 
         try:
             logger.info(f"Downloading file: {url}")
 
+            # File downloaded by a previous crawl, revalidated with a conditional request, so a file
+            # republished at the same URL is downloaded again
+            known = self.blob_store.lookup_url(normalize_url(url))
+            known_text = self.blob_store.read_text(known['sha256']) if known else None
+            headers = {}
+            if known_text is not None:
+                if known.get('etag'):
+                    headers['If-None-Match'] = known['etag']
+                if known.get('last_modified'):
+                    headers['If-Modified-Since'] = known['last_modified']
+
             # Make request with stream=True for files
-            response = self.session.get(url, stream=True, timeout=30)
+            response = self.session.get(url, stream=True, timeout=30, headers=headers)
+            if response.status_code == 304 and headers:
+                response.close()
+                logger.info(f"Not modified since the previous crawl: {url}")
+                return self.record_known_file(url, known, known_text, depth) if known_text else None
             if response.status_code != 200:
                 logger.warning(f"Failed to download {url}, status code: {response.status_code}")
+                response.close()
+                return None
+
+            # Cut off before downloading the body if headers already rule the file out
+            content_type = response.headers.get('Content-Type', '').lower()
+            content_length = int(response.headers.get('Content-Length') or 0)
+            if content_length > self.blob_store.max_bytes:
+                logger.warning(f"Skipping {url}: {content_length} bytes exceeds the size limit")
+                response.close()
+                return None
+            if 'text/html' in content_type:
+                logger.info(f"Skipping {url}: not a document ({content_type})")
+                response.close()
                 return None
 
             # Try to determine filename from headers or URL
@@ -212,7 +278,6 @@ class WebCrawler:
 
             # Ensure file has an extension if it's missing
             if not os.path.splitext(filename)[1]:
-                content_type = response.headers.get('Content-Type', '')
                 if 'pdf' in content_type:
                     filename += '.pdf'
                 elif 'word' in content_type or 'docx' in content_type:
@@ -222,36 +287,69 @@ class WebCrawler:
                 else:
                     filename += '.bin'
 
-            file_path = os.path.join(self.files_dir, filename)
+            file_ext = os.path.splitext(filename)[1].lower()
 
-            # Save the file
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
+            # Save the file, hashing it while streaming
+            try:
+                with response:
+                    blob = self.blob_store.put_stream(response.iter_content(chunk_size=8192), file_ext)
+            except BlobTooLargeError:
+                logger.warning(f"Skipping {url}: download exceeded the size limit")
+                return None
 
-            # Process file content based on type
-            text_content = ""
-            file_ext = os.path.splitext(filename)[1].lower()
+            self.blob_store.map_url(
+                normalize_url(url), blob, filename=filename,
+                etag=response.headers.get('ETag'), last_modified=response.headers.get('Last-Modified')
+            )
+            if known_text is not None and blob.sha256 == known['sha256']:
+                # Downloaded again (no validators or the server ignores them), but the content didn't change
+                logger.info(f"Unchanged file: {url}")
+                return self.record_known_file(url, known, known_text, depth) if known_text else None
+            if not blob.is_new and not known:
+                # Same content already stored (and extracted, indexed) from another URL
+                logger.info(f"Duplicate file {url}, same content as blob {blob.sha256[:10]}")
+                return None
+
+            file_path = blob.path
+
+            # Process file content based on type, a changed file whose new content is already stored
+            # replaces its previous version with the text extracted before
+            text_content = None if blob.is_new else self.blob_store.read_text(blob.sha256)
 
-            if file_ext in ['.pdf']:
-                text_content = ContentProcessor.extract_text_from_pdf(file_path)
-            elif file_ext in ['.docx', '.doc']:
-                text_content = ContentProcessor.extract_text_from_docx(file_path)
-            elif file_ext in ['.txt', '.rtf']:
-                text_content = ContentProcessor.extract_text_from_txt(file_path)
+            if text_content is None:
+                text_content = ""
+                if file_ext in ['.pdf']:
+                    text_content = ContentProcessor.extract_text_from_pdf(file_path)
+                elif file_ext in ['.docx', '.doc']:
+                    text_content = ContentProcessor.extract_text_from_docx(file_path)
+                elif file_ext in ['.txt', '.rtf']:
+                    text_content = ContentProcessor.extract_text_from_txt(file_path)
+
+                self.blob_store.write_text(blob.sha256, text_content)
 
             # Save extracted text
             if text_content:
-                text_filename = os.path.splitext(filename)[0] + ".md"
-                text_path = os.path.join(self.content_dir, text_filename)
+                # Stable id of the URL like for pages, so a changed file replaces its previous version
+                # in the index, the content hash is kept in the metadata
+                doc_id = hashlib.md5(normalize_url(url).encode()).hexdigest()[:10]
+                text_path = os.path.join(self.content_dir, f"{doc_id}.md")
 
                 with open(text_path, 'w', encoding='utf-8') as f:
                     f.write(text_content)
 
+                self.emit_document(doc_id, text_content, {
+                    'url': url,
+                    'title': filename,
+                    'depth': depth,
+                    'file_type': file_ext[1:],
+                    'sha256': blob.sha256
+                })
+
                 # Add to results
                 self.downloaded_files.append({
                     'url': url,
+                    'doc_id': doc_id,
+                    'sha256': blob.sha256,
                     'file_path': file_path,
                     'text_path': text_path,
                     'filename': filename,
@@ -270,6 +368,35 @@ class WebCrawler:
 
         return None
 
+    def record_known_file(self, url, known, text_content, depth):
+        """
+        Add a file downloaded by a previous crawl to the files index without downloading it again,
+        so the index of a re-crawl still lists it. The document is not emitted again.
+        """
+        doc_id = hashlib.md5(normalize_url(url).encode()).hexdigest()[:10]
+        text_path = os.path.join(self.content_dir, f"{doc_id}.md")
+        if not os.path.exists(text_path):
+            with open(text_path, 'w', encoding='utf-8') as f:
+                f.write(text_content)
+
+        filename = known.get('filename') or os.path.basename(known['path'])
+        self.downloaded_files.append({
+            'url': url,
+            'doc_id': doc_id,
+            'sha256': known['sha256'],
+            'file_path': known['path'],
+            'text_path': text_path,
+            'filename': filename,
+            'file_type': os.path.splitext(filename)[1][1:].lower(),
+            'depth': depth
+        })
+
+        return {
+            'url': url,
+            'filename': filename,
+            'text': text_content
+        }
+
     def extract_content(self, url, html, depth):
         """Extract clean content from HTML, removing duplicates like headers and menus"""
         soup = BeautifulSoup(html, 'html.parser')
@@ -342,12 +469,50 @@ class WebCrawler:
             'html': str(main_content)
         }
 
+    def fetch_html(self, url, depth):
+        """
+        Fetch an HTML page, reading at most `max_page_bytes`.
+
+        Returns:
+            The page HTML, the download_file result if the URL serves a document, or None
+        """
+        response = self.session.get(url, timeout=15, stream=True)
+        with response:
+            if response.status_code != 200:
+                logger.warning(f"Failed to fetch {url}, status code: {response.status_code}")
+                return None
+
+            # Check content type before reading the body
+            content_type = response.headers.get('Content-Type', '').lower()
+            if 'text/html' not in content_type:
+                response.close()
+                # This might be a file download
+                if any(ext[1:] in content_type for ext in self.file_extensions):
+                    return self.download_file(url, depth)
+                return None
+
+            if int(response.headers.get('Content-Length') or 0) > self.max_page_bytes:
+                logger.warning(f"Skipping {url}: page exceeds {self.max_page_bytes} bytes")
+                return None
+
+            body = bytearray()
+            for chunk in response.iter_content(chunk_size=65536):
+                body += chunk
+                if len(body) > self.max_page_bytes:
+                    logger.warning(f"Skipping {url}: page exceeds {self.max_page_bytes} bytes")
+                    return None
+
+            return body.decode(response.encoding or 'utf-8', errors='replace')
+
     def crawl_url(self, url, depth=0):
         """Crawl a single URL, extract content and find links"""
-        if url in self.processed_urls or depth > self.max_depth or len(self.processed_urls) >= self.max_pages:
+        # The normalized URL is only the dedup key, the page is fetched, stored and its links resolved
+        # with the URL as linked (trailing slash, session params)
+        url_key = normalize_url(url)
+        if url_key in self.processed_urls or depth > self.max_depth or len(self.processed_urls) >= self.max_pages:
             return
 
-        self.processed_urls.add(url)
+        self.processed_urls.add(url_key)
         logger.info(f"Crawling [{depth}/{self.max_depth}] {url}")
 
         try:
@@ -358,25 +523,17 @@ class WebCrawler:
                 return result
 
             # Otherwise treat as HTML page
-            response = self.session.get(url, timeout=15)
-            if response.status_code != 200:
-                logger.warning(f"Failed to fetch {url}, status code: {response.status_code}")
+            html = self.fetch_html(url, depth)
+            if html is None:
                 return
-
-            # Check content type
-            content_type = response.headers.get('Content-Type', '').lower()
-            if 'text/html' not in content_type:
-                # This might be a file download
-                if any(ext[1:] in content_type for ext in self.file_extensions):
-                    return self.download_file(url, depth)
-                return
-
-            html = response.text
-
-            # Save raw HTML
-            page_id = hashlib.md5(url.encode()).hexdigest()[:10]
-            raw_path = os.path.join(self.raw_html_dir, f"{page_id}.html")
-            with open(raw_path, 'w', encoding='utf-8') as f:
+            if isinstance(html, dict):
+                # The URL turned out to be a file download
+                return html
+
+            # Save raw HTML, compressed
+            page_id = hashlib.md5(url_key.encode()).hexdigest()[:10]
+            raw_path = os.path.join(self.raw_html_dir, f"{page_id}.html.gz")
+            with gzip.open(raw_path, 'wt', encoding='utf-8') as f:
                 f.write(html)
 
             # Extract clean content
@@ -400,6 +557,8 @@ class WebCrawler:
                 with open(metadata_path, 'w', encoding='utf-8') as f:
                     json.dump(extracted['metadata'], f, indent=2)
 
+                self.emit_document(page_id, extracted['content'], extracted['metadata'])
+
                 # Add to results
                 self.pages.append({
                     'url': url,
@@ -434,34 +593,132 @@ class WebCrawler:
             time.sleep(self.delay)
 
 
+    def seed_frontier(self):
+        """
+        Queue URLs from sitemaps and feeds of the allowed domains, most recently changed first.
+        Pages whose lastmod didn't change since the previous crawl (crawl state) are skipped.
+        """
+        scheme = urlparse(self.start_url).scheme
+        seeded = unchanged = 0
+        for domain in dict.fromkeys([self.base_domain] + self.allowed_domains):
+            for entry in self.seeder.seed(f"{scheme}://{domain}"):
+                if not self.is_valid_url(entry.url):
+                    continue
+                url = normalize_url(entry.url)
+                if entry.lastmod:
+                    self.seed_lastmods[url] = entry.lastmod.isoformat()
+                    previous = parse_date(self.crawl_state.get(url))
+                    if previous and entry.lastmod <= previous:
+                        self.frontier.mark_seen(url)
+                        unchanged += 1
+                        continue
+                if self.frontier.add(entry.url, 1, priority=seed_priority(entry), check_traps=False):
+                    seeded += 1
+
+        self.frontier.stats['seeded'] = seeded
+        self.frontier.stats['unchanged'] = unchanged
+        logger.info(f"Seeded {seeded} URLs from sitemaps and feeds, skipped {unchanged} unchanged pages")
+
+    def save_crawl_state(self):
+        """Store lastmod of crawled pages, so the next crawl can skip unchanged ones."""
+        for url in self.processed_urls:
+            if url in self.seed_lastmods:
+                self.crawl_state[url] = self.seed_lastmods[url]
+        temp_path = self.crawl_state_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.crawl_state, f, indent=2)
+        os.replace(temp_path, self.crawl_state_path)
+
+    def save_state(self):
+        """
+        Persist the URL -> blob mapping, the crawl state and the checkpoint. Called every
+        `SAVE_STATE_EVERY_PAGES` pages during the crawl, so a crash doesn't lose what was already done.
+
+        With a document queue that supports `join` (StreamingIndexer.queue), waits until the emitted
+        documents are indexed first, so the checkpoint never covers documents lost in the queue.
+        """
+        if self.document_queue is not None and hasattr(self.document_queue, 'join'):
+            self.document_queue.join()
+        self.blob_store.save()
+        if self.crawl_state_path:
+            self.save_crawl_state()
+        if self.checkpoint_path:
+            self.save_checkpoint()
+
+    def save_checkpoint(self):
+        """Store queued and visited URLs and the pages and files indexes, see `load_checkpoint`."""
+        checkpoint = {
+            'processed_urls': sorted(self.processed_urls),
+            'queued': self.frontier.queued(),
+            'frontier_stats': dict(self.frontier.stats),
+            'pages': self.pages,
+            'downloaded_files': self.downloaded_files,
+        }
+        temp_path = self.checkpoint_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def load_checkpoint(self):
+        """
+        Restore the state of an interrupted crawl from `checkpoint_path`, if it exists.
+
+        Returns:
+            bool: Whether a checkpoint was loaded
+        """
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return False
+        with open(self.checkpoint_path, encoding='utf-8') as f:
+            checkpoint = json.load(f)
+
+        self.processed_urls.update(checkpoint['processed_urls'])
+        for url in self.processed_urls:
+            self.frontier.mark_seen(url)
+        for url, depth, priority in checkpoint['queued']:
+            self.frontier.add(url, depth, priority=priority, check_traps=False)
+        self.frontier.stats.clear()
+        self.frontier.stats.update(checkpoint['frontier_stats'])
+
+        self.pages = checkpoint['pages']
+        self.downloaded_files = checkpoint['downloaded_files']
+        self.content_hashes.update(page['metadata']['content_hash'] for page in self.pages)
+        self.file_urls.update(normalize_url(file['url']) for file in self.downloaded_files)
+
+        logger.info(f"Resuming crawl: {len(self.processed_urls)} URLs visited, {len(self.frontier)} queued")
+        return True
+
     def crawl(self):
         """Main crawling method"""
         start_time = time.time()
-        pending_urls = [(self.start_url, 0)]  # (url, depth)
+        self.load_checkpoint()
+        self.frontier.add(self.start_url, 0)
+        if self.use_sitemaps:
+            self.seed_frontier()
         results = []
+        saved_at = 0
 
-        with tqdm(total=self.max_pages) as pbar:
-            while pending_urls and len(self.processed_urls) < self.max_pages:
-                # Get next batch of URLs
-                batch = pending_urls[:self.concurrency]
-                pending_urls = pending_urls[self.concurrency:]
+        with tqdm(total=self.max_pages) as pbar, ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while len(self.frontier) and len(self.processed_urls) < self.max_pages:
+                # Get next batch of URLs, the frontier returns them in breadth-first order
+                batch = [self.frontier.pop() for _ in range(min(self.concurrency, len(self.frontier)))]
 
                 # Process batch in parallel
-                with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
-                    future_to_url = {executor.submit(self.crawl_url, url, depth): url for url, depth in batch}
-
-                    for future in future_to_url:
-                        result = future.result()
-                        if result:
-                            if 'links' in result:  # HTML page
-                                # Add new links to pending
-                                new_links = [(link, result['depth'] + 1) for link in result['links']]
-                                pending_urls.extend(new_links)
-                                results.append(result)
-                                pbar.update(1)
-
-                # Sort pending URLs by depth (breadth-first approach)
-                pending_urls.sort(key=lambda x: x[1])
+                future_to_url = {executor.submit(self.crawl_url, url, depth): url for url, depth in batch}
+
+                for future in future_to_url:
+                    result = future.result()
+                    if result:
+                        if 'links' in result:  # HTML page
+                            # Queue new links, already seen URLs and likely traps are dropped
+                            for link in result['links']:
+                                if result['depth'] + 1 <= self.max_depth:
+                                    self.frontier.add(link, result['depth'] + 1)
+                            results.append(result)
+                            pbar.update(1)
+
+                if len(self.processed_urls) - saved_at >= SAVE_STATE_EVERY_PAGES:
+                    self.save_state()
+                    saved_at = len(self.processed_urls)
 
         end_time = time.time()
 
@@ -471,7 +728,8 @@ class WebCrawler:
             'pages_crawled': len(self.pages),
             'files_downloaded': len(self.downloaded_files),
             'time_taken': end_time - start_time,
-            'allowed_domains': self.allowed_domains
+            'allowed_domains': self.allowed_domains,
+            'frontier': dict(self.frontier.stats)
         }
 
         # Save summary
@@ -486,6 +744,15 @@ class WebCrawler:
         with open(os.path.join(self.output_dir, 'files_index.json'), 'w', encoding='utf-8') as f:
             json.dump(self.downloaded_files, f, indent=2)
 
+        if self.corpus_writer:
+            self.corpus_writer.close()
+
+        self.save_state()
+
+        # The crawl is complete, the next one starts from the beginning (skipping unchanged pages)
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
         logger.info(f"Crawling completed: {len(self.pages)} pages and {len(self.downloaded_files)} files processed")
 
         return summary
@@ -501,6 +768,14 @@ def main():
     parser.add_argument('--concurrency', type=int, default=5, help='Number of concurrent requests')
     parser.add_argument('--delay', type=float, default=0.5, help='Delay between requests in seconds')
     parser.add_argument('--domains', nargs='+', help='Allowed domains (defaults to domain of start URL)')
+    parser.add_argument('--corpus', help='Also write pages to a compact corpus store at this path')
+    parser.add_argument('--max-urls-per-pattern', type=int, default=500,
+                        help='Maximum URLs queued per URL pattern, limits crawler traps such as calendars')
+    parser.add_argument('--bloom-filter', action='store_true', help='Track seen URLs in a Bloom filter (very large crawls)')
+    parser.add_argument('--no-sitemaps', action='store_true', help='Do not seed from robots.txt, sitemaps and feeds')
+    parser.add_argument('--crawl-state', help='JSON file with lastmod of crawled pages, unchanged pages are skipped')
+    parser.add_argument('--checkpoint', help='JSON file of the crawl progress, an interrupted crawl resumes from it')
+    parser.add_argument('--max-file-mb', type=float, default=MAX_BLOB_BYTES / 1024 / 1024, help='Maximum size of a downloaded file')
 
     args = parser.parse_args()
 
@@ -511,7 +786,14 @@ def main():
         max_depth=args.max_depth,
         concurrency=args.concurrency,
         delay=args.delay,
-        allowed_domains=args.domains
+        allowed_domains=args.domains,
+        corpus_path=args.corpus,
+        max_urls_per_pattern=args.max_urls_per_pattern,
+        use_bloom_filter=args.bloom_filter,
+        use_sitemaps=not args.no_sitemaps,
+        crawl_state_path=args.crawl_state,
+        max_file_bytes=int(args.max_file_mb * 1024 * 1024),
+        checkpoint_path=args.checkpoint
     )
 
     summary = crawler.crawl()
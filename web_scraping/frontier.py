@@ -0,0 +1,183 @@
+import re
+import math
+import heapq
+import hashlib
+import itertools
+from collections import defaultdict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query parameters which don't change page content
+TRACKING_PARAMS = re.compile(
+    r'^(utm_\w+|fbclid|gclid|dclid|msclkid|mc_cid|mc_eid|_ga|_gl|yclid|igshid|ref|ref_src|sessionid|phpsessid|sid)$',
+    re.IGNORECASE
+)
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+NUMBER_SEGMENT = re.compile(r'\d+')
+
+
+def normalize_url(url):
+    """
+    Canonical form of a URL used for deduplication.
+
+    Lowercases scheme and host, drops default ports, fragments, tracking parameters and empty
+    query values, sorts query parameters, and removes trailing slashes and duplicate slashes
+    from the path (except for the root path).
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    path = re.sub(r'/{2,}', '/', parts.path) or '/'
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=False)
+        if not TRACKING_PARAMS.match(key)
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+
+def url_pattern(url):
+    """
+    Pattern of a (normalized) URL, grouping pages generated from the same template, e.g.
+    'https://agh.edu.pl/kalendarz/2024/05?page=3' -> 'agh.edu.pl/kalendarz/{n}/{n}?page'.
+    """
+    parts = urlsplit(url)
+    path = NUMBER_SEGMENT.sub('{n}', parts.path)
+    keys = sorted({key for key, _ in parse_qsl(parts.query)})
+    return f"{parts.netloc}{path}?{'&'.join(keys)}" if keys else f"{parts.netloc}{path}"
+
+
+class BloomFilter:
+    """
+    Fixed-size probabilistic set for very large crawls: no false negatives, false positives
+    (URLs wrongly considered seen) at about `error_rate` once `capacity` items are added.
+    """
+
+    def __init__(self, capacity=10_000_000, error_rate=0.001):
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:], 'big') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def __len__(self):
+        return self.count
+
+
+class URLFrontier:
+    """
+    Breadth-first crawl frontier with URL deduplication and crawler-trap budgets.
+
+    Every normalized URL is accepted at most once: a single `seen` set covers both queued
+    and visited URLs (a Bloom filter if `use_bloom_filter` is set), so membership checks are O(1).
+    URLs are kept in one priority queue per depth: breadth-first order without sorting the whole
+    frontier, and within a depth higher `priority` first (e.g. sitemap seeds of recently changed
+    pages), then insertion order.
+
+    URLs are rejected as likely traps (calendars, endless pagination, session ids in paths) when:
+        - more than `max_urls_per_pattern` URLs of the same pattern (see `url_pattern`) were accepted
+        - the path is deeper than `max_path_segments`
+        - a path segment repeats more than `max_repeated_segments` times
+    """
+
+    def __init__(self, max_urls_per_pattern=500, max_path_segments=12, max_repeated_segments=2,
+                 use_bloom_filter=False, bloom_capacity=10_000_000):
+        self.max_urls_per_pattern = max_urls_per_pattern
+        self.max_path_segments = max_path_segments
+        self.max_repeated_segments = max_repeated_segments
+
+        self.seen = BloomFilter(bloom_capacity) if use_bloom_filter else set()
+        self.queues = defaultdict(list)
+        self._counter = itertools.count()
+        self.pattern_counts = defaultdict(int)
+        self.size = 0
+        self.stats = defaultdict(int)
+
+    def __len__(self):
+        return self.size
+
+    def is_trap(self, url):
+        segments = [segment for segment in urlsplit(url).path.split('/') if segment]
+        if len(segments) > self.max_path_segments:
+            return True
+        if segments and max(segments.count(segment) for segment in set(segments)) > self.max_repeated_segments:
+            return True
+        return self.pattern_counts[url_pattern(url)] >= self.max_urls_per_pattern
+
+    def mark_seen(self, url):
+        """
+        Mark a URL as seen without queuing it (e.g. the target of a redirect).
+        Returns False if it was already seen.
+        """
+        url = normalize_url(url)
+        if url in self.seen:
+            return False
+        self.seen.add(url)
+        return True
+
+    def add(self, url, depth, priority=0.0, check_traps=True):
+        """
+        Queue a URL unless it was already seen or looks like a trap.
+
+        The normalized URL is only the deduplication key, the URL is queued as given, so it is
+        fetched and its relative links are resolved as linked (e.g. with its trailing slash).
+
+        Args:
+            url: URL to queue
+            depth: Crawl depth of the URL
+            priority: Order within the depth, higher first
+            check_traps: Whether trap budgets apply (disabled for trusted sitemap seeds)
+
+        Returns:
+            bool: Whether the URL was queued
+        """
+        key = normalize_url(url)
+        if key in self.seen:
+            self.stats['duplicates'] += 1
+            return False
+        if check_traps and self.is_trap(key):
+            self.stats['traps'] += 1
+            return False
+
+        self.seen.add(key)
+        self.pattern_counts[url_pattern(key)] += 1
+        url = url.strip().split('#', 1)[0]
+        heapq.heappush(self.queues[depth], (-priority, next(self._counter), url))
+        self.size += 1
+        self.stats['queued'] += 1
+        return True
+
+    def queued(self):
+        """
+        Queued URLs as (url, depth, priority) in no particular order, e.g. to checkpoint the frontier.
+        """
+        return [(url, depth, -priority) for depth, queue in self.queues.items() for priority, _, url in queue]
+
+    def pop(self):
+        """
+        Return the next (url, depth) in breadth-first order, or None if the frontier is empty.
+        """
+        for depth in sorted(self.queues):
+            queue = self.queues[depth]
+            if queue:
+                self.size -= 1
+                return heapq.heappop(queue)[2], depth
+            del self.queues[depth]
+        return None
@@ -0,0 +1,218 @@
+import re
+import gzip
+import math
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+from urllib.parse import urljoin
+from urllib.robotparser import RobotFileParser
+import xml.etree.ElementTree as ET
+
+logger = logging.getLogger(__name__)
+
+CHANGEFREQ_WEIGHTS = {
+    'always': 1.0, 'hourly': 0.9, 'daily': 0.8, 'weekly': 0.6, 'monthly': 0.4, 'yearly': 0.2, 'never': 0.0
+}
+# Days after which the recency part of the priority drops to 1/e
+RECENCY_DAYS = 30
+FEED_LINK_PATTERN = re.compile(
+    r'<link[^>]+type=["\']application/(?:rss|atom)\+xml["\'][^>]*>', re.IGNORECASE
+)
+HREF_PATTERN = re.compile(r'href=["\']([^"\']+)["\']', re.IGNORECASE)
+
+
+@dataclass
+class SeedEntry:
+    """A URL found in a sitemap or feed, with its change hints."""
+    url: str
+    lastmod: Optional[datetime] = None
+    changefreq: Optional[str] = None
+    priority: Optional[float] = None
+    source: str = 'sitemap'
+
+
+def parse_date(value):
+    """Parse W3C datetime (sitemaps, Atom) or RFC 822 (RSS) dates, as timezone-aware UTC."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        date = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            date = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    return date if date.tzinfo else date.replace(tzinfo=timezone.utc)
+
+
+def seed_priority(entry, now=None):
+    """
+    Crawl priority in [0, 1] from sitemap hints: recently modified pages and pages which
+    change often come first. Missing hints count as average.
+    """
+    now = now or datetime.now(timezone.utc)
+    recency = math.exp(-max(0.0, (now - entry.lastmod).total_seconds() / 86400) / RECENCY_DAYS) if entry.lastmod else 0.5
+    changefreq = CHANGEFREQ_WEIGHTS.get((entry.changefreq or '').lower(), 0.5)
+    priority = entry.priority if entry.priority is not None else 0.5
+    return 0.5 * recency + 0.3 * changefreq + 0.2 * priority
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _child_text(element, name):
+    for child in element:
+        if _local_name(child.tag) == name:
+            return (child.text or '').strip()
+    return None
+
+
+def parse_sitemap(content):
+    """
+    Parse a sitemap or sitemap index (optionally gzipped).
+
+    Returns:
+        tuple: (list of SeedEntry of a urlset, list of nested sitemap URLs of a sitemap index)
+    """
+    if content[:2] == b'\x1f\x8b':
+        content = gzip.decompress(content)
+
+    root = ET.fromstring(content)
+    entries, sitemaps = [], []
+    for element in root:
+        name = _local_name(element.tag)
+        if name == 'sitemap':
+            location = _child_text(element, 'loc')
+            if location:
+                sitemaps.append(location)
+        elif name == 'url':
+            location = _child_text(element, 'loc')
+            if not location:
+                continue
+            try:
+                priority = float(_child_text(element, 'priority'))
+            except (TypeError, ValueError):
+                priority = None
+            entries.append(SeedEntry(
+                url=location,
+                lastmod=parse_date(_child_text(element, 'lastmod')),
+                changefreq=_child_text(element, 'changefreq'),
+                priority=priority
+            ))
+    return entries, sitemaps
+
+
+def parse_feed(content):
+    """Parse an RSS 2.0 or Atom feed into SeedEntry items."""
+    root = ET.fromstring(content)
+    entries = []
+    for element in root.iter():
+        name = _local_name(element.tag)
+        if name == 'item':
+            link = _child_text(element, 'link')
+            date = _child_text(element, 'pubDate') or _child_text(element, 'date')
+        elif name == 'entry':
+            link = next(
+                (child.get('href') for child in element
+                 if _local_name(child.tag) == 'link' and child.get('rel', 'alternate') == 'alternate'),
+                None
+            )
+            date = _child_text(element, 'updated') or _child_text(element, 'published')
+        else:
+            continue
+        if link:
+            entries.append(SeedEntry(url=link, lastmod=parse_date(date), changefreq='daily', source='feed'))
+    return entries
+
+
+def discover_feeds(html, base_url):
+    """Feed URLs advertised with <link rel="alternate" type="application/rss+xml" ...> in a page."""
+    feeds = []
+    for tag in FEED_LINK_PATTERN.findall(html):
+        href = HREF_PATTERN.search(tag)
+        if href:
+            feeds.append(urljoin(base_url, href.group(1)))
+    return feeds
+
+
+class SitemapSeeder:
+    """
+    Collects crawl seeds of a domain from robots.txt, sitemaps (following sitemap indexes)
+    and RSS/Atom feeds advertised on its home page.
+
+    The parsed robots.txt is kept, so the crawler can also skip disallowed URLs.
+    """
+
+    def __init__(self, session, user_agent='*', timeout=15, max_sitemaps=200, max_entries=100000):
+        self.session = session
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.max_sitemaps = max_sitemaps
+        self.max_entries = max_entries
+        self.robots = {}
+
+    def _get(self, url):
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            if response.status_code == 200:
+                return response
+            logger.info(f"Seeding: {url} returned status {response.status_code}")
+        except Exception as e:
+            logger.warning(f"Seeding: failed to fetch {url}: {e}")
+        return None
+
+    def read_robots(self, base_url):
+        robots = RobotFileParser()
+        response = self._get(urljoin(base_url, '/robots.txt'))
+        robots.parse(response.text.splitlines() if response is not None else [])
+        self.robots[base_url] = robots
+        return robots
+
+    def can_fetch(self, base_url, url):
+        robots = self.robots.get(base_url)
+        return robots is None or robots.can_fetch(self.user_agent, url)
+
+    def seed(self, base_url):
+        """
+        Return seed entries of the site at base_url (e.g. 'https://www.agh.edu.pl').
+        """
+        robots = self.read_robots(base_url)
+        pending = list(robots.site_maps() or []) or [urljoin(base_url, '/sitemap.xml')]
+        visited = set()
+        entries = []
+
+        while pending and len(visited) < self.max_sitemaps and len(entries) < self.max_entries:
+            sitemap_url = pending.pop(0)
+            if sitemap_url in visited:
+                continue
+            visited.add(sitemap_url)
+
+            response = self._get(sitemap_url)
+            if response is None:
+                continue
+            try:
+                sitemap_entries, nested = parse_sitemap(response.content)
+            except ET.ParseError as e:
+                logger.warning(f"Seeding: invalid sitemap {sitemap_url}: {e}")
+                continue
+            entries.extend(sitemap_entries)
+            pending.extend(nested)
+
+        home = self._get(base_url)
+        if home is not None:
+            for feed_url in discover_feeds(home.text, base_url):
+                response = self._get(feed_url)
+                if response is None:
+                    continue
+                try:
+                    entries.extend(parse_feed(response.content))
+                except ET.ParseError as e:
+                    logger.warning(f"Seeding: invalid feed {feed_url}: {e}")
+
+        entries = [entry for entry in entries[:self.max_entries] if self.can_fetch(base_url, entry.url)]
+        logger.info(f"Seeding: {len(entries)} URLs from {len(visited)} sitemaps of {base_url}")
+        return entries